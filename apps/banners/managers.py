@@ -15,6 +15,13 @@ class BannerQuerySet(models.QuerySet):
     def active_for_position(self, position):
         """Return active banners for specific position"""
         return self.active().for_position(position)
+    
+    def first_active_by_position(self, positions):
+        """{position: first active banner} for several positions in one query"""
+        banners = {}
+        for banner in self.active().filter(position__in=positions).order_by('position', 'order', '-created_at'):
+            banners.setdefault(banner.position, banner)
+        return banners
 
 
 class BannerManager(models.Manager):
@@ -31,3 +38,6 @@ class BannerManager(models.Manager):
     
     def active_for_position(self, position):
         return self.get_queryset().active_for_position(position)
+    
+    def first_active_by_position(self, positions):
+        return self.get_queryset().first_active_by_position(positions)
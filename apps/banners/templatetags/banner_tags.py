@@ -1,5 +1,6 @@
 from django import template
 from apps.banners.models import Banner
+from apps.pages.cache import reference_cache
 
 register = template.Library()
 
@@ -12,8 +13,10 @@ def get_banners(position):
     Usage in templates:
         {% load banner_tags %}
         {% get_banners 'header' as header_banners %}
+    
+    Served from the process-level reference cache.
     """
-    return Banner.objects.filter(
-        position=position,
-        is_active=True
-    ).order_by('order', '-created_at')
+    return reference_cache.get(
+        f'banners:{position}',
+        lambda: list(Banner.objects.active_for_position(position))
+    )
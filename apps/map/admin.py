@@ -1,12 +1,12 @@
 from django.contrib import admin
-from .models import MedicalCenter
+from .models import Disease, ImportJob, MedicalCenter
 
 
 @admin.register(MedicalCenter)
 class MedicalCenterAdmin(admin.ModelAdmin):
     list_display = ['department', 'address', 'lat', 'lng', 'created_at']
     search_fields = ['department', 'address', 'treatedDiseases']
-    list_filter = ['created_at', 'updated_at']
+    list_filter = ['diseases', 'created_at', 'updated_at']
     readonly_fields = ['created_at', 'updated_at']
     
     fieldsets = (
@@ -24,3 +24,20 @@ class MedicalCenterAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(Disease)
+class DiseaseAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name']
+    readonly_fields = ['slug']
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'stage', 'fetched', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = [
+        'status', 'stage', 'fetched', 'result', 'error', 'attempts',
+        'created_at', 'started_at', 'heartbeat_at', 'finished_at'
+    ]
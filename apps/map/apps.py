@@ -5,3 +5,6 @@ class MapConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.map'
     verbose_name = 'Mapa Ośrodków Medycznych'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,104 @@
+"""
+Geo helpers for medical centers.
+
+MedicalCenter.geohash is a B-tree indexed geohash of (lat, lng). Points
+close to each other share a geohash prefix, so a search area is turned
+into a handful of prefix (LIKE 'abc%') range scans - see covering_cells().
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Cell size (lat degrees, lng degrees) for geohash precision 1..9
+CELL_SIZES = {
+    precision: (180 / 2 ** ((5 * precision) // 2), 360 / 2 ** ((5 * precision + 1) // 2))
+    for precision in range(1, GEOHASH_PRECISION + 1)
+}
+
+# Upper bound of prefix scans per query
+MAX_CELLS = 16
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    bits = []
+    even = True
+    while len(bits) < precision * 5:
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits.append(1)
+            bounds[0] = middle
+        else:
+            bits.append(0)
+            bounds[1] = middle
+        even = not even
+
+    return ''.join(
+        BASE32[int(''.join(map(str, bits[i:i + 5])), 2)]
+        for i in range(0, len(bits), 5)
+    )
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometers"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) of a circle"""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    d_lng = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180)
+    return (
+        max(lat - d_lat, -90), min(lat + d_lat, 90),
+        max(lng - d_lng, -180), min(lng + d_lng, 180),
+    )
+
+
+def _frange(start, stop, step):
+    value = start
+    while value < stop:
+        yield value
+        value += step
+    yield stop
+
+
+def covering_cells(min_lat, max_lat, min_lng, max_lng):
+    """
+    Smallest set of geohash prefixes (at most MAX_CELLS) covering a box.
+    Returns [] when the box is too big for any prefix - no prefilter then.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lng = CELL_SIZES[precision]
+        rows = math.ceil((max_lat - min_lat) / cell_lat) + 1
+        columns = math.ceil((max_lng - min_lng) / cell_lng) + 1
+        if rows * columns > MAX_CELLS:
+            continue
+        return sorted({
+            encode_geohash(cell_lat_value, cell_lng_value, precision)
+            for cell_lat_value in _frange(min_lat, max_lat, cell_lat)
+            for cell_lng_value in _frange(min_lng, max_lng, cell_lng)
+        })
+    return []
+
+
+def precision_for_zoom(zoom, cells_per_tile=4):
+    """
+    Geohash precision used as cluster grid for a web map zoom level:
+    about cells_per_tile clusters across one 256px tile. Negative zoom
+    levels are treated as 0.
+    """
+    wanted_lng = 360 / 2 ** max(zoom, 0) / cells_per_tile
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        if CELL_SIZES[precision][1] <= wanted_lng:
+            return precision
+    return GEOHASH_PRECISION
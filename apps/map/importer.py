@@ -0,0 +1,331 @@
+"""
+Medical centers import engine shared by the import_medical_centers command
+and ImportLocationsAPIView.
+
+Existing centers are loaded once into a dict keyed by the natural key
+(department, address) and compared with the feed. Only the differences
+are written - bulk_create / bulk_update in batches inside one transaction,
+unchanged rows are not touched. Centers missing from the feed can be
+deleted with delete_missing=True; deletion tombstones older than
+MAP_DELETED_RETENTION_DAYS are pruned on every import.
+
+ImportLocationsAPIView only queues an ImportJob; run_job() executes it in
+the run_import_worker process. While a job runs, a heartbeat thread
+touches ImportJob.heartbeat_at; workers requeue running jobs whose
+heartbeat is older than MAP_IMPORT_STALE_AFTER (the worker crashed).
+"""
+import json
+import logging
+import math
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .geo import encode_geohash
+from .models import DeletedMedicalCenter, Disease, ImportJob, MedicalCenter
+
+logger = logging.getLogger(__name__)
+
+# Fields copied from the feed, besides the natural key
+DATA_FIELDS = ['treatedDiseases', 'phone', 'lat', 'lng']
+
+BATCH_SIZE = 500
+
+
+class InvalidFeed(ValueError):
+    """Feed JSON is not a list of locations"""
+
+
+class ImportResult:
+    """Counts, errors and per-step timings (ms) of one import run"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.errors = []
+        self.timings = {}
+
+    @property
+    def total_processed(self):
+        return self.created + self.updated + self.unchanged
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'deleted': self.deleted,
+            'total_processed': self.total_processed,
+            'errors': self.errors or None,
+            'timings_ms': self.timings,
+        }
+
+
+class _Timer:
+    def __init__(self, result, step):
+        self.result = result
+        self.step = step
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.result.timings[self.step] = round(elapsed, 1)
+
+
+def get_feed_url():
+    return getattr(settings, 'MAP_IMPORT_FEED_URL', 'https://chorobymozgu.pl/api/map/locations')
+
+
+def get_deleted_retention_days():
+    return getattr(settings, 'MAP_DELETED_RETENTION_DAYS', 30)
+
+
+def fetch_feed(url=None, timeout=30):
+    """
+    Download the locations feed. Raises requests.exceptions.RequestException,
+    json.JSONDecodeError (invalid JSON) or InvalidFeed.
+    """
+    response = requests.get(url or get_feed_url(), timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, list):
+        raise InvalidFeed('Expected a list of locations')
+    return data
+
+
+def load_feed_file(path):
+    """Read a feed saved as JSON file (offline imports and fixtures)"""
+    with open(path, encoding='utf-8') as feed_file:
+        data = json.load(feed_file)
+    if not isinstance(data, list):
+        raise InvalidFeed('Expected a list of locations')
+    return data
+
+
+def natural_key(department, address):
+    return (department.strip(), address.strip())
+
+
+def clean_text(item, field, strip=True, required=True):
+    """String field of a feed item, ValueError unless it fits the model column"""
+    value = item[field]
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string, got {type(value).__name__}")
+    if '\x00' in value:
+        raise ValueError(f"{field} contains a NUL character")
+    if strip:
+        value = value.strip()
+    if required and not value.strip():
+        raise ValueError(f"{field} is empty")
+    max_length = MedicalCenter._meta.get_field(field).max_length
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value
+
+
+def clean_diseases(item):
+    """treatedDiseases as stored: comma separated text, the feed may send a list of names"""
+    value = item['treatedDiseases']
+    if isinstance(value, list):
+        if not all(isinstance(name, str) for name in value):
+            raise ValueError("treatedDiseases must be a list of strings")
+        value = ', '.join(name.strip() for name in value if name.strip())
+        item = {'treatedDiseases': value}
+    value = clean_text(item, 'treatedDiseases', strip=False, required=False)
+    # parse_diseases() would drop the name - report the row instead
+    max_length = Disease._meta.get_field('name').max_length
+    if any(len(' '.join(name.split())) > max_length for name in value.split(',')):
+        raise ValueError(f"treatedDiseases has a disease name longer than {max_length} characters")
+    return value
+
+
+def clean_coordinate(item, field, limit):
+    value = item[field]
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{field} must be a number, got {type(value).__name__}")
+    value = float(value)
+    if not (math.isfinite(value) and -limit <= value <= limit):
+        raise ValueError(f"{field} must be between -{limit} and {limit}")
+    return value
+
+
+def parse_feed(items, result):
+    """
+    Valid feed rows keyed by natural key (last one wins for duplicates).
+    Every field is checked against the model columns, invalid rows are
+    skipped and reported in result.errors - one bad row never aborts
+    the import.
+    """
+    rows = {}
+    for position, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError(f"expected an object, got {type(item).__name__}")
+            row = {
+                'department': clean_text(item, 'department'),
+                'address': clean_text(item, 'address'),
+                'treatedDiseases': clean_diseases(item),
+                'phone': clean_text(item, 'phone', strip=False, required=False),
+                'lat': clean_coordinate(item, 'lat', 90),
+                'lng': clean_coordinate(item, 'lng', 180),
+            }
+        except KeyError as e:
+            result.errors.append(f"Item {position}: missing field {str(e)}")
+            continue
+        except ValueError as e:
+            result.errors.append(f"Item {position}: invalid item: {str(e)}")
+            continue
+        rows[natural_key(row['department'], row['address'])] = row
+    return rows
+
+
+def import_centers(items, delete_missing=False, batch_size=BATCH_SIZE, fetch_ms=None, progress=None):
+    """
+    Synchronize MedicalCenter rows with feed items (list of dicts with
+    department, address, treatedDiseases, phone, lat, lng).
+    progress(stage, result) is called after the diff and after writing.
+    Returns ImportResult.
+    """
+    result = ImportResult()
+    if fetch_ms is not None:
+        result.timings['fetch'] = round(fetch_ms, 1)
+
+    with _Timer(result, 'parse'):
+        rows = parse_feed(items, result)
+
+    with _Timer(result, 'load'):
+        existing = {}
+        duplicates = []
+        for center in MedicalCenter.objects.order_by('pk').only(
+            'department', 'address', *DATA_FIELDS
+        ):
+            key = natural_key(center.department, center.address)
+            if key in existing:
+                duplicates.append(center.pk)
+            else:
+                existing[key] = center
+
+    with _Timer(result, 'diff'):
+        to_create = []
+        to_update = []
+        diseases_changed = []
+        now = timezone.now()
+        for key, row in rows.items():
+            center = existing.pop(key, None)
+            if center is None:
+                center = MedicalCenter(**row)
+                center.geohash = encode_geohash(center.lat, center.lng)
+                to_create.append(center)
+            elif any(getattr(center, field) != row[field] for field in DATA_FIELDS):
+                if center.treatedDiseases != row['treatedDiseases']:
+                    diseases_changed.append(center)
+                for field in DATA_FIELDS:
+                    setattr(center, field, row[field])
+                center.geohash = encode_geohash(center.lat, center.lng)
+                # bulk_update() does not apply auto_now
+                center.updated_at = now
+                to_update.append(center)
+            else:
+                result.unchanged += 1
+        to_delete = [center.pk for center in existing.values()] + duplicates if delete_missing else []
+
+    result.created = len(to_create)
+    result.updated = len(to_update)
+    result.deleted = len(to_delete)
+    if progress:
+        progress(ImportJob.STAGE_DIFFED, result)
+
+    with _Timer(result, 'apply'):
+        with transaction.atomic():
+            MedicalCenter.objects.bulk_create(to_create, batch_size=batch_size)
+            MedicalCenter.objects.bulk_update(
+                to_update, DATA_FIELDS + ['geohash', 'updated_at'], batch_size=batch_size
+            )
+            if to_delete:
+                MedicalCenter.objects.filter(pk__in=to_delete).delete()
+            MedicalCenter.sync_diseases_bulk(to_create + diseases_changed)
+            DeletedMedicalCenter.objects.prune(get_deleted_retention_days())
+
+    if progress:
+        progress(ImportJob.STAGE_APPLIED, result)
+    return result
+
+
+def get_heartbeat_interval():
+    return getattr(settings, 'MAP_IMPORT_HEARTBEAT_INTERVAL', 30)
+
+
+def get_stale_after():
+    return getattr(settings, 'MAP_IMPORT_STALE_AFTER', 300)
+
+
+class Heartbeat(threading.Thread):
+    """Touches heartbeat_at of a running job every interval seconds"""
+
+    def __init__(self, job, interval):
+        super().__init__(name=f'import-job-{job.pk}-heartbeat', daemon=True)
+        self.job_pk = job.pk
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                ImportJob.objects.filter(pk=self.job_pk, status=ImportJob.STATUS_RUNNING).update(
+                    heartbeat_at=timezone.now()
+                )
+        finally:
+            # The thread has a database connection of its own
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job):
+    """Execute a claimed ImportJob, recording progress on the job row"""
+    def save_progress(stage, result):
+        job.stage = stage
+        job.result = result.as_dict()
+        job.heartbeat_at = timezone.now()
+        job.save(update_fields=['stage', 'result', 'heartbeat_at'])
+
+    heartbeat = Heartbeat(job, get_heartbeat_interval())
+    heartbeat.start()
+    try:
+        started = time.perf_counter()
+        items = fetch_feed(job.source_url)
+        fetch_ms = (time.perf_counter() - started) * 1000
+        job.fetched = len(items)
+        job.stage = ImportJob.STAGE_FETCHED
+        job.save(update_fields=['fetched', 'stage'])
+
+        import_centers(
+            items, delete_missing=job.delete_missing, fetch_ms=fetch_ms, progress=save_progress
+        )
+    except json.JSONDecodeError as e:
+        # requests' JSONDecodeError is also a RequestException - checked first
+        job.error = f'Invalid JSON response from external API: {str(e)}'
+    except requests.exceptions.RequestException as e:
+        job.error = f'Failed to fetch data from external API: {str(e)}'
+    except InvalidFeed as e:
+        job.error = f'Invalid feed from external API: {str(e)}'
+    except Exception as e:
+        logger.exception('Import job %s failed', job.pk)
+        job.error = f'Import failed: {str(e)}'
+    finally:
+        heartbeat.stop()
+
+    job.status = ImportJob.STATUS_FAILED if job.error else ImportJob.STATUS_DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
@@ -1,74 +1,69 @@
+import json
+import time
 from django.core.management.base import BaseCommand
 import requests
-from apps.map.models import MedicalCenter
+from apps.map.importer import InvalidFeed, fetch_feed, get_feed_url, import_centers, load_feed_file
 
 
 class Command(BaseCommand):
     help = 'Import medical centers data from external API'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='Import from a JSON file (same format as the API feed) instead of the live feed'
+        )
+        parser.add_argument(
+            '--url',
+            default=get_feed_url(),
+            help='Feed URL (default: %(default)s)'
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            help='Delete centers that are no longer present in the feed'
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write('Fetching data from https://chorobymozgu.pl/api/map/locations...')
-        
-        try:
-            response = requests.get('https://chorobymozgu.pl/api/map/locations', timeout=30)
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            self.stdout.write(self.style.ERROR(f'Failed to fetch data: {str(e)}'))
-            return
-        except ValueError as e:
-            self.stdout.write(self.style.ERROR(f'Invalid JSON response: {str(e)}'))
-            return
-        
-        self.stdout.write(f'Found {len(data)} locations. Importing...')
-        
-        imported = 0
-        updated = 0
-        errors = []
-        
-        for item in data:
+        started = time.perf_counter()
+        if options['file']:
+            self.stdout.write(f"Reading data from {options['file']}...")
+            try:
+                data = load_feed_file(options['file'])
+            except (OSError, ValueError) as e:
+                self.stdout.write(self.style.ERROR(f'Failed to read file: {str(e)}'))
+                return
+        else:
+            self.stdout.write(f"Fetching data from {options['url']}...")
             try:
-                # Check if center already exists by matching department and address
-                existing = MedicalCenter.objects.filter(
-                    department=item['department'],
-                    address=item['address']
-                ).first()
-                
-                if existing:
-                    # Update existing record
-                    existing.treatedDiseases = item['treatedDiseases']
-                    existing.phone = item['phone']
-                    existing.lat = item['lat']
-                    existing.lng = item['lng']
-                    existing.save()
-                    updated += 1
-                    self.stdout.write(f'  Updated: {existing.department[:50]}...')
-                else:
-                    # Create new record
-                    center = MedicalCenter.objects.create(
-                        department=item['department'],
-                        treatedDiseases=item['treatedDiseases'],
-                        address=item['address'],
-                        phone=item['phone'],
-                        lat=item['lat'],
-                        lng=item['lng']
-                    )
-                    imported += 1
-                    self.stdout.write(f'  Imported: {center.department[:50]}...')
-                    
-            except KeyError as e:
-                error_msg = f"Missing field in item: {str(e)}"
-                errors.append(error_msg)
-                self.stdout.write(self.style.WARNING(f'  {error_msg}'))
-            except Exception as e:
-                error_msg = f"Error importing item: {str(e)}"
-                errors.append(error_msg)
-                self.stdout.write(self.style.WARNING(f'  {error_msg}'))
-        
+                data = fetch_feed(options['url'])
+            except json.JSONDecodeError as e:
+                self.stdout.write(self.style.ERROR(f'Invalid JSON response: {str(e)}'))
+                return
+            except requests.exceptions.RequestException as e:
+                self.stdout.write(self.style.ERROR(f'Failed to fetch data: {str(e)}'))
+                return
+            except InvalidFeed as e:
+                self.stdout.write(self.style.ERROR(f'Invalid feed: {str(e)}'))
+                return
+        fetch_ms = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(f'Found {len(data)} locations. Importing...')
+
+        result = import_centers(data, delete_missing=options['delete_missing'], fetch_ms=fetch_ms)
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f'  {error}'))
+
         self.stdout.write(self.style.SUCCESS(f'\n✓ Import completed!'))
-        self.stdout.write(self.style.SUCCESS(f'  New centers imported: {imported}'))
-        self.stdout.write(self.style.SUCCESS(f'  Existing centers updated: {updated}'))
-        self.stdout.write(self.style.SUCCESS(f'  Total processed: {imported + updated}'))
-        
-        if errors:
-            self.stdout.write(self.style.WARNING(f'  Errors encountered: {len(errors)}'))
+        self.stdout.write(self.style.SUCCESS(f'  New centers imported: {result.created}'))
+        self.stdout.write(self.style.SUCCESS(f'  Existing centers updated: {result.updated}'))
+        self.stdout.write(self.style.SUCCESS(f'  Unchanged centers: {result.unchanged}'))
+        self.stdout.write(self.style.SUCCESS(f'  Deleted centers: {result.deleted}'))
+        self.stdout.write(self.style.SUCCESS(f'  Total processed: {result.total_processed}'))
+        self.stdout.write('  Timings: ' + ', '.join(
+            f'{step} {elapsed} ms' for step, elapsed in result.timings.items()
+        ))
+
+        if result.errors:
+            self.stdout.write(self.style.WARNING(f'  Errors encountered: {len(result.errors)}'))
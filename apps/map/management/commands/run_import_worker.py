@@ -0,0 +1,38 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.map.importer import get_stale_after, run_job
+from apps.map.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = 'Process queued medical center imports (ImportJob queue)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process pending jobs and exit instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        interval = getattr(settings, 'MAP_IMPORT_POLL_INTERVAL', 5)
+        self.stdout.write('Waiting for import jobs...')
+
+        while True:
+            requeued = ImportJob.objects.requeue_stale(get_stale_after())
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'  Reclaimed {requeued} jobs of stopped workers'))
+            job = ImportJob.objects.claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(interval)
+                continue
+
+            self.stdout.write(f'Running import #{job.pk} from {job.source_url}...')
+            run_job(job)
+            if job.status == ImportJob.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ Import #{job.pk} completed: {job.result}'))
+            else:
+                self.stdout.write(self.style.WARNING(f'  Import #{job.pk} failed: {job.error}'))
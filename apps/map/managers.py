@@ -1,33 +1,185 @@
-from django.db import models
-from django.db.models import Q
+from datetime import timedelta
+from django.db import IntegrityError, models, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Value
+from django.db.models.functions import ASin, Cos, Lower, Power, Radians, Sin, Sqrt, Substr
+from django.utils import timezone
+from django.utils.text import slugify
+from apps.posts.search import UnaccentLower, fuzzy_filter
+from .geo import EARTH_RADIUS_KM, bounding_box, covering_cells
+
+
+class DiseaseQuerySet(models.QuerySet):
+    """QuerySet for Disease model"""
+    
+    def matching(self, term):
+        """
+        Diseases matching a filter term: exact slug or name (diacritics
+        insensitive) if any, otherwise names containing the term
+        ("Parkinson" -> "Choroba Parkinsona").
+        """
+        normalized = UnaccentLower(Value(term))
+        annotated = self.alias(name_normalized=UnaccentLower('name'))
+        exact = annotated.filter(Q(slug=slugify(term)) | Q(name_normalized=normalized))
+        if exact.exists():
+            return exact
+        return annotated.filter(name_normalized__contains=normalized)
+    
+    def with_center_count(self):
+        """Annotate diseases with number of medical centers treating them"""
+        return self.annotate(center_count=Count('centers'))
+
+
+class DiseaseManager(models.Manager):
+    """Manager for Disease model"""
+    
+    def get_queryset(self):
+        return DiseaseQuerySet(self.model, using=self._db)
+    
+    def matching(self, term):
+        return self.get_queryset().matching(term)
+    
+    def with_center_count(self):
+        return self.get_queryset().with_center_count()
+    
+    def get_or_create_many(self, names):
+        """
+        Diseases for given names (case insensitive), missing ones are created
+        with one INSERT. Rows inserted meanwhile by a concurrent import are
+        ignored by the INSERT and selected again.
+        """
+        wanted = {}
+        for name in names:
+            wanted.setdefault(name.lower(), name)
+        diseases = self._by_lower_name(wanted)
+        missing = [name for key, name in wanted.items() if key not in diseases]
+        if missing:
+            self.bulk_create(
+                [self.model(name=name, slug=self.model.base_slug(name)) for name in missing],
+                ignore_conflicts=True,
+            )
+            diseases = self._by_lower_name(wanted)
+            for key, name in wanted.items():
+                if key not in diseases:
+                    # Slug taken by a disease of another name - numbered slug
+                    diseases[key] = self._create_or_get(name)
+        return [diseases[name.lower()] for name in names]
+    
+    def _by_lower_name(self, lower_names):
+        return {
+            disease.name.lower(): disease
+            for disease in self.annotate(name_lower=Lower('name')).filter(name_lower__in=list(lower_names))
+        }
+    
+    def _create_or_get(self, name):
+        try:
+            with transaction.atomic():
+                return self.create(name=name)
+        except IntegrityError:
+            return self.get(name=name)
 
 
 class MedicalCenterQuerySet(models.QuerySet):
     """QuerySet for MedicalCenter model"""
     
     def by_disease(self, disease):
-        """Filter medical centers that treat a specific disease"""
-        return self.filter(treatedDiseases__icontains=disease)
+        """Filter medical centers that treat a specific disease (indexed join via Disease)"""
+        diseases_field = self.model._meta.get_field('diseases')
+        Disease = diseases_field.related_model
+        return self.filter(
+            pk__in=diseases_field.remote_field.through.objects.filter(
+                disease__in=Disease.objects.matching(disease)
+            ).values('medicalcenter_id')
+        )
+    
+    def with_diseases(self):
+        """Prefetch diseases for get_diseases_list() (one query for all centers)"""
+        return self.prefetch_related('diseases')
     
     def search(self, query):
-        """Search medical centers by department name, address, or diseases"""
+        """Fuzzy search by department name, address, or diseases (trigram indexes)"""
+        return fuzzy_filter(self, query, ['department', 'address', 'treatedDiseases'])
+    
+    def search_department(self, query):
+        """Fuzzy search by department name only"""
+        return fuzzy_filter(self, query, ['department'])
+    
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        """
+        Centers inside a bounding box. Geohash prefixes narrow the scan
+        through the geohash index, lat/lng conditions make it exact.
+        """
+        cells = Q()
+        for cell in covering_cells(min_lat, max_lat, min_lng, max_lng):
+            cells |= Q(geohash__startswith=cell)
         return self.filter(
-            Q(department__icontains=query) |
-            Q(address__icontains=query) |
-            Q(treatedDiseases__icontains=query)
+            cells,
+            lat__gte=min_lat,
+            lat__lte=max_lat,
+            lng__gte=min_lng,
+            lng__lte=max_lng
         )
     
     def near_location(self, lat, lng, lat_range=0.5, lng_range=0.5):
         """
         Find medical centers near a location
-        Uses simple bounding box (not precise distance calculation)
+        Uses bounding box (see nearest() for distance ordering)
         """
-        return self.filter(
-            lat__gte=lat - lat_range,
-            lat__lte=lat + lat_range,
-            lng__gte=lng - lng_range,
-            lng__lte=lng + lng_range
+        return self.in_box(lat - lat_range, lat + lat_range, lng - lng_range, lng + lng_range)
+    
+    def with_distance(self, lat, lng):
+        """Annotate haversine distance in km from given point as distance_km"""
+        lat1, lng1 = Radians(Value(float(lat))), Radians(Value(float(lng)))
+        lat2, lng2 = Radians(F('lat')), Radians(F('lng'))
+        a = (
+            Power(Sin((lat2 - lat1) / 2), 2)
+            + Cos(lat1) * Cos(lat2) * Power(Sin((lng2 - lng1) / 2), 2)
         )
+        return self.annotate(distance_km=2 * EARTH_RADIUS_KM * ASin(Sqrt(a)))
+    
+    def within_km(self, lat, lng, radius_km):
+        """Centers within radius (km), ordered by distance"""
+        return self.in_box(*bounding_box(lat, lng, radius_km)).with_distance(
+            lat, lng
+        ).filter(distance_km__lte=radius_km).order_by('distance_km')
+    
+    def nearest(self, lat, lng, k=5, max_km=None):
+        """
+        k nearest centers ordered by distance (distance_km annotated).
+        Without max_km the search radius grows until k centers are found.
+        """
+        if max_km is not None:
+            return self.within_km(lat, lng, max_km)[:k]
+        
+        radius_km = 25
+        while radius_km < 2500:
+            results = self.within_km(lat, lng, radius_km)[:k]
+            if len(results) >= k:
+                return results
+            radius_km *= 2
+        return self.with_distance(lat, lng).order_by('distance_km')[:k]
+    
+    def clustered(self, precision):
+        """
+        Grid clustering in one aggregate query: centers grouped by geohash
+        prefix of given precision, with centroid and count per cell.
+        """
+        return self.annotate(
+            cell=Substr('geohash', 1, precision)
+        ).values('cell').annotate(
+            count=Count('id'),
+            lat=Avg('lat'),
+            lng=Avg('lng'),
+            first_id=Min('id'),
+        ).order_by()
+    
+    def dataset_state(self):
+        """(last updated_at, row count) in one aggregate query - changes with any import"""
+        state = self.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        return state['last_modified'], state['count']
+    
+    def changed_since(self, timestamp):
+        """Centers created or updated at or after timestamp"""
+        return self.filter(updated_at__gte=timestamp)
 
 
 class MedicalCenterManager(models.Manager):
@@ -39,8 +191,91 @@ class MedicalCenterManager(models.Manager):
     def by_disease(self, disease):
         return self.get_queryset().by_disease(disease)
     
+    def with_diseases(self):
+        return self.get_queryset().with_diseases()
+    
     def search(self, query):
         return self.get_queryset().search(query)
     
+    def search_department(self, query):
+        return self.get_queryset().search_department(query)
+    
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        return self.get_queryset().in_box(min_lat, max_lat, min_lng, max_lng)
+    
     def near_location(self, lat, lng, lat_range=0.5, lng_range=0.5):
         return self.get_queryset().near_location(lat, lng, lat_range, lng_range)
+    
+    def within_km(self, lat, lng, radius_km):
+        return self.get_queryset().within_km(lat, lng, radius_km)
+    
+    def nearest(self, lat, lng, k=5, max_km=None):
+        return self.get_queryset().nearest(lat, lng, k, max_km)
+    
+    def clustered(self, precision):
+        return self.get_queryset().clustered(precision)
+    
+    def dataset_state(self):
+        return self.get_queryset().dataset_state()
+    
+    def changed_since(self, timestamp):
+        return self.get_queryset().changed_since(timestamp)
+
+
+class DeletedMedicalCenterManager(models.Manager):
+    """Manager for DeletedMedicalCenter model (tombstones for ?since= syncs)"""
+    
+    def last_deleted_at(self):
+        return self.aggregate(last_deleted=Max('deleted_at'))['last_deleted']
+    
+    def retention_start(self, retention_days):
+        """Tombstones are kept from this moment on, older ones may be pruned"""
+        return timezone.now() - timedelta(days=retention_days)
+    
+    def prune(self, retention_days):
+        """Delete tombstones older than the retention window, returns their count"""
+        deleted, _ = self.filter(deleted_at__lt=self.retention_start(retention_days)).delete()
+        return deleted
+
+
+class ImportJobManager(models.Manager):
+    """Manager for ImportJob model (database backed job queue)"""
+    
+    def pending(self):
+        return self.filter(status=self.model.STATUS_PENDING).order_by('created_at')
+    
+    def stale(self, stale_after):
+        """Running jobs without a heartbeat for stale_after seconds (their worker died)"""
+        return self.filter(
+            status=self.model.STATUS_RUNNING,
+            heartbeat_at__lt=timezone.now() - timedelta(seconds=stale_after),
+        )
+    
+    def requeue_stale(self, stale_after):
+        """
+        Put jobs of dead workers back in the queue, or mark them failed
+        after MAX_ATTEMPTS claims. Returns the number of reclaimed jobs.
+        """
+        stale = self.stale(stale_after)
+        failed = stale.filter(attempts__gte=self.model.MAX_ATTEMPTS).update(
+            status=self.model.STATUS_FAILED,
+            error='Import worker stopped responding',
+            finished_at=timezone.now(),
+        )
+        requeued = stale.update(status=self.model.STATUS_PENDING, stage=self.model.STAGE_QUEUED)
+        return failed + requeued
+    
+    def claim_next(self):
+        """
+        Take the oldest pending job and mark it running. SKIP LOCKED lets
+        several workers poll the queue without taking the same job.
+        """
+        with transaction.atomic():
+            job = self.pending().select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.status = self.model.STATUS_RUNNING
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.attempts += 1
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+        return job
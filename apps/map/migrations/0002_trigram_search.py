@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+import apps.posts.search
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0001_initial'),
+        ('posts', '0007_trigram_search'),  # unaccent_lower() and pg_trgm
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicalcenter',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(apps.posts.search.UnaccentLower('department'), name='gin_trgm_ops'), name='map_center_department_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalcenter',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(apps.posts.search.UnaccentLower('address'), name='gin_trgm_ops'), name='map_center_address_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalcenter',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(apps.posts.search.UnaccentLower('treatedDiseases'), name='gin_trgm_ops'), name='map_center_diseases_trgm'),
+        ),
+    ]
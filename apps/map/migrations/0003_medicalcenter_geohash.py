@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+def fill_geohash(apps, schema_editor):
+    from apps.map.geo import encode_geohash
+    
+    MedicalCenter = apps.get_model('map', 'MedicalCenter')
+    centers = list(MedicalCenter.objects.only('lat', 'lng'))
+    for center in centers:
+        center.geohash = encode_geohash(center.lat, center.lng)
+    MedicalCenter.objects.bulk_update(centers, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0002_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalcenter',
+            name='geohash',
+            field=models.CharField(default='', editable=False, help_text='Geohash of lat/lng for spatial lookups (computed on save)', max_length=12),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='medicalcenter',
+            name='geohash',
+            field=models.CharField(db_index=True, editable=False, help_text='Geohash of lat/lng for spatial lookups (computed on save)', max_length=12),
+        ),
+    ]
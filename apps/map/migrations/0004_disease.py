@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:55
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def backfill_diseases(apps, schema_editor):
+    """Create Disease rows and center links from treatedDiseases strings"""
+    MedicalCenter = apps.get_model('map', 'MedicalCenter')
+    Disease = apps.get_model('map', 'Disease')
+    Link = MedicalCenter.diseases.through
+    
+    diseases = {}
+    slugs = set()
+    links = []
+    for center in MedicalCenter.objects.only('treatedDiseases').iterator():
+        for name in center.treatedDiseases.split(','):
+            name = ' '.join(name.split())
+            # Longer names do not fit Disease.name (MedicalCenter.parse_diseases skips them too)
+            if not name or len(name) > 200:
+                continue
+            key = name.lower()
+            if key not in diseases:
+                base = slugify(name)[:190] or 'choroba'
+                slug, number = base, 2
+                while slug in slugs:
+                    slug, number = f"{base}-{number}", number + 1
+                slugs.add(slug)
+                diseases[key] = Disease(name=name, slug=slug)
+            links.append((center.pk, key))
+    
+    Disease.objects.bulk_create(diseases.values(), batch_size=500)
+    ids = {disease.name.lower(): disease.pk for disease in Disease.objects.all()}
+    Link.objects.bulk_create(
+        [Link(medicalcenter_id=center_id, disease_id=ids[key]) for center_id, key in links],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0003_medicalcenter_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Disease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('slug', models.SlugField(max_length=200, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Choroba',
+                'verbose_name_plural': 'Choroby',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='medicalcenter',
+            name='diseases',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Choroby z pola treatedDiseases (uzupełniane przy zapisie)', related_name='centers', to='map.disease'),
+        ),
+        migrations.RunPython(backfill_diseases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0004_disease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Oczekuje'), ('running', 'W trakcie'), ('done', 'Zakończony'), ('failed', 'Błąd')], db_index=True, default='pending', max_length=20)),
+                ('stage', models.CharField(choices=[('queued', 'W kolejce'), ('fetched', 'Pobrano dane'), ('diffed', 'Porównano z bazą'), ('applied', 'Zapisano zmiany')], default='queued', max_length=20)),
+                ('source_url', models.URLField(help_text='Feed URL', max_length=500)),
+                ('delete_missing', models.BooleanField(default=False, help_text='Delete centers that are no longer present in the feed')),
+                ('fetched', models.PositiveIntegerField(default=0, help_text='Number of items in the feed')),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Counts and timings (ImportResult.as_dict())')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Import ośrodków',
+                'verbose_name_plural': 'Importy ośrodków',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
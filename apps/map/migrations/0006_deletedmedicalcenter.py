@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0005_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedMedicalCenter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('center_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Usunięty ośrodek',
+                'verbose_name_plural': 'Usunięte ośrodki',
+            },
+        ),
+    ]
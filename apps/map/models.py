@@ -1,5 +1,44 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
-from .managers import MedicalCenterManager
+from django.utils.text import slugify
+from apps.posts.search import UnaccentLower
+from .geo import encode_geohash
+from .managers import DeletedMedicalCenterManager, DiseaseManager, ImportJobManager, MedicalCenterManager
+
+
+class Disease(models.Model):
+    """Disease treated by medical centers (normalized from MedicalCenter.treatedDiseases)"""
+    name = models.CharField(max_length=200, unique=True)
+    slug = models.SlugField(max_length=200, unique=True, db_index=True)
+    
+    objects = DiseaseManager()
+    
+    class Meta:
+        verbose_name = "Choroba"
+        verbose_name_plural = "Choroby"
+        ordering = ['name']
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = self.unique_slug(self.name)
+        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def base_slug(name):
+        return slugify(name)[:190] or 'choroba'
+    
+    @classmethod
+    def unique_slug(cls, name):
+        base = cls.base_slug(name)
+        slug = base
+        number = 2
+        while cls.objects.filter(slug=slug).exists():
+            slug = f"{base}-{number}"
+            number += 1
+        return slug
+    
+    def __str__(self):
+        return self.name
 
 
 class MedicalCenter(models.Model):
@@ -13,6 +52,13 @@ class MedicalCenter(models.Model):
         verbose_name="Leczone choroby",
         help_text="Lista chorób oddzielona przecinkami"
     )
+    diseases = models.ManyToManyField(
+        Disease,
+        related_name='centers',
+        blank=True,
+        editable=False,
+        help_text="Choroby z pola treatedDiseases (uzupełniane przy zapisie)"
+    )
     address = models.TextField(
         verbose_name="Adres",
         help_text="Pełny adres ośrodka"
@@ -29,6 +75,12 @@ class MedicalCenter(models.Model):
         verbose_name="Długość geograficzna",
         help_text="Longitude"
     )
+    geohash = models.CharField(
+        max_length=12,
+        db_index=True,
+        editable=False,
+        help_text="Geohash of lat/lng for spatial lookups (computed on save)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -41,11 +93,143 @@ class MedicalCenter(models.Model):
         indexes = [
             models.Index(fields=['lat', 'lng']),
             models.Index(fields=['department']),
+            # Trigram indexes for fuzzy search (MedicalCenterQuerySet.search)
+            GinIndex(OpClass(UnaccentLower('department'), name='gin_trgm_ops'), name='map_center_department_trgm'),
+            GinIndex(OpClass(UnaccentLower('address'), name='gin_trgm_ops'), name='map_center_address_trgm'),
+            GinIndex(OpClass(UnaccentLower('treatedDiseases'), name='gin_trgm_ops'), name='map_center_diseases_trgm'),
         ]
     
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.lat, self.lng)
+        super().save(*args, **kwargs)
+        self.sync_diseases()
+    
     def __str__(self):
         return self.department
     
+    @staticmethod
+    def parse_diseases(treated_diseases):
+        """Split comma separated diseases, skipping empty, duplicate and too long names"""
+        max_length = Disease._meta.get_field('name').max_length
+        names = {}
+        for name in treated_diseases.split(','):
+            name = ' '.join(name.split())
+            if name and len(name) <= max_length:
+                names.setdefault(name.lower(), name)
+        return list(names.values())
+    
+    def sync_diseases(self):
+        """Update diseases relation from treatedDiseases text"""
+        names = self.parse_diseases(self.treatedDiseases)
+        self.diseases.set(Disease.objects.get_or_create_many(names))
+    
+    @classmethod
+    def sync_diseases_bulk(cls, centers):
+        """sync_diseases() for many saved centers with a constant number of queries"""
+        names_by_center = {center.pk: cls.parse_diseases(center.treatedDiseases) for center in centers}
+        if not names_by_center:
+            return
+        
+        all_names = {}
+        for names in names_by_center.values():
+            for name in names:
+                all_names.setdefault(name.lower(), name)
+        diseases = {
+            disease.name.lower(): disease
+            for disease in Disease.objects.get_or_create_many(list(all_names.values()))
+        }
+        
+        Link = cls.diseases.through
+        Link.objects.filter(medicalcenter_id__in=names_by_center).delete()
+        Link.objects.bulk_create(
+            [
+                Link(medicalcenter_id=center_id, disease_id=diseases[name.lower()].pk)
+                for center_id, names in names_by_center.items()
+                for name in names
+            ],
+            batch_size=1000,
+        )
+    
     def get_diseases_list(self):
-        """Return list of treated diseases"""
-        return [disease.strip() for disease in self.treatedDiseases.split(',')]
+        """
+        Return list of treated diseases: prefetched diseases
+        (MedicalCenterQuerySet.with_diseases()) or, without them, the
+        treatedDiseases text - never a query per center
+        """
+        if 'diseases' in getattr(self, '_prefetched_objects_cache', {}):
+            return [disease.name for disease in self.diseases.all()]
+        return self.parse_diseases(self.treatedDiseases)
+
+
+class DeletedMedicalCenter(models.Model):
+    """Tombstone of a deleted center, lets map clients sync with ?since="""
+    center_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    objects = DeletedMedicalCenterManager()
+    
+    class Meta:
+        verbose_name = "Usunięty ośrodek"
+        verbose_name_plural = "Usunięte ośrodki"
+    
+    def __str__(self):
+        return f"{self.center_id} ({self.deleted_at})"
+
+
+class ImportJob(models.Model):
+    """Queued medical centers import, processed by manage.py run_import_worker"""
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Oczekuje'),
+        (STATUS_RUNNING, 'W trakcie'),
+        (STATUS_DONE, 'Zakończony'),
+        (STATUS_FAILED, 'Błąd'),
+    ]
+    
+    STAGE_QUEUED = 'queued'
+    STAGE_FETCHED = 'fetched'
+    STAGE_DIFFED = 'diffed'
+    STAGE_APPLIED = 'applied'
+    STAGE_CHOICES = [
+        (STAGE_QUEUED, 'W kolejce'),
+        (STAGE_FETCHED, 'Pobrano dane'),
+        (STAGE_DIFFED, 'Porównano z bazą'),
+        (STAGE_APPLIED, 'Zapisano zmiany'),
+    ]
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default=STAGE_QUEUED)
+    source_url = models.URLField(max_length=500, help_text="Feed URL")
+    delete_missing = models.BooleanField(
+        default=False,
+        help_text="Delete centers that are no longer present in the feed"
+    )
+    fetched = models.PositiveIntegerField(default=0, help_text="Number of items in the feed")
+    result = models.JSONField(default=dict, blank=True, help_text="Counts and timings (ImportResult.as_dict())")
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Number of times a worker claimed the job")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last sign of life of the worker running the job"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = ImportJobManager()
+    
+    # Claims of a job whose worker stopped responding before it is marked failed
+    MAX_ATTEMPTS = 3
+    
+    class Meta:
+        verbose_name = "Import ośrodków"
+        verbose_name_plural = "Importy ośrodków"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Import #{self.pk} ({self.status})"
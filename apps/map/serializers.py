@@ -1,8 +1,38 @@
 from rest_framework import serializers
-from .models import MedicalCenter
+from .models import Disease, ImportJob, MedicalCenter
 
 
 class MedicalCenterSerializer(serializers.ModelSerializer):
+    # Prefetch with MedicalCenterQuerySet.with_diseases()
+    diseases = serializers.ListField(source='get_diseases_list', child=serializers.CharField(), read_only=True)
+    
     class Meta:
         model = MedicalCenter
-        fields = ['id', 'department', 'treatedDiseases', 'address', 'phone', 'lat', 'lng']
+        fields = ['id', 'department', 'treatedDiseases', 'diseases', 'address', 'phone', 'lat', 'lng']
+
+
+class NearestMedicalCenterSerializer(MedicalCenterSerializer):
+    distance_km = serializers.SerializerMethodField()
+    
+    class Meta(MedicalCenterSerializer.Meta):
+        fields = MedicalCenterSerializer.Meta.fields + ['distance_km']
+    
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 2)
+
+
+class DiseaseSerializer(serializers.ModelSerializer):
+    center_count = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = Disease
+        fields = ['id', 'name', 'slug', 'center_count']
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'status', 'stage', 'source_url', 'delete_missing', 'fetched',
+            'result', 'error', 'attempts', 'created_at', 'started_at', 'heartbeat_at', 'finished_at'
+        ]
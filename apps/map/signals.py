@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import DeletedMedicalCenter, MedicalCenter
+
+
+@receiver(post_delete, sender=MedicalCenter)
+def center_deleted(sender, instance, **kwargs):
+    """Record deletion for incremental map syncs (LocationsAPIView ?since=)"""
+    DeletedMedicalCenter.objects.create(center_id=instance.pk)
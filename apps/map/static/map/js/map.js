@@ -1,15 +1,19 @@
 // Global variables
 let map;
-let markers = [];
-let markerClusterGroup;
-let allLocations = [];
+let markersLayer;
+let viewportRequest = null;
+
+// Local copy of all centers (IndexedDB), used for popup details
+const LOCAL_DB_NAME = 'fchm-map';
+let localDb = null;
 
 // Initialize map on page load
 document.addEventListener('DOMContentLoaded', function () {
     initMap();
-    fetchLocations();
+    loadViewport();
     setupEventListeners();
     setupMobileToggle();
+    syncLocalCopy();
 });
 
 // Initialize Leaflet map
@@ -23,22 +27,43 @@ function initMap() {
         maxZoom: 19
     }).addTo(map);
 
-    // Initialize marker cluster group
-    markerClusterGroup = L.markerClusterGroup({
-        chunkedLoading: true,
-        spiderfyOnMaxZoom: true,
-        showCoverageOnHover: false,
-        zoomToBoundsOnClick: true
-    });
+    // Clusters and points for the current viewport (clustered on the server)
+    markersLayer = L.layerGroup().addTo(map);
+
+    // Reload data whenever the viewport changes
+    map.on('moveend', loadViewport);
+}
 
-    map.addLayer(markerClusterGroup);
+// Build query string with current filters
+function filterParams() {
+    const params = new URLSearchParams();
+    const searchTerm = document.getElementById('search-input').value.trim();
+    const disease = document.getElementById('disease-filter').value.trim();
+
+    if (searchTerm) {
+        params.set('search', searchTerm);
+    }
+    if (disease) {
+        params.set('disease', disease);
+    }
+    return params;
 }
 
-// Fetch locations from API
-function fetchLocations() {
-    updateResultsCount('Ładowanie...');
+// Fetch clusters/points for the visible area from API
+function loadViewport() {
+    // Slightly bigger area than visible, so panning does not show empty edges
+    const bounds = map.getBounds().pad(0.2);
+    const params = filterParams();
+    params.set('bbox', [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()].join(','));
+    params.set('zoom', map.getZoom());
+
+    // Cancel previous request still in flight
+    if (viewportRequest) {
+        viewportRequest.abort();
+    }
+    viewportRequest = new AbortController();
 
-    fetch('/api/map/locations/?page_size=10000')
+    fetch(`/api/map/clusters/?${params}`, { signal: viewportRequest.signal })
         .then(response => {
             if (!response.ok) {
                 throw new Error('Network response was not ok');
@@ -46,40 +71,150 @@ function fetchLocations() {
             return response.json();
         })
         .then(data => {
-            // Handle DRF paginated response format
-            const locations = data.results || data;
-            allLocations = locations;
-            displayLocations(locations);
-            updateResultsCount(`Znaleziono ${locations.length} ośrodków`);
+            displayViewport(data);
+            updateResultsCount(`Znaleziono ${data.total} ośrodków w tym obszarze`);
         })
         .catch(error => {
+            if (error.name === 'AbortError') {
+                return;
+            }
             console.error('Error fetching locations:', error);
             updateResultsCount('Błąd ładowania danych');
         });
 }
 
-// Display locations on map
-function displayLocations(locations) {
-    // Clear existing markers
-    markerClusterGroup.clearLayers();
-    markers = [];
+// Display clusters and points on map
+function displayViewport(data) {
+    markersLayer.clearLayers();
 
-    // Add markers for each location
-    locations.forEach(location => {
-        const marker = L.marker([location.lat, location.lng])
-            .bindPopup(createPopupContent(location));
+    data.clusters.forEach(cluster => {
+        const marker = L.marker([cluster.lat, cluster.lng], { icon: clusterIcon(cluster.count) });
+        // Zoom in to split the cluster
+        marker.on('click', () => map.setView([cluster.lat, cluster.lng], map.getZoom() + 2));
+        markersLayer.addLayer(marker);
+    });
 
-        markers.push(marker);
-        markerClusterGroup.addLayer(marker);
+    data.points.forEach(point => {
+        const marker = L.marker([point.lat, point.lng]);
+        marker.on('click', () => openLocationPopup(marker, point.id));
+        markersLayer.addLayer(marker);
     });
+}
 
-    // Fit map to show all markers if there are any
-    if (locations.length > 0) {
-        const bounds = markerClusterGroup.getBounds();
-        if (bounds.isValid()) {
-            map.fitBounds(bounds, { padding: [50, 50] });
+// Cluster icon (styles from Leaflet.markercluster CSS)
+function clusterIcon(count) {
+    let size = 'small';
+    if (count >= 100) {
+        size = 'large';
+    } else if (count >= 10) {
+        size = 'medium';
+    }
+
+    return L.divIcon({
+        html: `<div><span>${count}</span></div>`,
+        className: `marker-cluster marker-cluster-${size}`,
+        iconSize: L.point(40, 40)
+    });
+}
+
+// Load details of a single center and show them in popup
+function openLocationPopup(marker, locationId) {
+    if (marker.getPopup()) {
+        marker.openPopup();
+        return;
+    }
+
+    getLocalLocation(locationId)
+        .then(location => location || fetch(`/api/map/locations/${locationId}/`).then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        }))
+        .then(location => {
+            marker.bindPopup(createPopupContent(location)).openPopup();
+        })
+        .catch(error => {
+            console.error('Error fetching location details:', error);
+        });
+}
+
+// Open (and create on first use) the local IndexedDB database
+function openLocalDb() {
+    return new Promise((resolve, reject) => {
+        if (!window.indexedDB) {
+            reject(new Error('IndexedDB not available'));
+            return;
         }
+        const request = indexedDB.open(LOCAL_DB_NAME, 1);
+        request.onupgradeneeded = () => {
+            request.result.createObjectStore('locations', { keyPath: 'id' });
+            request.result.createObjectStore('meta');
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+// Run a request against an object store and resolve with its result
+function localRequest(storeName, mode, callback) {
+    return new Promise((resolve, reject) => {
+        const transaction = localDb.transaction(storeName, mode);
+        const request = callback(transaction.objectStore(storeName));
+        transaction.oncomplete = () => resolve(request ? request.result : undefined);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+// Bring the local copy up to date: full download the first time, then
+// only centers changed/deleted since the stored dataset version
+function syncLocalCopy() {
+    openLocalDb()
+        .then(db => {
+            localDb = db;
+            return localRequest('meta', 'readonly', store => store.get('version'));
+        })
+        .then(version => {
+            const url = version ? `/api/map/locations/?since=${encodeURIComponent(version)}` : '/api/map/locations/';
+            return fetch(url).then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
+                return response.json().then(data => ({ data, version: response.headers.get('X-Dataset-Version') }));
+            });
+        })
+        .then(({ data, version }) => {
+            const full = Array.isArray(data);
+            const changed = full ? data : data.changed;
+            const deleted = full ? [] : data.deleted;
+
+            return new Promise((resolve, reject) => {
+                const transaction = localDb.transaction(['locations', 'meta'], 'readwrite');
+                const locations = transaction.objectStore('locations');
+                if (full) {
+                    locations.clear();
+                }
+                changed.forEach(location => locations.put(location));
+                deleted.forEach(id => locations.delete(id));
+                transaction.objectStore('meta').put(version, 'version');
+                transaction.oncomplete = resolve;
+                transaction.onerror = () => reject(transaction.error);
+            });
+        })
+        .catch(error => {
+            // Popups fall back to the API
+            localDb = null;
+            console.warn('Local map data not available:', error);
+        });
+}
+
+// Center details from the local copy, undefined when not available
+function getLocalLocation(locationId) {
+    if (!localDb) {
+        return Promise.resolve(undefined);
     }
+    return localRequest('locations', 'readonly', store => store.get(locationId))
+        .catch(() => undefined);
 }
 
 // Create popup content for marker
@@ -137,51 +272,23 @@ function setupEventListeners() {
     searchInput.addEventListener('input', function () {
         clearTimeout(searchTimeout);
         searchTimeout = setTimeout(() => {
-            applyFilters();
+            loadViewport();
         }, 300);
     });
 
     // Disease filter
     diseaseFilter.addEventListener('change', function () {
-        applyFilters();
+        loadViewport();
     });
 
     // Reset filters button
     resetButton.addEventListener('click', function () {
         searchInput.value = '';
         diseaseFilter.value = '';
-        applyFilters();
+        loadViewport();
     });
 }
 
-// Apply filters to locations
-function applyFilters() {
-    const searchTerm = document.getElementById('search-input').value.toLowerCase().trim();
-    const diseaseFilter = document.getElementById('disease-filter').value.toLowerCase().trim();
-
-    let filteredLocations = allLocations;
-
-    // Filter by search term (department name)
-    if (searchTerm) {
-        filteredLocations = filteredLocations.filter(location =>
-            location.department.toLowerCase().includes(searchTerm)
-        );
-    }
-
-    // Filter by disease
-    if (diseaseFilter) {
-        filteredLocations = filteredLocations.filter(location =>
-            location.treatedDiseases.toLowerCase().includes(diseaseFilter)
-        );
-    }
-
-    // Update map
-    displayLocations(filteredLocations);
-
-    // Update results count
-    updateResultsCount(`Znaleziono ${filteredLocations.length} ośrodków`);
-}
-
 // Update results count display
 function updateResultsCount(text) {
     const resultsCount = document.getElementById('results-count');
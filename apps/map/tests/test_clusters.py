@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase, TestCase
+
+from apps.map.geo import GEOHASH_PRECISION, precision_for_zoom
+from apps.map.views import CLUSTER_MAX_ZOOM
+from .utils import make_center
+
+POLAND = '14,49,24.2,55'
+
+
+class PrecisionForZoomTests(SimpleTestCase):
+    def test_precision_grows_with_zoom(self):
+        precisions = [precision_for_zoom(zoom) for zoom in range(0, CLUSTER_MAX_ZOOM)]
+        self.assertEqual(precisions, sorted(precisions))
+        self.assertEqual(precision_for_zoom(-2000), precision_for_zoom(0))
+        self.assertEqual(precision_for_zoom(2000), GEOHASH_PRECISION)
+
+
+class ClustersAPITests(TestCase):
+    url = '/api/map/clusters/'
+
+    @classmethod
+    def setUpTestData(cls):
+        make_center('Warszawa 1', 52.23, 21.01)
+        make_center('Warszawa 2', 52.231, 21.011)
+        make_center('Kraków', 50.06, 19.94)
+
+    def test_clusters_close_centers(self):
+        data = self.client.get(self.url, {'bbox': POLAND, 'zoom': 6}).json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual([cluster['count'] for cluster in data['clusters']], [2])
+        self.assertEqual(len(data['points']), 1)
+
+    def test_points_from_max_zoom(self):
+        data = self.client.get(self.url, {'bbox': POLAND, 'zoom': CLUSTER_MAX_ZOOM + 4}).json()
+        self.assertEqual((data['clusters'], len(data['points'])), ([], 3))
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in [
+            {'bbox': POLAND, 'zoom': -2000},
+            {'bbox': POLAND, 'zoom': 2000},
+            {'bbox': POLAND, 'zoom': 'x'},
+            {'bbox': '14,49,nan,55', 'zoom': 6},
+            {'bbox': '14,49,inf,55', 'zoom': 6},
+            {'bbox': '14,49', 'zoom': 6},
+            {'zoom': 6},
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
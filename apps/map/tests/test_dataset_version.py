@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.map.importer import import_centers
+from apps.map.models import DeletedMedicalCenter, MedicalCenter
+
+from .utils import make_center
+
+
+class DatasetVersionTests(TestCase):
+    """ETag / Last-Modified of /api/map/locations/ after deletions"""
+
+    def setUp(self):
+        self.url = reverse('api-locations')
+        self.kept = make_center('Oddział Neurologii', 52.23, 21.01)
+        self.removed = make_center('Klinika Neurochirurgii', 50.06, 19.94)
+        # Last edit an hour ago, so a deletion now is visible at second resolution
+        MedicalCenter.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def test_deletion_changes_last_modified(self):
+        first = self.client.get(self.url)
+        self.removed.delete()
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], first['Last-Modified'])
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual([center['id'] for center in response.json()], [self.kept.pk])
+
+    def test_unchanged_dataset_is_not_modified(self):
+        first = self.client.get(self.url)
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_since_returns_deleted_ids(self):
+        version = self.client.get(self.url)['X-Dataset-Version']
+        removed_id = self.removed.pk
+        self.removed.delete()
+
+        response = self.client.get(self.url, {'since': version})
+
+        self.assertEqual(response.json()['deleted'], [removed_id])
+        self.assertEqual(response.json()['version'], response['X-Dataset-Version'])
+
+    @override_settings(MAP_DELETED_RETENTION_DAYS=30)
+    def test_since_older_than_retention_gets_full_list(self):
+        version = self.client.get(self.url)['X-Dataset-Version']
+        old_version = f"{int((timezone.now() - timedelta(days=40)).timestamp() * 1_000_000)}-2"
+
+        response = self.client.get(self.url, {'since': old_version})
+
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 2)
+        self.assertIsInstance(self.client.get(self.url, {'since': version}).json(), dict)
+
+
+class PruneTombstonesTests(TestCase):
+    def test_import_prunes_old_tombstones(self):
+        old = DeletedMedicalCenter.objects.create(center_id=1)
+        recent = DeletedMedicalCenter.objects.create(center_id=2)
+        DeletedMedicalCenter.objects.filter(pk=old.pk).update(deleted_at=timezone.now() - timedelta(days=31))
+
+        with override_settings(MAP_DELETED_RETENTION_DAYS=30):
+            import_centers([])
+
+        self.assertEqual(list(DeletedMedicalCenter.objects.values_list('pk', flat=True)), [recent.pk])
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.map.managers import DiseaseManager
+from apps.map.models import Disease
+from .utils import make_center
+
+
+class GetOrCreateManyTests(TestCase):
+    def test_existing_and_new_names(self):
+        stroke = Disease.objects.create(name='Udar')
+        diseases = Disease.objects.get_or_create_many(['udar', 'Afazja', 'AFAZJA'])
+        self.assertEqual(diseases[0], stroke)
+        self.assertEqual(diseases[1], diseases[2])
+        self.assertEqual(diseases[1].slug, 'afazja')
+        self.assertEqual(Disease.objects.count(), 2)
+
+    def test_row_inserted_concurrently_is_selected_again(self):
+        Disease.objects.create(name='Padaczka')
+        lookup = DiseaseManager._by_lower_name
+        calls = []
+
+        def stale_first_lookup(manager, lower_names):
+            # The first select misses the row another import just inserted
+            calls.append(lower_names)
+            return {} if len(calls) == 1 else lookup(manager, lower_names)
+
+        with mock.patch.object(DiseaseManager, '_by_lower_name', stale_first_lookup):
+            [disease] = Disease.objects.get_or_create_many(['Padaczka'])
+        self.assertEqual(disease.name, 'Padaczka')
+        self.assertEqual(Disease.objects.count(), 1)
+
+    def test_taken_slug_gets_a_number(self):
+        Disease.objects.create(name='Choroba A', slug='choroba-a')
+        [disease] = Disease.objects.get_or_create_many(['Choroba-A'])
+        self.assertEqual((disease.name, disease.slug), ('Choroba-A', 'choroba-a-2'))
+
+
+    def test_too_long_name_is_skipped(self):
+        center = make_center('Oddział', 50, 20, diseases='Udar, ' + 'A' * 201)
+
+        self.assertEqual(list(center.diseases.values_list('name', flat=True)), ['Udar'])
+
+class DiseasesInAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(5):
+            make_center(f'Oddział {number}', 52 + number / 10, 21, diseases='Udar, Afazja')
+
+    def test_locations_list_prefetches_diseases(self):
+        # dataset state + last deletion + centers + diseases, whatever the number of centers
+        with self.assertNumQueries(4):
+            data = self.client.get('/api/map/locations/').json()
+        self.assertEqual(data[0]['diseases'], ['Afazja', 'Udar'])
+
+    def test_diseases_list_without_prefetch_runs_no_query(self):
+        center = make_center('Oddział', 50, 20, diseases='Udar, Afazja')
+        with self.assertNumQueries(0):
+            self.assertEqual(center.get_diseases_list(), ['Udar', 'Afazja'])
+
+    def test_nearest_prefetches_diseases(self):
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/map/nearest/', {'lat': 52, 'lng': 21, 'k': 5, 'max_km': 100}).json()
+        self.assertEqual(len(data), 5)
@@ -0,0 +1,163 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.map.importer import run_job
+from apps.map.models import ImportJob, MedicalCenter
+
+FEED = [
+    {
+        'department': 'Oddział Neurologii',
+        'address': 'ul. Szpitalna 1, Warszawa',
+        'phone': '22 123 45 67',
+        'treatedDiseases': 'Padaczka, Stwardnienie rozsiane',
+        'lat': 52.23,
+        'lng': 21.01,
+    },
+    {
+        'department': 'Klinika Neurochirurgii',
+        'address': 'ul. Kopernika 2, Kraków',
+        'phone': '',
+        'treatedDiseases': 'Glejak',
+        'lat': 50.06,
+        'lng': 19.94,
+    },
+]
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the external feed; the path picks the response"""
+
+    responses = {
+        '/feed': (200, json.dumps(FEED)),
+        '/broken': (200, '[{"department": '),
+        '/object': (200, json.dumps({'locations': FEED})),
+        '/error': (500, 'Internal Server Error'),
+    }
+
+    def do_GET(self):
+        code, body = self.responses.get(self.path, (404, 'Not Found'))
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ImportJobTests(TestCase):
+    """Jobs executed by run_job against a local HTTP server"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def run_from(self, path):
+        ImportJob.objects.create(source_url=self.base_url + path)
+        job = ImportJob.objects.claim_next()
+        with self.captureOnCommitCallbacks(execute=True):
+            run_job(job)
+        job.refresh_from_db()
+        return job
+
+    def test_job_imports_feed(self):
+        job = self.run_from('/feed')
+
+        self.assertEqual(job.status, ImportJob.STATUS_DONE)
+        self.assertEqual(job.fetched, 2)
+        self.assertEqual(job.result['created'], 2)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.heartbeat_at)
+        self.assertEqual(MedicalCenter.objects.count(), 2)
+
+    def test_invalid_json_fails_job(self):
+        job = self.run_from('/broken')
+
+        self.assertEqual(job.status, ImportJob.STATUS_FAILED)
+        self.assertIn('Invalid JSON response', job.error)
+
+    def test_http_error_fails_job(self):
+        job = self.run_from('/error')
+
+        self.assertEqual(job.status, ImportJob.STATUS_FAILED)
+        self.assertIn('Failed to fetch data', job.error)
+
+    def test_feed_that_is_not_a_list_fails_job(self):
+        job = self.run_from('/object')
+
+        self.assertEqual(job.status, ImportJob.STATUS_FAILED)
+        self.assertIn('Expected a list of locations', job.error)
+        self.assertFalse(MedicalCenter.objects.exists())
+
+
+class RequeueStaleTests(TestCase):
+    """Jobs of workers that stopped sending heartbeats"""
+
+    def claim_and_stall(self, job):
+        claimed = ImportJob.objects.claim_next()
+        self.assertEqual(claimed.pk, job.pk)
+        ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+
+    def test_stale_job_is_requeued(self):
+        job = ImportJob.objects.create(source_url='http://localhost/feed')
+        self.claim_and_stall(job)
+
+        self.assertEqual(ImportJob.objects.requeue_stale(300), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_PENDING)
+        self.assertEqual(job.stage, ImportJob.STAGE_QUEUED)
+
+    def test_live_job_is_left_running(self):
+        ImportJob.objects.create(source_url='http://localhost/feed')
+        job = ImportJob.objects.claim_next()
+
+        self.assertEqual(ImportJob.objects.requeue_stale(300), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_RUNNING)
+
+    def test_job_fails_after_max_attempts(self):
+        job = ImportJob.objects.create(source_url='http://localhost/feed')
+        for _ in range(ImportJob.MAX_ATTEMPTS):
+            self.claim_and_stall(job)
+            ImportJob.objects.requeue_stale(300)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, ImportJob.MAX_ATTEMPTS)
+        self.assertIn('stopped responding', job.error)
+        self.assertIsNone(ImportJob.objects.claim_next())
+
+
+@override_settings(MAP_API_KEY='secret')
+class ImportAPITests(TestCase):
+    def test_post_queues_job(self):
+        response = self.client.post(reverse('api-import'), HTTP_X_API_KEY='secret')
+
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.status, ImportJob.STATUS_PENDING)
+
+        status_response = self.client.get(response.json()['status_url'], HTTP_X_API_KEY='secret')
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.json()['status'], ImportJob.STATUS_PENDING)
+
+    def test_invalid_key_is_rejected(self):
+        response = self.client.post(reverse('api-import'), HTTP_X_API_KEY='wrong')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ImportJob.objects.exists())
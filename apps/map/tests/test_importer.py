@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase
+
+from apps.map.importer import import_centers, load_feed_file
+from apps.map.models import Disease, MedicalCenter
+
+FEED_FILE = os.path.join(os.path.dirname(__file__), 'fixtures', 'feed.json')
+
+
+class ImportCentersTests(TestCase):
+    """Offline imports from the fixture feed (3 valid rows, 6 invalid ones)"""
+
+    def setUp(self):
+        self.items = load_feed_file(FEED_FILE)
+
+    def test_invalid_rows_are_skipped_and_reported(self):
+        result = import_centers(self.items)
+
+        self.assertEqual((result.created, result.updated, result.unchanged), (3, 0, 0))
+        self.assertEqual(len(result.errors), 6)
+        for position, expected in [
+            (3, 'phone must be a string'),
+            (4, 'department is longer than 500 characters'),
+            (5, 'treatedDiseases must be a list of strings'),
+            (6, 'lat must be between'),
+            (7, "missing field 'address'"),
+            (8, 'expected an object'),
+        ]:
+            self.assertTrue(
+                any(error.startswith(f'Item {position}:') and expected in error for error in result.errors),
+                f'{expected!r} not reported for item {position}: {result.errors}'
+            )
+
+    def test_rows_are_stored_with_diseases(self):
+        import_centers(self.items)
+
+        krakow = MedicalCenter.objects.get(department='Klinika Neurochirurgii')
+        self.assertEqual(krakow.treatedDiseases, 'Guzy mózgu, Tętniaki')
+        self.assertEqual((krakow.lat, krakow.lng), (50.01, 19.988))
+        self.assertEqual(sorted(krakow.diseases.values_list('name', flat=True)), ['Guzy mózgu', 'Tętniaki'])
+        self.assertEqual(Disease.objects.count(), 5)
+
+    def test_reimport_writes_only_differences(self):
+        import_centers(self.items)
+        self.items[0]['phone'] = '22 599 99 99'
+        del self.items[2]
+
+        with self.assertNumQueries(5):
+            # SELECT existing, SAVEPOINT, UPDATE of the changed row, tombstone prune, RELEASE
+            result = import_centers(self.items[:3])
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 1, 1))
+
+        result = import_centers(self.items[:2], delete_missing=True)
+        self.assertEqual(result.deleted, 1)
+        self.assertEqual(MedicalCenter.objects.count(), 2)
+
+    def test_too_long_disease_name_is_reported(self):
+        self.items[0]['treatedDiseases'] = 'Udar, ' + 'A' * 201
+
+        result = import_centers(self.items)
+
+        self.assertEqual(result.created, 2)
+        self.assertTrue(any(
+            error.startswith('Item 0:') and 'disease name longer than 200' in error for error in result.errors
+        ), result.errors)
+
+    def test_file_must_contain_a_list(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as feed_file:
+            json.dump({'department': 'x'}, feed_file)
+        self.addCleanup(os.remove, feed_file.name)
+        with self.assertRaisesMessage(ValueError, 'Expected a list of locations'):
+            load_feed_file(feed_file.name)
@@ -0,0 +1,33 @@
+from django.test import TestCase
+
+from .utils import make_center
+
+
+class NearestLocationsAPITests(TestCase):
+    url = '/api/map/nearest/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.warsaw = make_center('Warszawa', 52.23, 21.01)
+        cls.lodz = make_center('Łódź', 51.76, 19.46)
+        cls.krakow = make_center('Kraków', 50.06, 19.94)
+
+    def test_ordered_by_distance(self):
+        response = self.client.get(self.url, {'lat': 52.2, 'lng': 21.0, 'k': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([center['id'] for center in response.json()], [self.warsaw.pk, self.lodz.pk])
+
+    def test_max_km_limits_radius(self):
+        response = self.client.get(self.url, {'lat': 52.2, 'lng': 21.0, 'max_km': 50})
+        self.assertEqual([center['id'] for center in response.json()], [self.warsaw.pk])
+
+    def test_invalid_max_km_is_rejected(self):
+        for max_km in ['nan', 'inf', '-inf', '0', '-5', 'abc']:
+            with self.subTest(max_km=max_km):
+                response = self.client.get(self.url, {'lat': 52.2, 'lng': 21.0, 'max_km': max_km})
+                self.assertEqual(response.status_code, 400)
+
+    def test_invalid_coordinates_are_rejected(self):
+        for params in [{'lat': 'nan', 'lng': 21}, {'lat': 91, 'lng': 21}, {'lng': 21}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
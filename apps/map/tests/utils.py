@@ -0,0 +1,13 @@
+from apps.map.models import MedicalCenter
+
+
+def make_center(department, lat, lng, diseases='Udar', **fields):
+    return MedicalCenter.objects.create(
+        department=department,
+        treatedDiseases=diseases,
+        address=fields.pop('address', f'ul. Szpitalna 1, {department}'),
+        phone=fields.pop('phone', '22 123 45 67'),
+        lat=lat,
+        lng=lng,
+        **fields,
+    )
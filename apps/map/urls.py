@@ -1,5 +1,9 @@
 from django.urls import path
-from .views import MapView, LocationsAPIView, ImportLocationsAPIView
+from .views import (
+    MapView, LocationsAPIView, LocationDetailAPIView, ClustersAPIView,
+    NearestLocationsAPIView, DiseasesAPIView, ImportLocationsAPIView,
+    ImportJobStatusAPIView
+)
 
 urlpatterns = [
     # Map display page
@@ -7,5 +11,10 @@ urlpatterns = [
     
     # API endpoints
     path('api/map/locations/', LocationsAPIView.as_view(), name='api-locations'),
+    path('api/map/locations/<int:pk>/', LocationDetailAPIView.as_view(), name='api-location-detail'),
+    path('api/map/clusters/', ClustersAPIView.as_view(), name='api-clusters'),
+    path('api/map/nearest/', NearestLocationsAPIView.as_view(), name='api-nearest'),
+    path('api/map/diseases/', DiseasesAPIView.as_view(), name='api-diseases'),
     path('api/map/import/', ImportLocationsAPIView.as_view(), name='api-import'),
+    path('api/map/import/<int:pk>/', ImportJobStatusAPIView.as_view(), name='api-import-status'),
 ]
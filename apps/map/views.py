@@ -1,13 +1,99 @@
-from django.shortcuts import render
+import hashlib
+import math
+from datetime import datetime, timezone
+from django.db.models import prefetch_related_objects
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, urlencode
 from django.views.generic import TemplateView
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.conf import settings
-import requests
 
-from .models import MedicalCenter
-from .serializers import MedicalCenterSerializer
+from .geo import precision_for_zoom
+from .importer import get_deleted_retention_days, get_feed_url
+from .models import DeletedMedicalCenter, Disease, ImportJob, MedicalCenter
+from .serializers import (
+    DiseaseSerializer, ImportJobSerializer, MedicalCenterSerializer, NearestMedicalCenterSerializer
+)
+
+# From this zoom level on the clusters endpoint returns single points
+CLUSTER_MAX_ZOOM = 14
+# Zoom levels accepted by the clusters endpoint (web map tiles go up to ~22)
+MAX_ZOOM = 22
+
+
+def filter_centers(queryset, query_params):
+    """Apply ?disease= and ?search= filters shared by map API endpoints"""
+    # Filter by disease if provided
+    disease = query_params.get('disease', None)
+    if disease:
+        queryset = queryset.by_disease(disease)
+    
+    # Filter by search term (department name, typo tolerant)
+    search = query_params.get('search', None)
+    if search:
+        queryset = queryset.search_department(search)
+    
+    return queryset
+
+
+def parse_version(version):
+    """Timestamp encoded in a dataset version ("<microseconds>-<count>")"""
+    stamp, count = version.split('-')
+    return datetime.fromtimestamp(int(stamp) / 1_000_000, tz=timezone.utc)
+
+
+class DatasetVersionMixin:
+    """
+    Conditional GET for map data. The dataset version is built from the
+    last change - max(updated_at) or the latest deletion tombstone - and
+    the row count, and sent as ETag, Last-Modified and X-Dataset-Version.
+    Clients with a current copy get 304 before anything is serialized.
+    """
+    
+    def dataset_version(self):
+        """(version, last_modified), computed once per request"""
+        if not hasattr(self, '_dataset_version'):
+            last_updated, count = MedicalCenter.objects.dataset_state()
+            last_deleted = DeletedMedicalCenter.objects.last_deleted_at()
+            # Deletions change the dataset too (If-Modified-Since must not get 304)
+            last_modified = max(filter(None, [last_updated, last_deleted]), default=None)
+            stamp = int(last_modified.timestamp() * 1_000_000) if last_modified else 0
+            self._dataset_version = (f'{stamp}-{count}', last_modified)
+        return self._dataset_version
+    
+    def get_etag(self, request):
+        version, last_modified = self.dataset_version()
+        if not request.query_params:
+            return f'"{version}"'
+        # Responses differ per filters
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        return f'"{version}-{hashlib.md5(params.encode()).hexdigest()[:12]}"'
+    
+    def check_not_modified(self, request):
+        """304 response when the client copy is current, otherwise None"""
+        version, last_modified = self.dataset_version()
+        return get_conditional_response(
+            request,
+            etag=self.get_etag(request),
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            version, last_modified = self.dataset_version()
+            response['ETag'] = self.get_etag(request)
+            response['X-Dataset-Version'] = version
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            # Always revalidate - cheap thanks to the 304
+            patch_cache_control(response, no_cache=True)
+        return response
+
 
 class MapView(TemplateView):
     """Main map view displaying all medical centers"""
@@ -41,32 +127,188 @@ class MapView(TemplateView):
         
         return context
 
-class LocationsAPIView(generics.ListAPIView):
-    """API endpoint returning all medical centers with optional filtering"""
+class LocationsAPIView(DatasetVersionMixin, generics.ListAPIView):
+    """
+    API endpoint returning all medical centers with optional filtering.
+    
+    Supports conditional GET (see DatasetVersionMixin) and a delta mode:
+    ?since=<X-Dataset-Version of the cached copy> returns
+    {"version", "changed": [...], "deleted": [ids]} for the whole dataset
+    (filters are not applied, clients filter their local copy). Versions
+    older than MAP_DELETED_RETENTION_DAYS get the full list, their
+    deletions may already be pruned.
+    """
     serializer_class = MedicalCenterSerializer
     pagination_class = None  # Disable pagination to return all results
     
     def get_queryset(self):
-        queryset = MedicalCenter.objects.all()
+        return filter_centers(MedicalCenter.objects.with_diseases(), self.request.query_params)
+    
+    def list(self, request, *args, **kwargs):
+        not_modified = self.check_not_modified(request)
+        if not_modified:
+            return not_modified
         
-        # Filter by disease if provided
-        disease = self.request.query_params.get('disease', None)
-        if disease:
-            queryset = queryset.filter(treatedDiseases__icontains=disease)
+        since = request.query_params.get('since')
+        if since is None:
+            return super().list(request, *args, **kwargs)
+        
+        try:
+            since_at = parse_version(since)
+        except (ValueError, OverflowError):
+            return Response(
+                {'error': 'Parameter since must be a dataset version returned in X-Dataset-Version'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Filter by search term (department name)
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(department__icontains=search)
+        if since_at < DeletedMedicalCenter.objects.retention_start(get_deleted_retention_days()):
+            return super().list(request, *args, **kwargs)
         
-        return queryset
+        version, last_modified = self.dataset_version()
+        changed = MedicalCenter.objects.with_diseases().changed_since(since_at)
+        deleted = DeletedMedicalCenter.objects.filter(
+            deleted_at__gte=since_at
+        ).values_list('center_id', flat=True)
+        return Response({
+            'version': version,
+            'changed': self.get_serializer(changed, many=True).data,
+            'deleted': list(deleted),
+        })
+
+
+class LocationDetailAPIView(generics.RetrieveAPIView):
+    """Single medical center (map popup details)"""
+    queryset = MedicalCenter.objects.with_diseases()
+    serializer_class = MedicalCenterSerializer
 
 
-class ImportLocationsAPIView(APIView):
-    """Protected endpoint for importing data from external API"""
+class ClustersAPIView(DatasetVersionMixin, APIView):
+    """
+    Viewport aware map data clustered on the server
+    GET /api/map/clusters/?bbox=<min_lng>,<min_lat>,<max_lng>,<max_lat>&zoom=<z>&disease=&search=
     
-    def post(self, request):
-        # Check API key
+    Below CLUSTER_MAX_ZOOM centers are grouped into geohash grid cells
+    (centroid + count), single-center cells are returned as points.
+    Points carry only id and coordinates - details come from
+    /api/map/locations/<id>/ when a popup is opened.
+    """
+    
+    def get(self, request):
+        not_modified = self.check_not_modified(request)
+        if not_modified:
+            return not_modified
+        
+        try:
+            min_lng, min_lat, max_lng, max_lat = [
+                float(value) for value in request.query_params['bbox'].split(',')
+            ]
+            zoom = int(request.query_params.get('zoom', 6))
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Parameter bbox=min_lng,min_lat,max_lng,max_lat is required, zoom must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not all(math.isfinite(value) for value in (min_lng, min_lat, max_lng, max_lat)):
+            return Response(
+                {'error': 'Parameter bbox must contain finite numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= zoom <= MAX_ZOOM:
+            return Response(
+                {'error': f'Parameter zoom must be between 0 and {MAX_ZOOM}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = filter_centers(
+            MedicalCenter.objects.in_box(
+                max(min_lat, -90), min(max_lat, 90), max(min_lng, -180), min(max_lng, 180)
+            ),
+            request.query_params
+        )
+        
+        clusters = []
+        points = []
+        if zoom >= CLUSTER_MAX_ZOOM:
+            points = list(queryset.values('id', 'lat', 'lng'))
+        else:
+            # Search ordering (similarity) is not needed for aggregation
+            for cell in queryset.order_by().clustered(precision_for_zoom(zoom)):
+                if cell['count'] == 1:
+                    points.append({'id': cell['first_id'], 'lat': cell['lat'], 'lng': cell['lng']})
+                else:
+                    clusters.append({'lat': cell['lat'], 'lng': cell['lng'], 'count': cell['count']})
+        
+        return Response({
+            'zoom': zoom,
+            'total': len(points) + sum(cluster['count'] for cluster in clusters),
+            'clusters': clusters,
+            'points': points,
+        })
+
+
+class NearestLocationsAPIView(APIView):
+    """
+    Nearest medical centers to a point, ordered by distance
+    GET /api/map/nearest/?lat=&lng=&k=5&max_km=&disease=
+    """
+    max_k = 50
+    
+    def get(self, request):
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            k = min(int(request.query_params.get('k', 5)), self.max_k)
+            max_km = request.query_params.get('max_km')
+            max_km = float(max_km) if max_km else None
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Parameters lat and lng are required, k and max_km must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180) or k < 1:
+            return Response(
+                {'error': 'Invalid coordinates or k'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if max_km is not None and not (math.isfinite(max_km) and max_km > 0):
+            return Response(
+                {'error': 'Parameter max_km must be a positive number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = MedicalCenter.objects.all()
+        disease = request.query_params.get('disease')
+        if disease:
+            queryset = queryset.by_disease(disease)
+        
+        centers = list(queryset.nearest(lat, lng, k=k, max_km=max_km))
+        prefetch_related_objects(centers, 'diseases')
+        serializer = NearestMedicalCenterSerializer(centers, many=True)
+        return Response(serializer.data)
+
+
+class DiseasesAPIView(generics.ListAPIView):
+    """
+    Disease facet for map filters: diseases with number of centers
+    treating them (single aggregate query), most common first
+    """
+    serializer_class = DiseaseSerializer
+    pagination_class = None
+    
+    def get_queryset(self):
+        return Disease.objects.with_center_count().filter(
+            center_count__gt=0
+        ).order_by('-center_count', 'name')
+
+
+class ImportAPIKeyMixin:
+    """Requires X-API-Key header matching settings.MAP_API_KEY"""
+    
+    def check_api_key(self, request):
+        """Error response for a missing or invalid key, None when valid"""
         api_key = request.headers.get('X-API-Key')
         expected_key = getattr(settings, 'MAP_API_KEY', None)
         
@@ -82,67 +324,42 @@ class ImportLocationsAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Fetch data from external API
-        try:
-            response = requests.get('https://chorobymozgu.pl/api/map/locations', timeout=30)
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            return Response(
-                {'error': f'Failed to fetch data from external API: {str(e)}'},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
-        except ValueError as e:
-            return Response(
-                {'error': f'Invalid JSON response from external API: {str(e)}'},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
+        return None
+
+
+class ImportLocationsAPIView(ImportAPIKeyMixin, APIView):
+    """
+    Protected endpoint for importing data from external API.
+    Queues an ImportJob (run by manage.py run_import_worker) and returns
+    its id immediately - progress is available from the status endpoint.
+    """
+    
+    def post(self, request):
+        # Check API key
+        error_response = self.check_api_key(request)
+        if error_response:
+            return error_response
         
-        # Import data
-        imported = 0
-        updated = 0
-        errors = []
-        
-        for item in data:
-            try:
-                # Use _id from external API as unique identifier if available
-                external_id = item.get('_id')
-                
-                # Check if center already exists by matching department and address
-                existing = MedicalCenter.objects.filter(
-                    department=item['department'],
-                    address=item['address']
-                ).first()
-                
-                if existing:
-                    # Update existing record
-                    existing.treatedDiseases = item['treatedDiseases']
-                    existing.phone = item['phone']
-                    existing.lat = item['lat']
-                    existing.lng = item['lng']
-                    existing.save()
-                    updated += 1
-                else:
-                    # Create new record
-                    MedicalCenter.objects.create(
-                        department=item['department'],
-                        treatedDiseases=item['treatedDiseases'],
-                        address=item['address'],
-                        phone=item['phone'],
-                        lat=item['lat'],
-                        lng=item['lng']
-                    )
-                    imported += 1
-                    
-            except KeyError as e:
-                errors.append(f"Missing field in item: {str(e)}")
-            except Exception as e:
-                errors.append(f"Error importing item: {str(e)}")
+        job = ImportJob.objects.create(
+            source_url=get_feed_url(),
+            delete_missing=request.query_params.get('delete_missing') in ('1', 'true'),
+        )
         
         return Response({
             'success': True,
-            'imported': imported,
-            'updated': updated,
-            'total_processed': imported + updated,
-            'errors': errors if errors else None
-        }, status=status.HTTP_200_OK)
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse('api-import-status', args=[job.pk]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class ImportJobStatusAPIView(ImportAPIKeyMixin, APIView):
+    """Progress of a queued import: status, stage and counts"""
+    
+    def get(self, request, pk):
+        error_response = self.check_api_key(request)
+        if error_response:
+            return error_response
+        
+        job = get_object_or_404(ImportJob, pk=pk)
+        return Response(ImportJobSerializer(job).data)
@@ -5,3 +5,6 @@ class PagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.pages'
     verbose_name = 'Strony statyczne'
+    
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,148 @@
+"""
+Site content version for cache keys.
+
+Rendered fragments are cached under keys containing the version. Any change
+to posts, tags, categories or banners bumps it (signals.py), so the next
+request renders fresh HTML and old entries simply expire. The version lives
+in the shared cache, so a bump reaches every worker process even when the
+fragments themselves are cached per process.
+
+reference_cache keeps small reference tables (categories, banners) used
+on every page in process memory, validated against the same version.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+CONTENT_VERSION_KEY = 'pages:content_version'
+
+
+def get_shared_cache():
+    """
+    Cache seen by every worker process (SHARED_CACHE_ALIAS), for stamps
+    invalidating process-local data. checks.py rejects process-local backends.
+    """
+    return caches[getattr(settings, 'SHARED_CACHE_ALIAS', 'shared')]
+
+
+def _initial_version():
+    # Time based, so a lost cache entry never brings back an old version
+    return int(time.time() * 1000)
+
+
+def get_content_version():
+    shared = get_shared_cache()
+    version = shared.get(CONTENT_VERSION_KEY)
+    if version is None:
+        shared.add(CONTENT_VERSION_KEY, _initial_version(), None)
+        version = shared.get(CONTENT_VERSION_KEY, 0)
+    return version
+
+
+def bump_content_version():
+    shared = get_shared_cache()
+    try:
+        shared.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        shared.add(CONTENT_VERSION_KEY, _initial_version(), None)
+
+
+def get_fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60)
+
+
+class RequestCacheStats:
+    """Reference cache hits and misses of the current request"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+
+    def __str__(self):
+        return f'hits={self.hits} misses={self.misses}'
+
+
+_request_stats = ContextVar('reference_cache_stats', default=None)
+
+
+class ReferenceCache:
+    """
+    Process-local LRU with TTL for rarely changing reference data.
+    Entries are valid while the site content version is unchanged; the
+    version is read from the shared cache once per request.
+    """
+
+    def __init__(self, maxsize=64, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (version, expires_at, value)
+        self._lock = threading.Lock()
+
+    def _current_version(self):
+        stats = _request_stats.get()
+        if stats is None:
+            return get_content_version()
+        if stats.version is None:
+            stats.version = get_content_version()
+        return stats.version
+
+    def get(self, key, loader):
+        """Cached value for key, loader() result on a miss (must not be lazy)"""
+        version = self._current_version()
+        stats = _request_stats.get()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(key)
+                if stats:
+                    stats.hits += 1
+                return entry[2]
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (version, now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        if stats:
+            stats.misses += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+reference_cache = ReferenceCache(
+    maxsize=getattr(settings, 'REFERENCE_CACHE_SIZE', 64),
+    ttl=getattr(settings, 'REFERENCE_CACHE_TTL', 300),
+)
+
+
+class ReferenceCacheMiddleware:
+    """
+    Collects reference cache statistics per request. With DEBUG on they
+    are sent in the X-Reference-Cache response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestCacheStats()
+        token = _request_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        request.reference_cache_stats = stats
+        if settings.DEBUG:
+            response['X-Reference-Cache'] = str(stats)
+        return response
@@ -1,6 +1,7 @@
 from django.views.generic import ListView
 from django.shortcuts import get_object_or_404
-from apps.posts.models import Post, Category
+from apps.posts.models import Category, PostCard
+from apps.posts.pagination import KeysetPaginator
 
 
 class CategoryListView(ListView):
@@ -42,28 +43,30 @@ class CategoryListView(ListView):
 
 
 class CategoryDetailView(ListView):
-    """Display posts from a specific category with pagination"""
-    model = Post
+    """
+    Display posts (PostCard rows) from a specific category with keyset
+    pagination (?after=<cursor> older posts, ?before=<cursor> newer posts)
+    """
+    model = PostCard
     template_name = 'categories/detail.html'
     context_object_name = 'posts'
-    paginate_by = 3
+    per_page = 3
     
     def get_queryset(self):
         self.category = get_object_or_404(
             Category, 
             slug=self.kwargs['slug']
         )
-        return Post.objects.filter(
-            category=self.category,
-            published=True
-        ).select_related(
-            'category', 'author'
-        ).prefetch_related(
-            'tags'
-        ).order_by('-created_at')
+        return PostCard.objects.by_category(self.category.slug).order_by('-created_at')
     
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        page = KeysetPaginator(self.object_list, self.per_page).page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context['page_obj'] = page
+        context['is_paginated'] = page.has_other_pages()
         context['category'] = self.category
         
         # SEO Context dla pojedynczej kategorii
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backends keeping data in the memory of one process
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register('caches')
+def check_shared_cache(app_configs, **kwargs):
+    """Invalidation stamps (apps.pages.cache.get_shared_cache) must reach every worker process"""
+    alias = getattr(settings, 'SHARED_CACHE_ALIAS', 'shared')
+    config = settings.CACHES.get(alias)
+    if config is None:
+        return [Error(
+            f"CACHES has no '{alias}' alias (SHARED_CACHE_ALIAS).",
+            id='pages.E001',
+        )]
+    if config.get('BACKEND') in PROCESS_LOCAL_CACHE_BACKENDS:
+        return [Error(
+            f"CACHES['{alias}'] uses {config['BACKEND']}, which other worker processes do not see.",
+            hint='Use RedisCache (SHARED_CACHE_URL) or FileBasedCache.',
+            id='pages.E002',
+        )]
+    return []
@@ -1,6 +1,55 @@
+from django.utils.functional import cached_property
 from django.views.generic import TemplateView
-from apps.posts.models import Post
+from apps.posts.models import PostCard
 from apps.banners.models import Banner
+from ..cache import get_content_version, get_fragment_timeout
+
+
+class HomeSections:
+    """
+    Posts and banners of the home page. Nothing is queried until a template
+    fragment needs it, so fully cached fragments cost no database queries.
+    """
+    POSTS_COUNT = 22
+    BANNER_POSITIONS = ['home_banner_1', 'home_banner_2', 'home_banner_3']
+    
+    @cached_property
+    def posts(self):
+        """Cards of top posts for all sections in one query"""
+        return list(
+            PostCard.objects.order_by('-created_at')[:self.POSTS_COUNT]
+        )
+    
+    @property
+    def featured_posts(self):
+        # First 6 posts are featured
+        return self.posts[:6]
+    
+    @property
+    def newest_posts(self):
+        # Next 5 are newest (sidebar)
+        return self.posts[6:11]
+    
+    @property
+    def all_posts(self):
+        # Next 12 are all posts grid
+        return self.posts[10:22]
+    
+    @cached_property
+    def banners(self):
+        return Banner.objects.first_active_by_position(self.BANNER_POSITIONS)
+    
+    @property
+    def banner_1(self):
+        return self.banners.get('home_banner_1')
+    
+    @property
+    def banner_2(self):
+        return self.banners.get('home_banner_2')
+    
+    @property
+    def banner_3(self):
+        return self.banners.get('home_banner_3')
 
 
 class HomeView(TemplateView):
@@ -9,33 +58,18 @@ class HomeView(TemplateView):
     - Featured posts (first 6)
     - Newest posts (next 5)
     - All posts (next 12)
+    
+    Sections are rendered as fragments cached under the site content
+    version (apps/pages/cache.py).
     """
     template_name = 'home/index.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        all_posts = Post.objects.filter(
-            published=True
-        ).select_related(
-            'category', 'author'
-        ).prefetch_related(
-            'tags'
-        ).order_by('-created_at')
-        
-        # First 6 posts are featured
-        context['featured_posts'] = all_posts[:6]
-        
-        # Next 5 are newest (sidebar)
-        context['newest_posts'] = all_posts[6:11]
-        
-        # Next 12 are all posts grid
-        context['all_posts'] = all_posts[10:22]
-        
-        # Get active banners for home page
-        context['banner_1'] = Banner.objects.filter(position='home_banner_1', is_active=True).first()
-        context['banner_2'] = Banner.objects.filter(position='home_banner_2', is_active=True).first()
-        context['banner_3'] = Banner.objects.filter(position='home_banner_3', is_active=True).first()
+        context['home'] = HomeSections()
+        context['content_version'] = get_content_version()
+        context['fragment_timeout'] = get_fragment_timeout()
         
         # SEO Context
         meta_title = 'Fundacja Chorób Mózgu - Aktualności i Artykuły'
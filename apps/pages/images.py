@@ -0,0 +1,278 @@
+"""
+Responsive image renditions.
+
+Uploaded images (post hero and OG images, category default images, gallery
+and banner images) get AVIF and WebP renditions at IMAGE_RENDITION_WIDTHS,
+never wider than the original. Renditions are stored next to the original
+with the hash of its content in the name, so they can be cached forever:
+
+    posts/heroes/photo.jpg -> posts/heroes/photo.<hash>.640w.webp
+
+After an upload (signals.py) renditions are encoded with Pillow in a
+background process pool. A rendition that is still missing is encoded by
+rendition_view on the first request (nginx passes missing /media/ files to
+Django). Encoding holds an exclusive lock per rendition file, so two
+processes never encode the same file at once.
+
+{% responsive_image %} (pages_tags), post content (apps/posts/content.py)
+and posts' SrcsetField emit srcset.
+Files are read through MEDIA_ROOT (FileSystemStorage). Formats the
+installed Pillow cannot encode (AVIF needs Pillow 11.2+ built with
+libavif) are left out of srcset and not served.
+"""
+import fcntl
+import functools
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.http import FileResponse, Http404
+from django.utils.html import format_html, format_html_join
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+RENDITION_NAME = re.compile(
+    r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})\.(?P<width>\d+)w\.(?P<format>avif|webp)$'
+)
+
+ImageInfo = namedtuple('ImageInfo', ['name', 'hash', 'width', 'height'])
+
+# EXIF orientations rotating the image by 90 degrees (width and height swap)
+ORIENTATION_TAG = 0x0112
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+_executor = None
+
+
+def get_widths():
+    return getattr(settings, 'IMAGE_RENDITION_WIDTHS', [320, 640, 960, 1280, 1920])
+
+
+def get_formats():
+    """IMAGE_RENDITION_FORMATS the installed Pillow can encode"""
+    return [
+        image_format for image_format in getattr(settings, 'IMAGE_RENDITION_FORMATS', ['avif', 'webp'])
+        if can_encode(image_format)
+    ]
+
+
+@functools.cache
+def can_encode(image_format):
+    supported = features.check(image_format)
+    if not supported:
+        logger.warning('Pillow cannot encode %s, renditions in this format are skipped', image_format)
+    return supported
+
+
+def get_quality(image_format):
+    return getattr(settings, 'IMAGE_RENDITION_QUALITY', {'avif': 60, 'webp': 80})[image_format]
+
+
+def media_name(value):
+    """Storage name of a FieldFile or a /media/ URL, None otherwise"""
+    name = getattr(value, 'name', value)
+    if not name or not isinstance(name, str):
+        return None
+    if hasattr(value, 'name'):
+        return name
+    if name.startswith(settings.MEDIA_URL):
+        return unquote(urlsplit(name).path[len(settings.MEDIA_URL):]) or None
+    return None
+
+
+def get_image_info(name):
+    """
+    ImageInfo of a stored image (content hash and size), cached.
+    None when the file is missing or is not an image.
+    """
+    key = f'images:info:{hashlib.md5(name.encode()).hexdigest()}'
+    info = cache.get(key)
+    if info is None:
+        info = _read_image_info(name) or ()
+        cache.set(key, tuple(info), None if info else 60)
+    return ImageInfo(*info) if info else None
+
+
+def _read_image_info(name):
+    try:
+        path = default_storage.path(name)
+        with open(path, 'rb') as image_file:
+            content_hash = hashlib.file_digest(image_file, 'sha1').hexdigest()[:10]
+            image_file.seek(0)
+            with Image.open(image_file) as image:
+                # Size after exif_transpose() without decoding the pixels
+                width, height = image.size
+                if image.getexif().get(ORIENTATION_TAG) in ROTATED_ORIENTATIONS:
+                    width, height = height, width
+    except (OSError, SuspiciousFileOperation, UnidentifiedImageError, Image.DecompressionBombError):
+        return None
+    return ImageInfo(name, content_hash, width, height)
+
+
+def rendition_widths(info):
+    return [width for width in get_widths() if width <= info.width] or [info.width]
+
+
+def rendition_name(info, width, image_format):
+    stem = os.path.splitext(info.name)[0]
+    return f'{stem}.{info.hash}.{width}w.{image_format}'
+
+
+def srcset(info, image_format, build_url=None):
+    """srcset of a format, build_url(url) may make the URLs absolute"""
+    urls = (default_storage.url(rendition_name(info, width, image_format)) for width in rendition_widths(info))
+    if build_url:
+        urls = map(build_url, urls)
+    return ', '.join(f'{url} {width}w' for url, width in zip(urls, rendition_widths(info)))
+
+
+def srcsets(info, build_url=None):
+    """{format: srcset} of all configured formats"""
+    return {image_format: srcset(info, image_format, build_url) for image_format in get_formats()}
+
+
+def picture(info, img_attrs, sizes):
+    """<picture> with a <source> per format around an <img> with img_attrs"""
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (CONTENT_TYPES[image_format], image_srcset, sizes)
+            for image_format, image_srcset in srcsets(info).items()
+        )
+    )
+    return format_html('<picture>{}<img{}></picture>', sources, flatatt(img_attrs))
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock shared by all processes of the box"""
+    lock_dir = os.path.join(tempfile.gettempdir(), 'image-renditions')
+    os.makedirs(lock_dir, exist_ok=True)
+    lock_path = os.path.join(lock_dir, hashlib.md5(path.encode()).hexdigest() + '.lock')
+    with open(lock_path, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def encode_rendition(source_path, target_path, width, image_format, quality):
+    """Encode one rendition unless another process already did"""
+    with file_lock(target_path):
+        if os.path.exists(target_path):
+            return False
+        with Image.open(source_path) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(target_path), suffix='.tmp', delete=False
+            ) as tmp_file:
+                image.save(tmp_file, format=image_format.upper(), quality=quality)
+        os.replace(tmp_file.name, target_path)
+        return True
+
+
+def encode_renditions(source_path, jobs):
+    """Encode [(target_path, width, format, quality)], runs in pool workers"""
+    return sum(encode_rendition(source_path, *job) for job in jobs)
+
+
+def missing_jobs(info):
+    jobs = []
+    for image_format in get_formats():
+        for width in rendition_widths(info):
+            target_path = default_storage.path(rendition_name(info, width, image_format))
+            if not os.path.exists(target_path):
+                jobs.append((target_path, width, image_format, get_quality(image_format)))
+    return jobs
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _executor
+
+
+def _log_failure(future):
+    if future.exception():
+        logger.error('Encoding image renditions failed', exc_info=future.exception())
+
+
+def schedule_renditions(name):
+    """
+    Encode missing renditions of a stored image in the background pool,
+    or right away with IMAGE_RENDITION_WORKERS = 0
+    """
+    info = get_image_info(name)
+    if info is None:
+        return 0
+    jobs = missing_jobs(info)
+    if jobs:
+        source_path = default_storage.path(info.name)
+        if getattr(settings, 'IMAGE_RENDITION_WORKERS', 2):
+            get_executor().submit(encode_renditions, source_path, jobs).add_done_callback(_log_failure)
+        else:
+            encode_renditions(source_path, jobs)
+    return len(jobs)
+
+
+def find_original(stem, content_hash):
+    """Image of given name stem and content hash (renditions do not keep the extension)"""
+    try:
+        pattern = glob.escape(default_storage.path(stem)) + '.*'
+    except SuspiciousFileOperation:
+        return None
+    media_root = os.path.join(str(settings.MEDIA_ROOT), '')
+    for path in glob.glob(pattern):
+        name = os.path.relpath(path, media_root).replace(os.sep, '/')
+        if RENDITION_NAME.match(name) or path.endswith('.tmp'):
+            continue
+        info = get_image_info(name)
+        if info and info.hash == content_hash:
+            return info
+    return None
+
+
+def rendition_view(request, path):
+    """Serve a rendition, encoding it first when it is missing"""
+    match = RENDITION_NAME.match(path)
+    if not match:
+        raise Http404
+    info = find_original(match['stem'], match['hash'])
+    width = int(match['width'])
+    if info is None or width not in rendition_widths(info) or match['format'] not in get_formats():
+        raise Http404
+
+    target_path = default_storage.path(path)
+    if not os.path.exists(target_path):
+        encode_rendition(
+            default_storage.path(info.name), target_path, width,
+            match['format'], get_quality(match['format'])
+        )
+    response = FileResponse(open(target_path, 'rb'), content_type=CONTENT_TYPES[match['format']])
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
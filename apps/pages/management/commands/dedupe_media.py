@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from apps.pages import storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Link media files under content-addressed names, hard link duplicates and rewrite '
+        'image references (old names are kept as links to the same content)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report files to link and space to reclaim'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Hashing media files...')
+        stats = storage.dedupe_media(dry_run=options['dry_run'])
+        reclaimed = stats['bytes_reclaimed'] / (1024 * 1024)
+        if options['dry_run']:
+            self.stdout.write(
+                f"{stats['files']} files to link under new names (old names are kept), "
+                f"{stats['duplicates']} duplicates ({reclaimed:.1f} MB to reclaim)"
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Linked {stats['files']} files under new names (old names kept), "
+            f"{stats['duplicates']} duplicates linked ({reclaimed:.1f} MB reclaimed), "
+            f"{stats['references']} references updated"
+        ))
@@ -0,0 +1,53 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.pages.static_export import export_site
+
+
+class Command(BaseCommand):
+    help = 'Render public pages from the sitemaps to static HTML files (incremental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output_dir',
+            nargs='?',
+            default=str(settings.BASE_DIR / 'static_export'),
+            help='Output directory (default: %(default)s)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of rendering processes (default: %(default)s)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-render every page, ignoring the manifest'
+        )
+        parser.add_argument(
+            '--host',
+            default=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost',
+            help='Host header used for rendering (must be in ALLOWED_HOSTS)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Exporting pages to {options['output_dir']}...")
+        started = time.perf_counter()
+
+        result = export_site(
+            options['output_dir'],
+            host=options['host'],
+            workers=options['workers'],
+            full=options['full'],
+        )
+
+        for path, status in result['errors']:
+            self.stdout.write(self.style.WARNING(f'  {path}: HTTP {status}'))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Export completed in {elapsed:.1f}s'))
+        self.stdout.write(self.style.SUCCESS(f"  Rendered: {result['rendered']}"))
+        self.stdout.write(self.style.SUCCESS(f"  Unchanged: {result['unchanged']}"))
+        self.stdout.write(self.style.SUCCESS(f"  Removed: {result['removed']}"))
@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from apps.pages import images
+from apps.pages.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Encode missing responsive renditions (AVIF/WebP) of all uploaded images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of encoding processes (default: %(default)s)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        names = set()
+        for model, fields in IMAGE_FIELDS.items():
+            for row in model.objects.values_list(*fields):
+                names.update(name for name in row if name)
+
+        tasks = []
+        missing_files = 0
+        for name in sorted(names):
+            info = images.get_image_info(name)
+            if info is None:
+                missing_files += 1
+                continue
+            jobs = images.missing_jobs(info)
+            if jobs:
+                tasks.append((default_storage.path(name), jobs))
+
+        self.stdout.write(
+            f'{len(names)} images, {len(tasks)} with missing renditions. Encoding...'
+        )
+        with ProcessPoolExecutor(
+            max_workers=max(1, options['workers']), mp_context=multiprocessing.get_context('spawn')
+        ) as executor:
+            encoded = sum(executor.map(images.encode_renditions, *zip(*tasks))) if tasks else 0
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Encoded {encoded} renditions in {elapsed:.1f}s'))
+        if missing_files:
+            self.stdout.write(self.style.WARNING(f'  Missing or unreadable images: {missing_files}'))
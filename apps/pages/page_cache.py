@@ -0,0 +1,144 @@
+"""
+Full-page cache for anonymous visitors.
+
+Whole responses of public HTML views (PAGE_CACHE_VIEWS) are cached per
+URL and query string in the PAGE_CACHE_ALIAS cache. Requests carrying a
+session or messages cookie (logged in users, staff) always bypass it.
+
+Purging is done per path: every path has a generation number that is
+part of the page key, so purge_paths() invalidates all query string
+variants of a page (e.g. ?page=2). purge_all() is used when a change is
+visible on every page (categories in the navigation). signals.py maps
+model changes to paths.
+
+Pages may be cached per process, generations live in the shared cache so
+a purge reaches every worker. A missing generation (evicted entry) is
+recreated from the clock, which only causes misses, never stale pages.
+Cached pages keep the headers of the original response (Content-Language,
+Vary, Cache-Control...).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from .cache import get_shared_cache
+
+# URL names of views whose responses are cached
+PAGE_CACHE_VIEWS = {
+    'home', 'about', 'statut', 'foundation', 'mozg',
+    'category_list', 'category_detail', 'post_detail',
+}
+
+# Cookies meaning the page may be personalized
+BYPASS_COOKIES = [settings.SESSION_COOKIE_NAME, 'messages']
+
+GLOBAL_GENERATION_KEY = 'pagecache:generation'
+
+# Headers not replayed from a cached response
+SKIPPED_HEADERS = {'set-cookie', 'x-page-cache'}
+
+
+def get_page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _path_generation_key(path):
+    return f'pagecache:generation:{_digest(path)}'
+
+
+def _get_generations(keys):
+    shared = get_shared_cache()
+    generations = shared.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        generation = time.time_ns()
+        for key in missing:
+            shared.add(key, generation, None)
+        generations.update(shared.get_many(missing))
+    return generations
+
+
+def page_cache_key(path, full_path):
+    """Cache key of a page, changes when its path (or everything) is purged"""
+    generation_keys = [GLOBAL_GENERATION_KEY, _path_generation_key(path)]
+    generations = _get_generations(generation_keys)
+    versions = ':'.join(str(generations.get(key, 0)) for key in generation_keys)
+    return f'pagecache:page:{versions}:{_digest(full_path)}'
+
+
+def purge_paths(paths):
+    """Invalidate cached pages of given paths (all query strings)"""
+    generation = time.time_ns()
+    get_shared_cache().set_many(
+        {_path_generation_key(path): generation for path in set(paths)}, None
+    )
+
+
+def purge_all():
+    get_shared_cache().set(GLOBAL_GENERATION_KEY, time.time_ns(), None)
+
+
+class PageCacheMiddleware:
+    """
+    Serves cached pages before the view runs and stores anonymous
+    200 responses. Adds X-Page-Cache: hit/miss to cacheable pages.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        key = getattr(request, '_page_cache_key', None)
+        if key and request.method == 'GET' and self.can_store(response):
+            get_page_cache().set(key, {
+                'content': response.content,
+                'headers': [
+                    (name, value) for name, value in response.items()
+                    if name.lower() not in SKIPPED_HEADERS
+                ],
+            }, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+        if key:
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.can_use_cache(request):
+            return None
+
+        key = page_cache_key(request.path, request.get_full_path())
+        cached = get_page_cache().get(key)
+        if cached is None:
+            request._page_cache_key = key
+            return None
+
+        response = HttpResponse(cached['content'])
+        for name, value in cached['headers']:
+            response[name] = value
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+    def can_use_cache(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if request.resolver_match is None or request.resolver_match.url_name not in PAGE_CACHE_VIEWS:
+            return False
+        if 'HTTP_AUTHORIZATION' in request.META:
+            return False
+        return not any(request.COOKIES.get(name) for name in BYPASS_COOKIES)
+
+    def can_store(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
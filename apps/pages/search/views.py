@@ -1,5 +1,6 @@
 from django.views.generic import TemplateView
-from apps.posts.models import Post
+from apps.posts.models import Post, Tag
+from apps.posts.search import did_you_mean
 
 
 class SearchView(TemplateView):
@@ -17,40 +18,40 @@ class SearchView(TemplateView):
         context['results'] = []
         context['search_performed'] = False
         context['fallback_used'] = False
+        context['suggestion'] = None
         
         if query:
             context['search_performed'] = True
             
             if search_type == 'title_content':
-                # First, search by title
-                results = Post.objects.filter(
-                    title__icontains=query,
-                    published=True
-                ).select_related('category', 'author').prefetch_related('tags').order_by('-created_at')
+                # Full-text search: title matches rank first, then excerpt and content
+                results = Post.objects.published().search(
+                    query
+                ).with_headline(
+                    query
+                ).for_listing().prefetch_related('tags')
                 
-                # If nothing found in title, search in content
+                # Nothing found - typo tolerant title match (e.g. missing diacritics)
                 if not results.exists():
                     context['fallback_used'] = True
-                    results = Post.objects.filter(
-                        content__icontains=query,
-                        published=True
-                    ).select_related('category', 'author').prefetch_related('tags').order_by('-created_at')
+                    results = Post.objects.published().fuzzy(
+                        query
+                    ).for_listing().prefetch_related('tags')
                 
                 context['results'] = results
                 
             elif search_type == 'tags':
-                # Search by tags
+                # Search by tags (typo tolerant, trigram index on tag name)
+                matching_tags = Tag.objects.fuzzy(query).values('pk')
                 results = Post.objects.filter(
-                    tags__name__icontains=query,
+                    tags__in=matching_tags,
                     published=True
-                ).distinct().select_related('category', 'author').prefetch_related('tags').order_by('-created_at')
+                ).distinct().for_listing().prefetch_related('tags').order_by('-created_at')
                 
                 context['results'] = results
-        
-        return context
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+            
+            if not context['results']:
+                context['suggestion'] = did_you_mean(query)
         
         # SEO Context
         meta_title = 'Szukaj - Fundacja Chorób Mózgu'
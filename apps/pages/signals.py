@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+from django.urls import reverse
+
+from apps.banners.models import Banner
+from apps.posts.models import Category, GalleryImage, Post, Tag
+from apps.posts.gallery import gallery_images_added
+from . import images, page_cache
+from .cache import bump_content_version
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+@receiver(m2m_changed, sender=Post.tags.through)
+def content_changed(sender, **kwargs):
+    """Invalidate cached page fragments once the change is committed"""
+    if kwargs.get('raw'):
+        return
+    # Bumping before commit lets another request cache the old content under the new version
+    transaction.on_commit(bump_content_version)
+
+
+def purge_on_commit(paths):
+    """Purge once committed - a request served before the commit would cache the old page again"""
+    paths = list(paths)
+    transaction.on_commit(lambda: page_cache.purge_paths(paths))
+
+
+def post_paths(post):
+    """Cached pages showing a post: its detail page, category page and home"""
+    return [
+        reverse('post_detail', args=[post.category.slug, post.slug]),
+        reverse('category_detail', args=[post.category.slug]),
+        reverse('home'),
+    ]
+
+
+def tagged_post_paths(posts):
+    return [path for post in posts.select_related('category') for path in post_paths(post)]
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_paths(sender, instance, raw=False, **kwargs):
+    """Slug or category may change - old pages must be purged as well"""
+    if raw or not instance.pk:
+        return
+    old = Post.objects.select_related('category').filter(pk=instance.pk).first()
+    instance._old_page_paths = post_paths(old) if old else []
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    purge_on_commit(post_paths(instance) + getattr(instance, '_old_page_paths', []))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def purge_tagged_post_pages(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Tag.posts.clear() sends no pk_set - remember the pages of posts losing the tag
+        instance._cleared_page_paths = tagged_post_paths(instance.posts.all())
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        purge_on_commit(post_paths(instance))
+    elif action == 'post_clear':
+        purge_on_commit(vars(instance).pop('_cleared_page_paths', []))
+    else:
+        purge_on_commit(tagged_post_paths(Post.objects.filter(pk__in=pk_set)))
+
+
+@receiver(post_save, sender=Tag)
+def purge_tag_pages(sender, instance, raw=False, **kwargs):
+    """Tag names are shown on post pages"""
+    if raw:
+        return
+    purge_on_commit(tagged_post_paths(instance.posts.all()))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_pages(sender, instance, **kwargs):
+    """The tag's rows are removed before post_delete - find its posts now"""
+    instance._tagged_page_paths = tagged_post_paths(instance.posts.all())
+
+
+@receiver(post_delete, sender=Tag)
+def purge_deleted_tag_pages(sender, instance, **kwargs):
+    purge_on_commit(vars(instance).pop('_tagged_page_paths', []))
+
+
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_delete, sender=GalleryImage)
+def purge_gallery_post_page(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    post = instance.post
+    purge_on_commit([reverse('post_detail', args=[post.category.slug, post.slug])])
+
+
+@receiver(gallery_images_added)
+def purge_gallery_upload_post_page(sender, post, gallery_images, **kwargs):
+    """Bulk gallery upload (apps.posts.gallery) - rows are added without post_save"""
+    purge_on_commit([reverse('post_detail', args=[post.category.slug, post.slug])])
+    names = [image.image.name for image in gallery_images]
+    transaction.on_commit(lambda: [images.schedule_renditions(name) for name in names])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category_pages(sender, instance, raw=False, **kwargs):
+    """Categories are listed in the navigation of every page"""
+    if raw:
+        return
+    transaction.on_commit(page_cache.purge_all)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def purge_banner_pages(sender, instance, raw=False, **kwargs):
+    """Banner positions are all on the home page"""
+    if raw:
+        return
+    purge_on_commit([reverse('home')])
+
+
+# Image fields getting responsive renditions (apps/pages/images.py)
+IMAGE_FIELDS = {
+    Post: ['hero_image', 'og_image'],
+    Category: ['default_image'],
+    GalleryImage: ['image'],
+    Banner: ['image'],
+}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_save, sender=Banner)
+def schedule_image_renditions(sender, instance, raw=False, **kwargs):
+    """Encode renditions of uploaded images once the transaction commits"""
+    if raw:
+        return
+    names = [getattr(instance, field).name for field in IMAGE_FIELDS[sender] if getattr(instance, field)]
+    # Only set when the content was rendered again (render_post), not on every save
+    names += vars(instance).pop('_content_image_names', [])
+    if names:
+        transaction.on_commit(lambda: [images.schedule_renditions(name) for name in names])
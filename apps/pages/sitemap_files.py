@@ -0,0 +1,247 @@
+"""
+Sitemap index with sections cached on disk.
+
+/sitemap.xml is an index of sections served from /sitemap-<section>.xml:
+pages, categories and posts-YYYY-MM (published posts by month of
+creation, so editing a post touches a single section).
+
+Each section has a signature of the data it lists (post count and latest
+updated_at of the month, category slugs, site domain). It is rendered once
+per signature and stored gzipped in SITEMAP_DIR; later requests compute
+the signature (one or two small indexed queries) and send the file as is.
+<lastmod> of posts is their updated_at, of categories and sections the
+latest change of their posts. Responses carry Last-Modified and
+If-Modified-Since is answered with 304, so crawlers skip unchanged
+sections.
+
+Writing a file removes only older versions of the section, and a file
+removed while a request was about to read it is rendered again, so
+concurrent requests never fail on a missing file.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.sitemaps.views import SitemapIndexItem, x_robots_tag
+from django.contrib.sites.shortcuts import get_current_site
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from apps.posts.models import Category, Post
+from apps.posts.sitemaps import CategorySitemap, PostSitemap
+from .sitemaps import StaticPagesSitemap
+
+POSTS_SECTION = re.compile(r'^posts-(\d{4})-(\d{2})$')
+INDEX_NAME = 'index'
+
+
+class Section:
+    """Sitemap section: name, Sitemap instance, lastmod and data signature"""
+
+    def __init__(self, name, sitemap, lastmod, signature):
+        self.name = name
+        self.sitemap = sitemap
+        self.lastmod = lastmod
+        self.signature = signature
+
+    def location(self):
+        return reverse('sitemap_section', args=[self.name])
+
+
+def get_sitemap_dir():
+    return getattr(settings, 'SITEMAP_DIR', os.path.join(settings.BASE_DIR, 'cache', 'sitemaps'))
+
+
+def _digest(*parts):
+    data = json.dumps(parts, default=str, sort_keys=True)
+    return hashlib.md5(data.encode()).hexdigest()
+
+
+def month_range(year, month):
+    """[start, end) of a month in the current time zone"""
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+def _categories_digest():
+    """Post URLs contain category slugs"""
+    return _digest(list(Category.objects.order_by('pk').values_list('pk', 'slug')))
+
+
+def _post_section(domain, categories, year, month, count, lastmod):
+    start, end = month_range(year, month)
+    return Section(
+        f'posts-{year:04d}-{month:02d}',
+        PostSitemap(start, end),
+        lastmod,
+        _digest(domain, categories, count, lastmod),
+    )
+
+
+def _categories_section(domain):
+    sitemap = CategorySitemap()
+    state = [(category.pk, category.slug, category.lastmod) for category in sitemap.items()]
+    lastmods = [lastmod for _, _, lastmod in state if lastmod]
+    return Section('categories', sitemap, max(lastmods, default=None), _digest(domain, state))
+
+
+def _pages_section(domain):
+    sitemap = StaticPagesSitemap()
+    return Section('pages', sitemap, None, _digest(domain, sitemap.items()))
+
+
+def get_sections(domain):
+    """All sections of the index, posts grouped by month in one query"""
+    categories = _categories_digest()
+    months = Post.objects.published().annotate(
+        month=TruncMonth('created_at')
+    ).values('month').annotate(count=Count('pk'), lastmod=Max('updated_at')).order_by('month')
+
+    sections = [_pages_section(domain), _categories_section(domain)]
+    for row in months:
+        month = timezone.localtime(row['month'])
+        sections.append(_post_section(
+            domain, categories, month.year, month.month, row['count'], row['lastmod']
+        ))
+    return sections
+
+
+def get_section(domain, name):
+    """Single section by name, None when it does not exist"""
+    if name == 'pages':
+        return _pages_section(domain)
+    if name == 'categories':
+        return _categories_section(domain)
+
+    match = POSTS_SECTION.match(name)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        return None
+    year, month = int(match.group(1)), int(match.group(2))
+    start, end = month_range(year, month)
+    state = Post.objects.published().filter(
+        created_at__gte=start, created_at__lt=end
+    ).aggregate(count=Count('pk'), lastmod=Max('updated_at'))
+    if not state['count']:
+        return None
+    return _post_section(domain, _categories_digest(), year, month, state['count'], state['lastmod'])
+
+
+def section_file(name, signature):
+    return os.path.join(get_sitemap_dir(), f'{name}.{signature[:16]}.xml.gz')
+
+
+def write_file(name, path, content):
+    """
+    Write gzipped content atomically and remove versions of the file older
+    than it (a newer one written by a concurrent request is kept).
+    Returns the gzipped content.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    compressed = gzip.compress(content.encode())
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as tmp_file:
+        tmp_file.write(compressed)
+    os.replace(tmp_file.name, path)
+
+    written_at = os.stat(path).st_mtime_ns
+    for old_path in glob.glob(os.path.join(glob.escape(directory), f'{glob.escape(name)}.*.xml.gz')):
+        if old_path == path:
+            continue
+        try:
+            if os.stat(old_path).st_mtime_ns < written_at:
+                os.remove(old_path)
+        except FileNotFoundError:
+            pass
+    return compressed
+
+
+def read_file(path):
+    """(mtime, gzipped content) of a stored file, FileNotFoundError when missing"""
+    with open(path, 'rb') as sitemap_file:
+        return int(os.fstat(sitemap_file.fileno()).st_mtime), sitemap_file.read()
+
+
+def render_section(section, site):
+    urls = section.sitemap.get_urls(page=1, site=site, protocol=section.sitemap.protocol)
+    return render_to_string('sitemap.xml', {'urlset': urls})
+
+
+def render_index(sections, site):
+    items = [
+        SitemapIndexItem(f'https://{site.domain}{section.location()}', section.lastmod)
+        for section in sections
+    ]
+    return render_to_string('sitemap_index.xml', {'sitemaps': items})
+
+
+def serve_file(request, name, signature, lastmod, render):
+    """
+    Send the stored file of a signature (rendering it first if missing),
+    gzipped as is when the client accepts it
+    """
+    path = section_file(name, signature)
+    try:
+        file_modified, content = read_file(path)
+    except FileNotFoundError:
+        # Not rendered yet, or removed by a request that wrote a newer version
+        content = write_file(name, path, render())
+        file_modified = int(time.time())
+
+    # The file is rewritten whenever its content changes (also when posts are only removed)
+    last_modified = file_modified
+    if lastmod is not None:
+        last_modified = max(last_modified, int(lastmod.timestamp()))
+    not_modified = get_conditional_response(request, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(content, content_type='application/xml')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(content), content_type='application/xml')
+    patch_vary_headers(response, ['Accept-Encoding'])
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@x_robots_tag
+def sitemap_index(request):
+    """/sitemap.xml - index of all sections"""
+    site = get_current_site(request)
+    sections = get_sections(site.domain)
+    lastmods = [section.lastmod for section in sections if section.lastmod]
+    return serve_file(
+        request,
+        INDEX_NAME,
+        _digest([(section.name, section.signature) for section in sections]),
+        max(lastmods, default=None),
+        lambda: render_index(sections, site),
+    )
+
+
+@x_robots_tag
+def sitemap_section(request, section):
+    """/sitemap-<section>.xml"""
+    site = get_current_site(request)
+    section = get_section(site.domain, section)
+    if section is None:
+        raise Http404('No such sitemap section')
+    return serve_file(
+        request, section.name, section.signature, section.lastmod,
+        lambda: render_section(section, site),
+    )
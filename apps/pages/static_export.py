@@ -0,0 +1,193 @@
+"""
+Static export of the public site (manage.py export_static).
+
+Every URL of the sitemaps is rendered through the normal request stack
+and written as <path>/index.html, so nginx can serve the files directly
+and pass only the admin, API, search and paginated pages to Django.
+
+Each page gets a signature of the data it shows (posts, tags, gallery,
+categories in the navigation, banners). Signatures of the last export are
+kept in a manifest in the output directory; later runs re-render only
+pages whose signature changed and remove files of pages that are gone.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.sites.models import Site
+from django.db import connections
+from django.test import Client
+from django.urls import Resolver404, resolve, reverse
+
+from apps.banners.models import Banner
+from apps.posts.models import Category, GalleryImage, Post
+from apps.posts.sitemaps import CategorySitemap, PostSitemap
+from .sitemap_files import get_sections
+from .sitemaps import StaticPagesSitemap
+
+MANIFEST_NAME = '.export-manifest.json'
+
+# Pages with forms or per-request content are left to Django
+SKIPPED_URL_NAMES = {'contact', 'search'}
+
+# Sitemaps listing every exported page (all items, not split in sections)
+SITEMAPS = [PostSitemap, CategorySitemap, StaticPagesSitemap]
+
+
+def _digest(*parts):
+    data = json.dumps(parts, default=str, sort_keys=True)
+    return hashlib.md5(data.encode()).hexdigest()
+
+
+def _normalize_path(path):
+    """Sitemap locations may lack the trailing slash the URLconf expects"""
+    try:
+        resolve(path)
+    except Resolver404:
+        if not path.endswith('/'):
+            return path + '/'
+    return path
+
+
+def output_file(output_dir, path):
+    """File a page is written to: /a/b/ -> a/b/index.html, /sitemap-pages.xml as is"""
+    relative = path.strip('/')
+    if relative and os.path.splitext(relative)[1]:
+        return os.path.join(output_dir, relative)
+    return os.path.join(output_dir, relative, 'index.html')
+
+
+def collect_pages():
+    """{path: signature} of every exported page (a handful of queries)"""
+    # Categories are shown in the navigation of every page
+    layout = _digest(list(Category.objects.order_by('pk').values()))
+    banners = _digest(list(Banner.objects.order_by('pk').values()))
+
+    tags = defaultdict(list)
+    for post_id, name, slug in Post.tags.through.objects.order_by(
+        'post_id', 'tag__name'
+    ).values_list('post_id', 'tag__name', 'tag__slug'):
+        tags[post_id].append((name, slug))
+
+    gallery = defaultdict(list)
+    for image in GalleryImage.objects.order_by('post_id', 'position', 'pk').values():
+        gallery[image['post_id']].append(image)
+
+    posts = list(
+        Post.objects.published().order_by('-created_at').values('pk', 'category_id', 'updated_at')
+    )
+    post_signatures = {
+        post['pk']: _digest(post['updated_at'], tags[post['pk']], gallery[post['pk']])
+        for post in posts
+    }
+    category_posts = defaultdict(list)
+    for post in posts:
+        category_posts[post['category_id']].append(post_signatures[post['pk']])
+
+    def page_signature(url_name, item):
+        if url_name == 'post_detail':
+            return post_signatures.get(item.pk)
+        if url_name == 'category_detail':
+            return _digest(category_posts[item.pk])
+        if url_name == 'home':
+            return _digest(list(post_signatures.values())[:22], banners)
+        return ''
+
+    pages = {}
+    for sitemap_class in SITEMAPS:
+        sitemap = sitemap_class()
+        for item in sitemap.items():
+            path = _normalize_path(sitemap.location(item))
+            url_name = resolve(path).url_name
+            if url_name in SKIPPED_URL_NAMES:
+                continue
+            pages[path] = _digest(layout, page_signature(url_name, item))
+
+    sections = get_sections(Site.objects.get_current().domain)
+    for section in sections:
+        pages[section.location()] = section.signature
+    pages[reverse('sitemap_index')] = _digest([section.signature for section in sections])
+    return pages
+
+
+def render_page(path, host):
+    """(path, status, content) of a page rendered through the full stack"""
+    response = Client(HTTP_HOST=host, raise_request_exception=False).get(path)
+    return path, response.status_code, response.content
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _render_task(args):
+    return render_page(*args)
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+
+
+def export_site(output_dir, host='localhost', workers=1, full=False):
+    """
+    Render changed pages to output_dir. Returns dict with rendered,
+    unchanged, removed page counts and errors [(path, status)].
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if full else load_manifest(output_dir)
+    pages = collect_pages()
+
+    to_render = [
+        path for path, signature in pages.items()
+        if manifest.get(path) != signature or not os.path.exists(output_file(output_dir, path))
+    ]
+    removed = [path for path in manifest if path not in pages]
+
+    if workers > 1 and len(to_render) > 1:
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            results = list(executor.map(
+                _render_task, [(path, host) for path in to_render], chunksize=8
+            ))
+    else:
+        results = [render_page(path, host) for path in to_render]
+
+    errors = []
+    new_manifest = {path: manifest[path] for path in pages if path in manifest}
+    for path, status, content in results:
+        if status != 200:
+            errors.append((path, status))
+            new_manifest.pop(path, None)
+            continue
+        filename = output_file(output_dir, path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'wb') as page_file:
+            page_file.write(content)
+        new_manifest[path] = pages[path]
+
+    for path in removed:
+        try:
+            os.remove(output_file(output_dir, path))
+        except FileNotFoundError:
+            pass
+
+    save_manifest(output_dir, new_manifest)
+    return {
+        'rendered': len(results) - len(errors),
+        'unchanged': len(pages) - len(to_render),
+        'removed': len(removed),
+        'errors': errors,
+    }
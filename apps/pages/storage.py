@@ -0,0 +1,285 @@
+"""
+Content-addressed media storage.
+
+ContentAddressedStorage (STORAGES['default']) stores every upload under
+the SHA-256 of its content:
+
+    posts/heroes/photo.jpg -> posts/heroes/<sha256[:32]>.jpg
+
+The bytes are written once, to MEDIA_ROOT/.objects/<ab>/<sha256>; names
+handed to models are hard links to that object, so the same photo
+uploaded as a hero image, a gallery image and in CKEditor takes the disk
+space once, and uploading it again to the same directory just returns
+the existing name. A name changes whenever the content does, so media
+URLs are immutable: media_view (and nginx, see README) serves them with
+Cache-Control: immutable for a year.
+
+CKEditor thumbnails (<name>_thumb.jpg) keep their names - the browser of
+ckeditor_uploader finds them by the name of the image.
+
+dedupe_media() (`python manage.py dedupe_media`) moves an existing media
+tree to this layout and rewrites the image references in the database.
+Old names stay as hard links to the same objects, so URLs outside the
+database (absolute links, search engines, static exports) keep working
+without taking extra space.
+"""
+import glob
+import hashlib
+import os
+import re
+import shutil
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.http import FileResponse, Http404
+
+OBJECTS_DIR = '.objects'
+NAME_HASH_LENGTH = 32
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+HASHED_NAME = re.compile(r'^(?:.+/)?[0-9a-f]{32}\.[A-Za-z0-9]+$')
+MEDIA_REFERENCE = re.compile(r'(?P<quote>["\'(])(?P<url>{media_url}[^"\'()<>\s]+)')
+
+
+def file_digest(content):
+    """sha256 hex digest of a File, read in chunks"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def path_digest(path):
+    with open(path, 'rb') as source:
+        return hashlib.file_digest(source, 'sha256').hexdigest()
+
+
+def hashed_name(name, digest):
+    """Name of content with given digest in the directory of name"""
+    directory = os.path.dirname(name)
+    ext = os.path.splitext(name)[1].lower()
+    return os.path.join(directory, f'{digest[:NAME_HASH_LENGTH]}{ext}').replace(os.sep, '/')
+
+
+def object_name(digest):
+    return f'{OBJECTS_DIR}/{digest[:2]}/{digest}'
+
+
+def keeps_name(name):
+    """Files stored under the given name: objects and CKEditor thumbnails"""
+    return name.startswith(f'{OBJECTS_DIR}/') or os.path.splitext(name)[0].endswith('_thumb')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage writing each content once and naming files by its hash"""
+
+    def _save(self, name, content):
+        if keeps_name(name):
+            return super()._save(name, content)
+
+        digest = file_digest(content)
+        target = hashed_name(name, digest)
+        if self.exists(target):
+            return target
+
+        source = object_name(digest)
+        if not self.exists(source):
+            # Temporary uploaded files are moved, not copied
+            source = super()._save(source, content)
+        self.link(source, target)
+        return target
+
+    def get_available_name(self, name, max_length=None):
+        # Names are chosen by content in _save(), an existing name is reused
+        if keeps_name(name):
+            return super().get_available_name(name, max_length)
+        return name
+
+    def link(self, source, target):
+        """Hard link target to source (copy where links are not supported)"""
+        target_path = self.path(target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        try:
+            os.link(self.path(source), target_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(self.path(source), target_path)
+
+
+def media_view(request, path):
+    """Hash-named media file with immutable cache headers (nginx serves them in production)"""
+    if not HASHED_NAME.match(path) or path.startswith(f'{OBJECTS_DIR}/'):
+        raise Http404
+    try:
+        response = FileResponse(default_storage.open(path, 'rb'))
+    except (FileNotFoundError, IsADirectoryError):
+        raise Http404
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def media_files(root):
+    """Storage names of the files to deduplicate (no objects, renditions, thumbnails, temp files)"""
+    from .images import RENDITION_NAME
+
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [dirname for dirname in dirnames if dirname != OBJECTS_DIR]
+        for filename in filenames:
+            name = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+            if keeps_name(name) or RENDITION_NAME.match(name) or name.endswith('.tmp'):
+                continue
+            yield name
+
+
+def same_file(storage, name, other_name):
+    try:
+        return os.path.samefile(storage.path(name), storage.path(other_name))
+    except FileNotFoundError:
+        return False
+
+
+def plan_renames(storage):
+    """
+    {old name: (new name, digest)} moving media files to the content-addressed
+    layout. Old names already linked to their new name (kept by an earlier
+    run) are skipped.
+    """
+    renames = {}
+    for name in sorted(media_files(storage.location)):
+        if not HASHED_NAME.match(name):
+            digest = path_digest(storage.path(name))
+            new_name = hashed_name(name, digest)
+            if not same_file(storage, name, new_name):
+                renames[name] = (new_name, digest)
+    return renames
+
+
+def rewrite_content_urls(html, renames):
+    """Replace /media/ URLs of renamed files in HTML"""
+    def replace(match):
+        name = unquote(match['url'][len(settings.MEDIA_URL):])
+        if name not in renames:
+            return match.group(0)
+        return match['quote'] + settings.MEDIA_URL + quote(renames[name])
+
+    pattern = MEDIA_REFERENCE.pattern.format(media_url=re.escape(settings.MEDIA_URL))
+    return re.sub(pattern, replace, html or '')
+
+
+def rewrite_references(renames):
+    """Point image fields and post content at the new names, returns changed rows"""
+    from apps.posts.content import RENDERED_FIELDS, render_post
+    from apps.posts.models import Post
+    from .signals import IMAGE_FIELDS
+
+    changed = 0
+    for model, fields in IMAGE_FIELDS.items():
+        for field in fields:
+            objects = []
+            for obj in model.objects.exclude(**{field: ''}).only('pk', field):
+                name = getattr(obj, field).name
+                if name in renames:
+                    setattr(obj, field, renames[name])
+                    objects.append(obj)
+            model.objects.bulk_update(objects, [field], batch_size=200)
+            changed += len(objects)
+
+    posts = []
+    for post in Post.objects.filter(content__contains=settings.MEDIA_URL):
+        content = rewrite_content_urls(post.content, renames)
+        if content != post.content:
+            post.content = content
+            render_post(post)
+            posts.append(post)
+    Post.objects.bulk_update(posts, ['content', *RENDERED_FIELDS], batch_size=200)
+    return changed + len(posts)
+
+
+def thumbnail_name(name):
+    """CKEditor thumbnail of an uploaded image (ckeditor_uploader.utils.get_thumb_filename)"""
+    return '{0}_thumb{1}'.format(*os.path.splitext(name))
+
+
+def prune_objects(storage):
+    """Remove objects no name links to any more, returns the number of removed objects"""
+    removed = 0
+    for path in glob.glob(os.path.join(glob.escape(storage.path(OBJECTS_DIR)), '*', '*')):
+        if os.stat(path).st_nlink == 1:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def replace_with_link(storage, source, name):
+    """Atomically turn name into a hard link to source (no-op when it already is one)"""
+    if same_file(storage, source, name):
+        return
+    tmp_path = f'{storage.path(name)}.{os.getpid()}.tmp'
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(storage.path(source), tmp_path)
+    except OSError:
+        shutil.copyfile(storage.path(source), tmp_path)
+    os.replace(tmp_path, storage.path(name))
+
+
+def dedupe_media(dry_run=False):
+    """
+    Move the media tree to content-addressed names: one object per
+    content, files hard linked to it. Image fields and post content are
+    pointed at the new names; old names (and their renditions and
+    CKEditor thumbnails) are kept as hard links to the same objects, so
+    references outside the database do not break. Returns statistics.
+    """
+    storage = ContentAddressedStorage()
+    renames = plan_renames(storage)
+
+    seen_digests, seen_inodes = set(), set()
+    duplicates = reclaimed = 0
+    for old_name, (new_name, digest) in renames.items():
+        stat = os.stat(storage.path(old_name))
+        existing = [name for name in (object_name(digest), new_name) if storage.exists(name)]
+        if digest in seen_digests or existing:
+            duplicates += 1
+            # A file already linked to the object takes no extra space
+            linked = any(same_file(storage, old_name, name) for name in existing)
+            if (stat.st_dev, stat.st_ino) not in seen_inodes and not linked:
+                reclaimed += stat.st_size
+        seen_digests.add(digest)
+        seen_inodes.add((stat.st_dev, stat.st_ino))
+    stats = {'files': len(renames), 'duplicates': duplicates, 'bytes_reclaimed': reclaimed, 'references': 0}
+    if dry_run or not renames:
+        return stats
+
+    for old_name, (new_name, digest) in renames.items():
+        source = object_name(digest)
+        if not storage.exists(source):
+            storage.link(old_name, source)
+        storage.link(source, new_name)
+        # The old name stays, sharing the object (duplicates stop taking space)
+        replace_with_link(storage, source, old_name)
+        old_thumbnail, new_thumbnail = thumbnail_name(old_name), thumbnail_name(new_name)
+        if storage.exists(old_thumbnail):
+            storage.link(old_thumbnail, new_thumbnail)
+
+    with transaction.atomic():
+        stats['references'] = rewrite_references({old: new for old, (new, _) in renames.items()})
+
+    stats['objects_pruned'] = prune_objects(storage)
+
+    from apps.posts import cards
+    from . import page_cache
+    from .cache import bump_content_version
+
+    cards.rebuild_all()
+    page_cache.purge_all()
+    bump_content_version()
+    return stats
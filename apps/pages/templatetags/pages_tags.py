@@ -1,5 +1,10 @@
 from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
 from apps.posts.models import Category
+from .. import images
+from ..cache import reference_cache
 
 register = template.Library()
 
@@ -9,5 +14,24 @@ def get_categories():
     """
     Template tag to get all categories for navigation
     Usage: {% get_categories as categories %}
+    Served from the process-level reference cache.
     """
-    return Category.objects.all().order_by('name')
+    return reference_cache.get('categories', lambda: list(Category.objects.all().order_by('name')))
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', loading='lazy', **attrs):
+    """
+    <picture> with AVIF/WebP renditions (apps/pages/images.py) of an image
+    field or /media/ URL, falling back to the original file
+    Usage: {% responsive_image post.hero_image alt=post.title sizes="33vw" class="w-full" %}
+    """
+    name = images.media_name(image)
+    info = images.get_image_info(name) if name else None
+    url = default_storage.url(name) if name else (getattr(image, 'url', image) or '')
+
+    img_attrs = {'src': url, 'alt': alt, 'loading': loading, 'decoding': 'async', **attrs}
+    if not info:
+        return format_html('<img{}>', flatatt(img_attrs))
+    img_attrs.update(width=info.width, height=info.height)
+    return images.picture(info, img_attrs, sizes)
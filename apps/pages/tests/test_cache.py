@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import SimpleTestCase, TestCase
+
+from apps.pages.cache import (
+    CONTENT_VERSION_KEY, bump_content_version, get_content_version, get_shared_cache
+)
+from apps.posts.tests.utils import make_tag
+
+
+class ContentVersionTests(SimpleTestCase):
+    """The site content version is kept in the shared cache"""
+
+    def test_version_is_stored_in_shared_cache(self):
+        version = get_content_version()
+
+        self.assertEqual(get_shared_cache().get(CONTENT_VERSION_KEY), version)
+        self.assertIsNone(cache.get(CONTENT_VERSION_KEY))
+
+    def test_bump_survives_losing_process_cache(self):
+        version = get_content_version()
+        bump_content_version()
+        # Another worker process starts with an empty local cache
+        cache.clear()
+
+        self.assertEqual(get_content_version(), version + 1)
+
+    def test_missing_version_is_recreated(self):
+        get_shared_cache().delete(CONTENT_VERSION_KEY)
+        bump_content_version()
+
+        self.assertIsNotNone(get_shared_cache().get(CONTENT_VERSION_KEY))
+
+
+class ContentChangedTests(TestCase):
+    """Content changes bump the version only once they are committed"""
+
+    def test_version_is_bumped_on_commit(self):
+        version = get_content_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tag('Udar')
+            self.assertEqual(get_content_version(), version)
+
+        self.assertGreater(get_content_version(), version)
+
+    def test_rolled_back_change_keeps_version(self):
+        version = get_content_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    make_tag('Udar')
+                    raise DatabaseError('rollback')
+            except DatabaseError:
+                pass
+
+        self.assertEqual(get_content_version(), version)
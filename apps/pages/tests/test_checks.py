@@ -0,0 +1,18 @@
+from django.test import SimpleTestCase, override_settings
+
+from apps.pages.checks import check_shared_cache
+
+LOCMEM = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_file_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES={'default': LOCMEM, 'shared': LOCMEM})
+    def test_process_local_cache_is_an_error(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['pages.E002'])
+
+    @override_settings(CACHES={'default': LOCMEM})
+    def test_missing_alias_is_an_error(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['pages.E001'])
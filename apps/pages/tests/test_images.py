@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from apps.pages import images
+from apps.posts import content
+from apps.posts.tests.utils import make_category, make_post, make_user
+
+INFO = images.ImageInfo('posts/heroes/photo.jpg', '0123456789', 1000, 600)
+
+
+class RenditionFormatsTests(SimpleTestCase):
+    """Formats Pillow cannot encode are never offered"""
+
+    def setUp(self):
+        images.can_encode.cache_clear()
+        self.addCleanup(images.can_encode.cache_clear)
+
+    def without_avif(self):
+        return mock.patch.object(images.features, 'check', side_effect=lambda name: name != 'avif')
+
+    def test_supported_formats_are_kept(self):
+        with mock.patch.object(images.features, 'check', return_value=True):
+            self.assertEqual(images.get_formats(), ['avif', 'webp'])
+
+    def test_avif_is_skipped_without_encoder(self):
+        with self.without_avif(), self.assertLogs('apps.pages.images', 'WARNING'):
+            self.assertEqual(images.get_formats(), ['webp'])
+            html = images.picture(INFO, {'src': '/media/posts/heroes/photo.jpg'}, '100vw')
+
+        self.assertNotIn('image/avif', html)
+        self.assertIn('image/webp', html)
+
+    def test_avif_rendition_is_not_served_without_encoder(self):
+        request = RequestFactory().get('/media/posts/heroes/photo.0123456789.640w.avif')
+        with self.without_avif(), self.assertLogs('apps.pages.images', 'WARNING'), \
+                mock.patch.object(images, 'find_original', return_value=INFO):
+            with self.assertRaises(Http404):
+                images.rendition_view(request, 'posts/heroes/photo.0123456789.640w.avif')
+
+
+class ContentRenditionsSignalTests(TestCase):
+    """Renditions of content images are scheduled only when the content was rendered"""
+
+    def setUp(self):
+        self.category = make_category()
+        self.author = make_user()
+
+    def test_content_images_scheduled_after_render(self):
+        with mock.patch.object(images, 'schedule_renditions') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                make_post('Z obrazkiem', self.category, self.author, content='<img src="/media/uploads/mozg.jpg">')
+
+        schedule.assert_called_once_with('uploads/mozg.jpg')
+
+    def test_unchanged_content_is_not_rendered_again(self):
+        post = make_post('Z obrazkiem', self.category, self.author, content='<img src="/media/uploads/mozg.jpg">')
+
+        with mock.patch.object(images, 'schedule_renditions') as schedule, \
+                mock.patch.object(content, 'render', wraps=content.render) as render:
+            with self.captureOnCommitCallbacks(execute=True):
+                post.title = 'Nowy tytuł'
+                post.save()
+
+        render.assert_not_called()
+        schedule.assert_not_called()
@@ -0,0 +1,92 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import resolve, reverse
+from django.utils.cache import patch_vary_headers
+
+from apps.pages import page_cache
+from apps.pages.cache import get_shared_cache
+from apps.posts.tests.utils import make_category, make_post, make_tag, make_user
+
+
+def about_view(request):
+    response = HttpResponse('<h1>O nas</h1>', content_type='text/html; charset=utf-8')
+    response['Content-Language'] = 'pl'
+    response['Cache-Control'] = 'max-age=60'
+    patch_vary_headers(response, ['Accept-Language'])
+    return response
+
+
+class PageCacheMiddlewareTests(SimpleTestCase):
+    path = '/o-nas/'
+
+    def setUp(self):
+        page_cache.purge_paths([self.path])
+        self.calls = 0
+
+    def get(self):
+        def get_response(request):
+            self.calls += 1
+            return middleware.process_view(request, about_view, (), {}) or about_view(request)
+
+        middleware = page_cache.PageCacheMiddleware(get_response)
+        request = RequestFactory().get(self.path)
+        request.resolver_match = resolve(self.path)
+        return middleware(request)
+
+    def test_hit_replays_original_headers(self):
+        miss = self.get()
+        hit = self.get()
+
+        self.assertEqual((miss['X-Page-Cache'], hit['X-Page-Cache']), ('miss', 'hit'))
+        self.assertEqual(hit.content, miss.content)
+        for header in ['Content-Type', 'Content-Language', 'Cache-Control', 'Vary']:
+            self.assertEqual(hit[header], miss[header], header)
+
+    def test_purge_is_stored_in_shared_cache(self):
+        self.get()
+        page_cache.purge_paths([self.path])
+
+        self.assertEqual(self.get()['X-Page-Cache'], 'miss')
+        self.assertIsNotNone(get_shared_cache().get(page_cache._path_generation_key(self.path)))
+
+    def test_lost_generation_never_reuses_old_pages(self):
+        key = page_cache.page_cache_key(self.path, self.path)
+        get_shared_cache().delete(page_cache._path_generation_key(self.path))
+
+        self.assertNotEqual(page_cache.page_cache_key(self.path, self.path), key)
+
+
+class PurgeSignalsTests(TestCase):
+    """Content changes purge cached pages once they are committed"""
+
+    def setUp(self):
+        self.tag = make_tag('Udar')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = make_post('Pierwszy', make_category(), make_user(), [self.tag])
+        self.path = reverse('post_detail', args=[self.post.category.slug, self.post.slug])
+
+    def key(self):
+        return page_cache.page_cache_key(self.path, self.path)
+
+    def test_purge_waits_for_commit(self):
+        key = self.key()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Zmieniony'
+            self.post.save()
+            self.assertEqual(self.key(), key)
+
+        self.assertNotEqual(self.key(), key)
+
+    def test_reverse_clear_purges_tagged_posts(self):
+        key = self.key()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.posts.clear()
+
+        self.assertNotEqual(self.key(), key)
+
+    def test_tag_delete_purges_tagged_posts(self):
+        key = self.key()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+
+        self.assertNotEqual(self.key(), key)
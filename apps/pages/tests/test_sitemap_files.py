@@ -0,0 +1,64 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.pages import sitemap_files
+
+
+class SitemapFilesTests(SimpleTestCase):
+    """Stored sitemap files under concurrent rewrites"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(SITEMAP_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def serve(self, signature, content):
+        request = RequestFactory().get('/sitemap-pages.xml')
+        return sitemap_files.serve_file(request, 'pages', signature, None, lambda: content)
+
+    def test_newer_version_is_kept(self):
+        newer = sitemap_files.section_file('pages', 'b' * 32)
+        sitemap_files.write_file('pages', newer, '<urlset>new</urlset>')
+        future = time.time() + 60
+        os.utime(newer, (future, future))
+
+        older = sitemap_files.section_file('pages', 'a' * 32)
+        sitemap_files.write_file('pages', older, '<urlset>old</urlset>')
+
+        self.assertTrue(os.path.exists(newer))
+
+    def test_older_versions_are_removed(self):
+        older = sitemap_files.section_file('pages', 'a' * 32)
+        sitemap_files.write_file('pages', older, '<urlset>old</urlset>')
+        past = time.time() - 60
+        os.utime(older, (past, past))
+
+        sitemap_files.write_file('pages', sitemap_files.section_file('pages', 'b' * 32), '<urlset>new</urlset>')
+
+        self.assertFalse(os.path.exists(older))
+
+    def test_removed_file_is_rendered_again(self):
+        self.serve('a' * 32, '<urlset>first</urlset>')
+        # Another request wrote a newer version and removed this one
+        os.remove(sitemap_files.section_file('pages', 'a' * 32))
+
+        response = self.serve('a' * 32, '<urlset>first</urlset>')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'<urlset>first</urlset>')
+
+    def test_gzip_is_sent_as_stored(self):
+        self.serve('a' * 32, '<urlset>first</urlset>')
+        request = RequestFactory().get('/sitemap-pages.xml', HTTP_ACCEPT_ENCODING='gzip')
+
+        response = sitemap_files.serve_file(request, 'pages', 'a' * 32, None, lambda: '')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), b'<urlset>first</urlset>')
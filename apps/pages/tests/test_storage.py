@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from apps.pages import storage
+from apps.posts.models import Category, Post
+from apps.posts.tests.utils import make_category, make_post, make_user
+
+CONTENT = b'not really a jpeg, only bytes to hash'
+
+
+class DedupeMediaTests(TestCase):
+    """dedupe_media keeps old names working as links to the new ones"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for name in ['categories/photo.jpg', 'uploads/photo-copy.jpg', 'uploads/photo-copy_thumb.jpg']:
+            self.write(name, CONTENT)
+        self.category = make_category()
+        Category.objects.filter(pk=self.category.pk).update(default_image='categories/photo.jpg')
+        self.post = make_post(
+            'Z obrazkiem', self.category, make_user(), content='<img src="/media/uploads/photo-copy.jpg">'
+        )
+        digest = storage.path_digest(self.path('categories/photo.jpg'))
+        self.new_name = storage.hashed_name('categories/photo.jpg', digest)
+
+    def path(self, name):
+        return os.path.join(self.media_root, name)
+
+    def write(self, name, content):
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        with open(self.path(name), 'wb') as media_file:
+            media_file.write(content)
+
+    def test_dry_run_changes_nothing(self):
+        stats = storage.dedupe_media(dry_run=True)
+
+        self.assertEqual((stats['files'], stats['duplicates']), (2, 1))
+        self.assertEqual(stats['bytes_reclaimed'], len(CONTENT))
+        self.assertFalse(os.path.exists(self.path(self.new_name)))
+
+    def test_old_names_are_kept_as_links(self):
+        storage.dedupe_media()
+
+        self.assertTrue(os.path.samefile(self.path('categories/photo.jpg'), self.path(self.new_name)))
+        self.assertTrue(os.path.samefile(self.path('uploads/photo-copy.jpg'), self.path(self.new_name)))
+        self.assertTrue(os.path.exists(self.path('uploads/photo-copy_thumb.jpg')))
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.default_image.name, self.new_name)
+        self.assertNotIn('photo-copy.jpg', Post.objects.get(pk=self.post.pk).content)
+
+    def test_second_run_finds_nothing_to_do(self):
+        storage.dedupe_media()
+
+        stats = storage.dedupe_media(dry_run=True)
+
+        self.assertEqual((stats['files'], stats['duplicates'], stats['bytes_reclaimed']), (0, 0, 0))
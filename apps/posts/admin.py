@@ -1,4 +1,14 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.decorators import method_decorator
+from django.utils.html import format_html
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from .gallery import MAX_GALLERY_IMAGES, bulk_upload, check_capacity
 from .models import Category, Tag, Post, GalleryImage
 
 
@@ -19,10 +29,38 @@ class TagAdmin(admin.ModelAdmin):
 class GalleryImageInline(admin.TabularInline):
     model = GalleryImage
     extra = 1
-    max_num = 12
+    max_num = MAX_GALLERY_IMAGES
     fields = ['image', 'caption', 'position']
     ordering = ['position']
 
+    def get_formset(self, request, obj=None, **kwargs):
+        # The cap is checked on the submitted forms, without a query per image
+        kwargs['validate_max'] = True
+        return super().get_formset(request, obj, **kwargs)
+
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """File field accepting many files, cleaned to a list"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput(attrs={'accept': 'image/*'}))
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        if isinstance(data, (list, tuple)):
+            if not data and self.required:
+                raise ValidationError(self.error_messages['required'], code='required')
+            return [super(MultipleFileField, self).clean(item, initial) for item in data]
+        return [super().clean(data, initial)]
+
+
+class GalleryUploadForm(forms.Form):
+    images = MultipleFileField(help_text=f"Maksymalnie {MAX_GALLERY_IMAGES} zdjęć w galerii")
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -31,13 +69,14 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ['title', 'excerpt', 'content']
     prepopulated_fields = {'slug': ('title',)}
     autocomplete_fields = ['category', 'author', 'tags']
+    readonly_fields = ['gallery_upload_link']
     
     fieldsets = (
         ('Podstawowe', {
             'fields': ('title', 'slug', 'category', 'author', 'published')
         }),
         ('Media', {
-            'fields': ('hero_image', 'hero_youtube_url')
+            'fields': ('hero_image', 'hero_youtube_url', 'gallery_upload_link')
         }),
         ('Treść', {
             'fields': ('excerpt', 'content')
@@ -59,9 +98,77 @@ class PostAdmin(admin.ModelAdmin):
         if not obj.author_id:
             obj.author = request.user
         super().save_model(request, obj, form, change)
+    
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/gallery-upload/',
+                self.admin_site.admin_view(self.gallery_upload_view),
+                name='posts_post_gallery_upload',
+            ),
+        ] + super().get_urls()
+    
+    @admin.display(description='Galeria')
+    def gallery_upload_link(self, obj):
+        if not obj.pk:
+            return 'Dostępne po zapisaniu postu'
+        url = reverse('admin:posts_post_gallery_upload', args=[obj.pk])
+        return format_html('<a href="{}">Dodaj wiele zdjęć naraz</a>', url)
+    
+    @csrf_exempt
+    def gallery_upload_view(self, request, object_id):
+        """
+        Bulk gallery upload (apps/posts/gallery.py). Files are streamed
+        to temporary files instead of memory, CSRF is checked after the
+        upload handlers are set.
+        """
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return self._gallery_upload_view(request, object_id)
+    
+    @method_decorator(csrf_protect)
+    def _gallery_upload_view(self, request, object_id):
+        post = get_object_or_404(Post.objects.select_related('category'), pk=object_id)
+        if not self.has_change_permission(request, post):
+            raise PermissionDenied
+
+        form = GalleryUploadForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            try:
+                images = bulk_upload(post, form.cleaned_data['images'])
+            except ValidationError as error:
+                for message in error.messages:
+                    form.add_error('images', message)
+            else:
+                self.message_user(request, f'Dodano {len(images)} zdjęć do galerii', messages.SUCCESS)
+                return redirect('admin:posts_post_change', post.pk)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Galeria: {post.title}',
+            'opts': self.model._meta,
+            'original': post,
+            'form': form,
+            'max_images': MAX_GALLERY_IMAGES,
+        }
+        return TemplateResponse(request, 'admin/posts/post/gallery_upload.html', context)
+
+
+class GalleryImageAdminForm(forms.ModelForm):
+    class Meta:
+        model = GalleryImage
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        post = cleaned_data.get('post')
+        if post and (not self.instance.pk or self.instance.post_id != post.pk):
+            check_capacity(post, 1)
+        return cleaned_data
+
 
 @admin.register(GalleryImage)
 class GalleryImageAdmin(admin.ModelAdmin):
+    form = GalleryImageAdminForm
     list_display = ['post', 'caption', 'position', 'uploaded_at']
     list_filter = ['post__category', 'uploaded_at']
     search_fields = ['post__title', 'caption']
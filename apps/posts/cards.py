@@ -0,0 +1,101 @@
+"""
+PostCard read model.
+
+Every published post has one PostCard row with everything a listing card
+shows: URL, category, author, resolved hero / thumbnail images and tags
+as arrays. Listings (home page, category pages, category and tag API
+lists) read cards with one indexed query - no joins, no tag prefetch.
+
+Cards are refreshed on writes by signals.py: post saves and tag changes
+rebuild the post's card, category and tag edits rebuild the cards showing
+them, author edits update the author columns. Rebuilds are collected per
+transaction and run once on commit. Unpublished posts have no card. Full
+rebuild: python manage.py rebuild_post_cards
+"""
+from django.db import transaction
+
+from .models import Post, PostCard
+
+CARD_FIELDS = [
+    field.name for field in PostCard._meta.concrete_fields if not field.primary_key
+]
+
+AUTHOR_FIELDS = ['username', 'first_name', 'last_name', 'email']
+
+BATCH_SIZE = 500
+
+
+def _file_url(file):
+    return file.url if file else ''
+
+
+def build_card(post):
+    """Unsaved PostCard of a post (category, author and tags loaded)"""
+    hero_media = post.get_hero_media() or {}
+    category_image_url = _file_url(post.category.default_image)
+    tags = sorted(post.tags.all(), key=lambda tag: tag.name)
+    return PostCard(
+        post=post,
+        title=post.title,
+        slug=post.slug,
+        url=post.get_url(),
+        excerpt=post.excerpt,
+        created_at=post.created_at,
+        category=post.category,
+        category_name=post.category.name,
+        category_slug=post.category.slug,
+        category_image_url=category_image_url,
+        author=post.author,
+        **{f'author_{field}': getattr(post.author, field) for field in AUTHOR_FIELDS},
+        hero_image_url=_file_url(post.hero_image),
+        hero_media_type=hero_media.get('type', ''),
+        hero_media_url=hero_media.get('url', ''),
+        thumbnail_url=_file_url(post.hero_image) or category_image_url,
+        tag_ids=[tag.pk for tag in tags],
+        tag_names=[tag.name for tag in tags],
+        tag_slugs=[tag.slug for tag in tags],
+    )
+
+
+@transaction.atomic
+def refresh_cards(post_ids):
+    """Rebuild cards of the given posts, drop cards of unpublished or deleted ones"""
+    post_ids = set(post_ids)
+    if not post_ids:
+        return 0
+    posts = Post.objects.published().filter(pk__in=post_ids).select_related(
+        'category', 'author'
+    ).prefetch_related('tags')
+    cards = [build_card(post) for post in posts]
+
+    PostCard.objects.filter(pk__in=post_ids - {card.post_id for card in cards}).delete()
+    PostCard.objects.bulk_create(
+        cards, update_conflicts=True, unique_fields=['post'], update_fields=CARD_FIELDS
+    )
+    return len(cards)
+
+
+def category_post_ids(category):
+    """Posts whose cards show the category"""
+    return set(PostCard.objects.filter(category=category).values_list('pk', flat=True))
+
+
+def tag_post_ids(tag):
+    """Posts whose cards list the tag (by id - the tag may be renamed or deleted)"""
+    return set(PostCard.objects.filter(tag_ids__contains=[tag.pk]).values_list('pk', flat=True))
+
+
+def update_author(user):
+    """Copy changed author data to the user's cards (no-op UPDATE otherwise)"""
+    values = {f'author_{field}': getattr(user, field) for field in AUTHOR_FIELDS}
+    PostCard.objects.filter(author=user).exclude(**values).update(**values)
+
+
+def rebuild_all():
+    """Rebuild all cards (used by the rebuild_post_cards command)"""
+    post_ids = list(Post.objects.published().values_list('pk', flat=True))
+    with transaction.atomic():
+        PostCard.objects.exclude(pk__in=post_ids).delete()
+        for start in range(0, len(post_ids), BATCH_SIZE):
+            refresh_cards(post_ids[start:start + BATCH_SIZE])
+    return len(post_ids)
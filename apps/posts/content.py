@@ -0,0 +1,342 @@
+"""
+Save-time rendering of post content.
+
+CKEditor content is compiled once per content revision, when the post is
+saved (Post.save). The artefacts are stored on the post and read as is by
+the post page and the API:
+
+- rendered_content - sanitized HTML: tags, attributes and URL schemes
+  outside the allow lists are removed (scripts, event handlers,
+  javascript: links, iframes from hosts other than POST_CONTENT_IFRAME_HOSTS),
+  unclosed tags are closed; h2-h4 headings get id anchors
+- content_toc - [{'level', 'id', 'title'}] of h2 and h3 headings
+- content_text - plain text (full-text search vector)
+- word_count - words of the plain text (reading time, article schema)
+
+Images from MEDIA_URL become <picture> with AVIF/WebP srcsets of their
+renditions (apps.pages.images) and get width/height of the original (or
+scaled to the width set in the editor), so the browser reserves their
+space before they load. Every image gets loading="lazy" and
+decoding="async".
+
+content_hash is a hash of the content and PIPELINE_VERSION - a post is
+rendered again only when it changes. After bumping PIPELINE_VERSION run
+`python manage.py render_post_content`, after changing
+IMAGE_RENDITION_WIDTHS/FORMATS add --force.
+"""
+import hashlib
+import math
+import re
+from collections import namedtuple
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.forms.utils import flatatt
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.text import slugify
+
+from apps.pages import images
+from . import search
+
+# Bump when the output of the pipeline changes
+PIPELINE_VERSION = 1
+
+WORDS_PER_MINUTE = 200
+
+# Post fields written by render_post()
+RENDERED_FIELDS = ('content_hash', 'rendered_content', 'content_toc', 'content_text', 'word_count')
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'cite', 'code', 'col', 'colgroup',
+    'dd', 'del', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'iframe', 'img', 'ins', 'kbd',
+    'li', 'mark', 'ol', 'p', 'picture', 'pre', 'q', 's', 'small', 'source', 'span',
+    'strike', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+    'tr', 'u', 'ul',
+}
+# Removed together with their content
+DROPPED_TAGS = {'script', 'style', 'template', 'object', 'embed', 'form', 'textarea', 'select', 'noscript'}
+VOID_TAGS = {'br', 'col', 'hr', 'img', 'source'}
+# Separate words in the plain text
+BLOCK_TAGS = {
+    'blockquote', 'br', 'caption', 'dd', 'div', 'dt', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'p', 'pre', 'td', 'th', 'tr',
+}
+# Start of these closes an open <p> (as in browsers)
+CLOSES_PARAGRAPH = {
+    'blockquote', 'div', 'dl', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'hr', 'ol', 'p', 'pre', 'table', 'ul',
+}
+ANCHORED_HEADINGS = {'h2', 'h3', 'h4'}
+TOC_HEADINGS = {'h2', 'h3'}
+
+GLOBAL_ATTRIBUTES = {'class', 'id', 'style', 'title', 'lang', 'dir'}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'target', 'rel', 'name'},
+    'blockquote': {'cite'},
+    'col': {'span'},
+    'iframe': {'src', 'width', 'height', 'allow', 'allowfullscreen', 'frameborder'},
+    'img': {'src', 'alt', 'width', 'height', 'loading', 'decoding'},
+    'ol': {'start', 'type'},
+    'q': {'cite'},
+    'source': {'srcset', 'sizes', 'type', 'media'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+URL_ATTRIBUTES = {'href', 'src', 'cite'}
+URL_SCHEMES = {'', 'http', 'https', 'mailto', 'tel'}
+UNSAFE_STYLE = re.compile(r'expression\s*\(|javascript:|url\s*\(|behavior\s*:', re.IGNORECASE)
+
+STYLE_SIZE = re.compile(r'(?:^|;)\s*(width|height)\s*:\s*(\d+(?:\.\d+)?)px', re.IGNORECASE)
+WORD = re.compile(r"\w[\w'’-]*")
+
+RenderedContent = namedtuple('RenderedContent', ['html', 'toc', 'text', 'word_count', 'image_names'])
+
+
+def get_content_image_sizes():
+    return getattr(settings, 'POST_CONTENT_IMAGE_SIZES', '(min-width: 1024px) 896px, 100vw')
+
+
+def get_iframe_hosts():
+    return getattr(settings, 'POST_CONTENT_IFRAME_HOSTS', [
+        'www.youtube.com', 'youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com',
+    ])
+
+
+def content_hash(html):
+    """Hash of a content revision rendered by the current pipeline"""
+    return hashlib.sha256(f'{PIPELINE_VERSION}:{html or ""}'.encode()).hexdigest()
+
+
+def reading_time(word_count):
+    """Minutes needed to read given number of words"""
+    return max(1, math.ceil(word_count / WORDS_PER_MINUTE))
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def display_size(attrs):
+    """(width, height) set on the tag in the editor (attributes or inline style px)"""
+    size = {name.lower(): _int(value) for name, value in STYLE_SIZE.findall(attrs.get('style') or '')}
+    width = _int(attrs.get('width')) or size.get('width')
+    height = _int(attrs.get('height')) or size.get('height')
+    return width, height
+
+
+def rewrite_image(attrs):
+    """Markup of a single <img> with given (sanitized) attributes"""
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    name = images.media_name(attrs.get('src'))
+    info = images.get_image_info(name) if name else None
+    if not info:
+        return format_html('<img{}>', flatatt(attrs))
+
+    width, height = display_size(attrs)
+    if width and not height:
+        height = round(info.height * width / info.width)
+    elif height and not width:
+        width = round(info.width * height / info.height)
+    attrs['width'], attrs['height'] = (width, height) if width else (info.width, info.height)
+
+    sizes = get_content_image_sizes()
+    if width and width < info.width:
+        sizes = f'(max-width: {width}px) 100vw, {width}px'
+    return images.picture(info, attrs, sizes)
+
+
+def is_safe_url(value):
+    """Relative URL or one of URL_SCHEMES (no javascript:, data: etc.)"""
+    # Browsers ignore control characters and whitespace inside the scheme
+    value = re.sub(r'[\x00-\x20]', '', value or '')
+    try:
+        return urlsplit(value).scheme.lower() in URL_SCHEMES
+    except ValueError:
+        return False
+
+
+def clean_attributes(tag, attrs):
+    """Allowed attributes of a tag, None when the whole tag must go"""
+    allowed = GLOBAL_ATTRIBUTES | ALLOWED_ATTRIBUTES.get(tag, set())
+    cleaned = {}
+    for name, value in attrs:
+        value = value or ''
+        if name not in allowed or name in cleaned:
+            continue
+        if name in URL_ATTRIBUTES and not is_safe_url(value):
+            continue
+        if name == 'style' and UNSAFE_STYLE.search(value):
+            continue
+        cleaned[name] = value
+
+    if tag == 'iframe':
+        src = urlsplit(cleaned.get('src', ''))
+        if src.scheme != 'https' or src.hostname not in get_iframe_hosts():
+            return None
+    if tag == 'a' and cleaned.get('target') == '_blank':
+        cleaned['rel'] = ' '.join(sorted(set(cleaned.get('rel', '').split()) | {'noopener', 'noreferrer'}))
+    return cleaned
+
+
+class ContentRenderer(HTMLParser):
+    """
+    Single pass over the content: sanitizes tags, rewrites <img>, anchors
+    headings and collects TOC, plain text and media image names
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.text = []
+        self.toc = []
+        self.image_names = []
+        self.open_tags = []
+        self.dropping = []
+        self.heading = None
+        self.anchors = set()
+
+    def handle_starttag(self, tag, attrs):
+        if self.dropping or tag in DROPPED_TAGS:
+            if tag not in VOID_TAGS:
+                self.dropping.append(tag)
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+        attrs = clean_attributes(tag, attrs)
+        if attrs is None:
+            self.dropping.append(tag)
+            return
+
+        if tag in CLOSES_PARAGRAPH and 'p' in self.open_tags:
+            self.handle_endtag('p')
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+        if tag == 'img' and 'picture' not in self.open_tags:
+            self.handle_image(attrs)
+        elif tag in ANCHORED_HEADINGS and self.heading is None:
+            # The start tag is written at the end tag, when the heading text is known
+            self.heading = (tag, attrs, len(self.parts), len(self.text))
+            self.parts.append('')
+        else:
+            self.parts.append(format_html('<{}{}>', tag, flatatt(attrs)))
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            if tag == self.dropping[-1]:
+                self.dropping.pop()
+            return
+        if tag not in self.open_tags:
+            return
+        # Close tags left open inside
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.close_tag(open_tag)
+            if open_tag == tag:
+                break
+
+    def close_tag(self, tag):
+        if self.heading and self.heading[0] == tag:
+            self.close_heading()
+        self.parts.append(f'</{tag}>')
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+
+    def close_heading(self):
+        tag, attrs, part_index, text_index = self.heading
+        self.heading = None
+        title = ' '.join(''.join(self.text[text_index:]).split())
+        anchor = attrs.get('id') or slugify(title, allow_unicode=True) or 'sekcja'
+        unique_anchor, number = anchor, 1
+        while unique_anchor in self.anchors:
+            number += 1
+            unique_anchor = f'{anchor}-{number}'
+        self.anchors.add(unique_anchor)
+        attrs['id'] = unique_anchor
+        self.parts[part_index] = format_html('<{}{}>', tag, flatatt(attrs))
+        if tag in TOC_HEADINGS and title:
+            self.toc.append({'level': int(tag[1]), 'id': unique_anchor, 'title': title})
+
+    def handle_image(self, attrs):
+        name = images.media_name(attrs.get('src'))
+        if name:
+            self.image_names.append(name)
+        self.parts.append(rewrite_image(attrs))
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.parts.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.close_tag(self.open_tags.pop())
+
+
+def render(html):
+    """RenderedContent of post content HTML"""
+    renderer = ContentRenderer()
+    renderer.feed(html or '')
+    renderer.close()
+    lines = (' '.join(line.split()) for line in ''.join(renderer.text).splitlines())
+    text = '\n'.join(line for line in lines if line)
+    return RenderedContent(
+        ''.join(renderer.parts), renderer.toc, text, len(WORD.findall(text)), renderer.image_names
+    )
+
+
+def render_post(post, force=False):
+    """
+    Render post.content into RENDERED_FIELDS unless they already hold
+    the current revision; returns whether the post was rendered. Media
+    images of a rendered post are left in post._content_image_names
+    (apps.pages.signals encodes their renditions).
+    """
+    revision = content_hash(post.content)
+    if not force and revision == post.content_hash:
+        return False
+    rendered = render(post.content)
+    post.content_hash = revision
+    post.rendered_content = rendered.html
+    post.content_toc = rendered.toc
+    post.content_text = rendered.text
+    post.word_count = rendered.word_count
+    post._content_image_names = rendered.image_names
+    return True
+
+
+def render_all(posts, force=False, batch_size=200):
+    """
+    Render content of given posts, returns the number of changed posts.
+    bulk_update sends no signals - search_vector (built from content_text)
+    and updated_at (sitemap lastmod, static export) are set here.
+    """
+    now = timezone.now()
+    changed = []
+    queryset = posts.only('pk', 'title', 'excerpt', 'content', *RENDERED_FIELDS)
+    for post in queryset.iterator(chunk_size=batch_size):
+        previous = [getattr(post, field) for field in RENDERED_FIELDS]
+        if render_post(post, force) and [getattr(post, field) for field in RENDERED_FIELDS] != previous:
+            post.search_vector = search.build_search_vector(post.title, post.excerpt, post.content_text)
+            post.updated_at = now
+            changed.append(post)
+    posts.model.objects.bulk_update(
+        changed, [*RENDERED_FIELDS, 'search_vector', 'updated_at'], batch_size=batch_size
+    )
+    return len(changed)
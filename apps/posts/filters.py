@@ -0,0 +1,20 @@
+from rest_framework import filters
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by the Post.search_vector GIN index instead of ILIKE
+    over search_fields. Results are ordered by rank unless ?ordering= is given,
+    so this backend must come after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+
+        results = queryset.search(query)
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            # Keep ordering applied by OrderingFilter
+            return results.order_by(*queryset.query.order_by)
+        return results
@@ -0,0 +1,104 @@
+"""
+Post gallery uploads.
+
+Gallery files are named by a hash of their content
+(gallery/<post-slug>/<sha256[:32]>.<ext>, the name
+ContentAddressedStorage gives them), so images of one batch never
+collide and a file uploaded twice to a post is stored once.
+
+bulk_upload() adds many images to a post at once: the MAX_GALLERY_IMAGES
+cap is checked with one query, files go to storage one by one (the admin
+upload view receives them with TemporaryFileUploadHandler, so they are
+moved from temporary files and never held in memory) and the rows are
+inserted with one query. The insert checks the cap again with the post
+row locked, so concurrent uploads cannot overfill a gallery. The gallery_images_added signal hands the new
+images to apps.pages (page cache, renditions encoded by the background
+pool of apps.pages.images).
+"""
+import hashlib
+import os
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.dispatch import Signal
+from apps.pages.storage import NAME_HASH_LENGTH
+
+MAX_GALLERY_IMAGES = 12
+
+# Sent after bulk_upload() with post and gallery_images (bulk_create sends no post_save)
+gallery_images_added = Signal()
+
+
+def file_digest(file):
+    """sha256 of an uploaded file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(post_slug, file, filename=None):
+    """Storage name of a gallery image with its content hash"""
+    ext = os.path.splitext(filename or file.name)[1].lower()
+    return f'gallery/{post_slug}/{file_digest(file)[:NAME_HASH_LENGTH]}{ext}'
+
+
+def check_capacity(post, adding, stats=None):
+    """
+    Raise ValidationError when the gallery cannot take `adding` more
+    images, returns the next free position
+    """
+    from .models import GalleryImage
+
+    stats = stats or GalleryImage.objects.stats_for_post(post)
+    if stats['count'] + adding > MAX_GALLERY_IMAGES:
+        raise ValidationError(
+            f"Post can have a maximum of {MAX_GALLERY_IMAGES} images in gallery "
+            f"({stats['count']} already added)"
+        )
+    return 0 if stats['last_position'] is None else stats['last_position'] + 1
+
+
+def validate_images(files):
+    """Raise ValidationError listing files which are not valid images"""
+    field = forms.ImageField()
+    errors = []
+    for file in files:
+        try:
+            field.clean(file)
+        except ValidationError as error:
+            errors.extend(f'{file.name}: {message}' for message in error.messages)
+    if errors:
+        raise ValidationError(errors)
+
+
+def bulk_upload(post, files):
+    """Add uploaded image files to the gallery of a post, returns created images"""
+    from .models import GalleryImage, Post
+
+    if not files:
+        return []
+    # Fail early, before the files are stored
+    check_capacity(post, len(files))
+    validate_images(files)
+
+    names = []
+    for file in files:
+        name = hashed_name(post.slug, file)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, file)
+        names.append(name)
+
+    with transaction.atomic():
+        # Concurrent uploads to the post wait here and see each other's rows
+        Post.objects.select_for_update().only('pk').get(pk=post.pk)
+        position = check_capacity(post, len(files))
+        images = GalleryImage.objects.bulk_create([
+            GalleryImage(post=post, image=name, position=position + offset)
+            for offset, name in enumerate(names)
+        ])
+        gallery_images_added.send(sender=GalleryImage, post=post, gallery_images=images)
+    return images
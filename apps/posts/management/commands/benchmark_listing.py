@@ -0,0 +1,120 @@
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from apps.posts.models import Category, Post
+
+# Post card attributes read by listing templates and PostListSerializer
+CARD_ATTRIBUTES = [
+    'title', 'slug', 'created_at', 'excerpt', 'hero_image', 'hero_youtube_url',
+    'category.name', 'category.slug', 'author.username', 'author.first_name',
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark post listing querysets with and without for_listing() on a synthetic '
+        'corpus of long posts (created in a transaction that is rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000, help='Synthetic corpus size')
+        parser.add_argument('--content-size', type=int, default=20_000, help='Characters of content per post')
+        parser.add_argument('--page-size', type=int, default=24, help='Posts per listing page')
+        parser.add_argument('--pages', type=int, default=200, help='Number of listing pages to load')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail unless a for_listing() page is one query and its peak memory is at most --max-memory-ratio of select_related'
+        )
+        parser.add_argument('--max-memory-ratio', type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.create_corpus(options['posts'], options['content_size'])
+                results = self.run(options['page_size'], options['pages'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options['check']:
+            self.check_results(results, options['max_memory_ratio'])
+
+    def create_corpus(self, count, content_size):
+        started = time.perf_counter()
+        category = Category.objects.create(name='Benchmark listing', slug='benchmark-listing')
+        author = User.objects.create(username='benchmark-listing')
+        paragraph = '<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>'
+        content = (paragraph * (content_size // len(paragraph) + 1))[:content_size]
+        Post.objects.bulk_create([
+            Post(
+                title=f'Benchmark post {number}',
+                slug=f'benchmark-listing-{number}',
+                excerpt='Short excerpt of the post for the listing card.',
+                content=content,
+                published=True,
+                category=category,
+                author=author,
+            )
+            for number in range(count)
+        ], batch_size=500)
+        self.stdout.write(f'Created {count} posts in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+    def run(self, page_size, pages):
+        """{name: (queries per rendered page, peak bytes of loading all posts)}"""
+        results = {}
+        querysets = [
+            ('select_related', Post.objects.published().select_related('category', 'author')),
+            ('for_listing', Post.objects.published().for_listing()),
+        ]
+        for name, queryset in querysets:
+            queryset = queryset.order_by('-created_at', '-id')
+
+            started = time.perf_counter()
+            list(queryset.all())
+            full_ms = (time.perf_counter() - started) * 1000
+
+            tracemalloc.start()
+            posts = list(queryset.all())
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del posts
+
+            started = time.perf_counter()
+            for number in range(pages):
+                offset = number * page_size
+                list(queryset.all()[offset:offset + page_size])
+            page_ms = (time.perf_counter() - started) * 1000 / pages
+
+            with CaptureQueriesContext(connection) as queries:
+                for post in queryset.all()[:page_size]:
+                    for attribute in CARD_ATTRIBUTES:
+                        value = post
+                        for part in attribute.split('.'):
+                            value = getattr(value, part)
+            results[name] = (len(queries), peak)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{name:>15}: all posts {full_ms:.0f} ms, peak {peak / 1024 / 1024:.1f} MB; '
+                f'page of {page_size} {page_ms:.2f} ms, {len(queries)} queries per rendered page'
+            ))
+        return results
+
+    def check_results(self, results, max_memory_ratio):
+        queries, peak = results['for_listing']
+        baseline_peak = results['select_related'][1]
+        if queries != 1:
+            raise CommandError(f'for_listing() page of cards ran {queries} queries, expected 1')
+        if peak > baseline_peak * max_memory_ratio:
+            raise CommandError(
+                f'for_listing() peak {peak} B is above {max_memory_ratio:.0%} of select_related ({baseline_peak} B)'
+            )
+        self.stdout.write(self.style.SUCCESS('✓ Listing check passed'))
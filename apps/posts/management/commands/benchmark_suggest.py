@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from apps.posts.suggest import PrefixIndex
+
+
+SYLLABLES = [
+    'mo', 'zg', 'ud', 'ar', 'ne', 'uro', 'lo', 'gia', 'cho', 'ro', 'ba', 'par', 'kin',
+    'son', 'stwar', 'dnie', 'nie', 'roz', 'sia', 'ne', 'de', 'men', 'cja', 'pa', 'mięć',
+    'gło', 'wa', 'ból', 'le', 'cze', 'nie', 'te', 'ra', 'pia', 'ża', 'łó', 'dź',
+]
+
+
+def random_word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark suggestion prefix index lookups on a synthetic corpus (no database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100_000, help='Synthetic corpus size')
+        parser.add_argument('--lookups', type=int, default=50_000, help='Number of lookups')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        titles = [
+            ' '.join(random_word(rng) for _ in range(rng.randint(3, 8)))
+            for _ in range(options['titles'])
+        ]
+
+        index = PrefixIndex()
+        started = time.perf_counter()
+        index.load(
+            (('post', number), {'type': 'post', 'label': title, 'url': f'/bench/{number}'})
+            for number, title in enumerate(titles)
+        )
+        build_time = time.perf_counter() - started
+        self.stdout.write(f'Built index of {len(index)} titles in {build_time * 1000:.0f} ms')
+
+        # Single words, words of one title (last one incomplete) and words
+        # matching labels separately but never together
+        queries = {'single word': [], 'multi word': [], 'no match': []}
+        for _ in range(options['lookups']):
+            words = rng.choice(titles).split()
+            word = rng.choice(words)
+            queries['single word'].append(word[:rng.randint(1, len(word))])
+            picked = rng.sample(words, min(len(words), rng.randint(2, 3)))
+            picked[-1] = picked[-1][:rng.randint(1, len(picked[-1]))]
+            queries['multi word'].append(' '.join(picked))
+            queries['no match'].append(f"{'z' * rng.randint(3, 6)} {rng.choice(SYLLABLES)[0]}")
+
+        for kind, prefixes in queries.items():
+            timings = []
+            started = time.perf_counter()
+            for prefix in prefixes:
+                lookup_started = time.perf_counter()
+                index.lookup(prefix, 10)
+                timings.append(time.perf_counter() - lookup_started)
+            total = time.perf_counter() - started
+
+            timings.sort()
+            p50 = timings[len(timings) // 2] * 1000
+            p99 = timings[int(len(timings) * 0.99)] * 1000
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind:<12} {len(prefixes) / total:,.0f} lookups/s  p50 {p50:.3f} ms  p99 {p99:.3f} ms'
+            ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from apps.posts import cards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild PostCard listing rows for all published posts'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding post cards...')
+        count = cards.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'✓ Cards rebuilt for {count} posts'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from apps.posts import related
+
+
+class Command(BaseCommand):
+    help = 'Rebuild precomputed related posts index for all published posts'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding related posts index...')
+        count = related.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'✓ Related posts rebuilt for {count} posts'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.pages import page_cache
+from apps.posts import content
+from apps.posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Render stored post content (sanitized HTML, TOC, plain text, word count) of outdated posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Render all posts, e.g. after changing image rendition settings'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rendering post content...')
+        count = content.render_all(Post.objects.all(), force=options['force'])
+        if count:
+            page_cache.purge_all()
+        self.stdout.write(self.style.SUCCESS(f'✓ Content rendered for {count} posts'))
@@ -1,5 +1,16 @@
+from django.contrib.postgres.search import SearchHeadline, SearchRank
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, F, Max, Q
+from .search import EscapeHTML, fuzzy_filter, get_search_config, make_search_query
+
+# Columns read by post cards (listing templates, PostListSerializer, sitemap).
+# content, SEO fields and search_vector are left out.
+LISTING_FIELDS = (
+    'title', 'slug', 'created_at', 'updated_at', 'published',
+    'hero_image', 'hero_youtube_url', 'excerpt',
+    'category__name', 'category__slug', 'category__default_image',
+    'author__username', 'author__first_name', 'author__last_name', 'author__email',
+)
 
 
 class CategoryQuerySet(models.QuerySet):
@@ -34,6 +45,10 @@ class TagQuerySet(models.QuerySet):
     def popular(self, limit=10):
         """Return most popular tags by post count"""
         return self.with_post_count().order_by('-post_count')[:limit]
+    
+    def fuzzy(self, query):
+        """Typo and diacritics tolerant name match (trigram index)"""
+        return fuzzy_filter(self, query, ['name'])
 
 
 class TagManager(models.Manager):
@@ -47,6 +62,9 @@ class TagManager(models.Manager):
     
     def popular(self, limit=10):
         return self.get_queryset().popular(limit)
+    
+    def fuzzy(self, query):
+        return self.get_queryset().fuzzy(query)
 
 
 class PostQuerySet(models.QuerySet):
@@ -60,6 +78,10 @@ class PostQuerySet(models.QuerySet):
         """Optimize query with select_related and prefetch_related"""
         return self.select_related('category', 'author').prefetch_related('tags')
     
+    def for_listing(self):
+        """Only the columns post cards use, with category and author joined"""
+        return self.select_related('category', 'author').only(*LISTING_FIELDS)
+    
     def by_category(self, category_slug):
         """Filter posts by category slug"""
         return self.filter(category__slug=category_slug)
@@ -69,17 +91,31 @@ class PostQuerySet(models.QuerySet):
         return self.filter(tags__slug=tag_slug)
     
     def search(self, query):
-        """Search posts by title or content"""
-        return self.filter(
-            Q(title__icontains=query) | Q(content__icontains=query)
-        )
+        """Full-text search ranked with ts_rank (title matches weigh most)"""
+        search_query = make_search_query(query)
+        return self.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-created_at')
     
     def search_title_first(self, query):
-        """Search by title first, then by content if no results"""
-        title_results = self.filter(title__icontains=query)
-        if title_results.exists():
-            return title_results
-        return self.filter(content__icontains=query)
+        """Full-text search - title matches rank first (weight A), then content"""
+        return self.search(query)
+    
+    def fuzzy(self, query):
+        """Typo and diacritics tolerant title match (trigram index)"""
+        return fuzzy_filter(self, query, ['title'])
+    
+    def with_headline(self, query):
+        """Annotate search results with highlighted excerpt snippet (escaped HTML)"""
+        return self.annotate(
+            headline=SearchHeadline(
+                EscapeHTML('excerpt'),
+                make_search_query(query),
+                config=get_search_config(),
+                start_sel='<mark>',
+                stop_sel='</mark>',
+            )
+        )
     
     def by_tags_list(self, tag_slugs):
         """Filter posts that have any of the specified tags"""
@@ -88,6 +124,12 @@ class PostQuerySet(models.QuerySet):
     def featured(self, limit=6):
         """Return featured posts (most recent published)"""
         return self.published().order_by('-created_at')[:limit]
+    
+    def related_to(self, post):
+        """Return precomputed related posts of a post (see apps.posts.related)"""
+        return self.filter(
+            related_to__post=post, published=True
+        ).order_by('related_to__position')
 
 
 class PostManager(models.Manager):
@@ -102,6 +144,9 @@ class PostManager(models.Manager):
     def with_relations(self):
         return self.get_queryset().with_relations()
     
+    def for_listing(self):
+        return self.get_queryset().for_listing()
+    
     def by_category(self, category_slug):
         return self.get_queryset().by_category(category_slug)
     
@@ -114,11 +159,17 @@ class PostManager(models.Manager):
     def search_title_first(self, query):
         return self.get_queryset().search_title_first(query)
     
+    def fuzzy(self, query):
+        return self.get_queryset().fuzzy(query)
+    
     def by_tags_list(self, tag_slugs):
         return self.get_queryset().by_tags_list(tag_slugs)
     
     def featured(self, limit=6):
         return self.get_queryset().featured(limit)
+    
+    def related_to(self, post):
+        return self.get_queryset().related_to(post)
 
 
 class GalleryImageQuerySet(models.QuerySet):
@@ -131,6 +182,10 @@ class GalleryImageQuerySet(models.QuerySet):
     def ordered(self):
         """Return gallery images ordered by position"""
         return self.order_by('position', 'uploaded_at')
+    
+    def stats_for_post(self, post):
+        """{'count', 'last_position'} of a post gallery in one query"""
+        return self.filter(post=post).aggregate(count=Count('pk'), last_position=Max('position'))
 
 
 class GalleryImageManager(models.Manager):
@@ -142,5 +197,32 @@ class GalleryImageManager(models.Manager):
     def for_post(self, post):
         return self.get_queryset().for_post(post)
     
+    def stats_for_post(self, post):
+        return self.get_queryset().stats_for_post(post)
+    
     def ordered(self):
         return self.get_queryset().ordered()
+
+
+class PostCardQuerySet(models.QuerySet):
+    """QuerySet for PostCard read model (published posts only)"""
+    
+    def by_category(self, category_slug):
+        return self.filter(category_slug=category_slug)
+    
+    def by_tag(self, tag_slug):
+        """Cards with given tag (GIN index on tag_slugs)"""
+        return self.filter(tag_slugs__contains=[tag_slug])
+
+
+class PostCardManager(models.Manager):
+    """Manager for PostCard model"""
+    
+    def get_queryset(self):
+        return PostCardQuerySet(self.model, using=self._db)
+    
+    def by_category(self, category_slug):
+        return self.get_queryset().by_category(category_slug)
+    
+    def by_tag(self, tag_slug):
+        return self.get_queryset().by_tag(tag_slug)
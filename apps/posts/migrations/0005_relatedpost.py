@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_meta_description_post_meta_keywords_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(default=0, help_text='Relevance score (shared tags, same category)')),
+                ('position', models.PositiveIntegerField(default=0, help_text='Display order')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='posts.post')),
+                ('related_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to', to='posts.post')),
+            ],
+            options={
+                'verbose_name': 'Powiązany post',
+                'verbose_name_plural': 'Powiązane posty',
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['post', 'position'], name='posts_relat_post_id_b98a15_idx')],
+                'unique_together': {('post', 'related_post')},
+            },
+        ),
+    ]
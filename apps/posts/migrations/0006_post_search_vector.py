@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:44
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Polish text search configuration: a copy of "simple" that switches to an
+# ispell dictionary when polish.dict/polish.affix are installed on the server
+CREATE_POLISH_CONFIG = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'polish') THEN
+        CREATE TEXT SEARCH CONFIGURATION polish (COPY = pg_catalog.simple);
+    END IF;
+    BEGIN
+        CREATE TEXT SEARCH DICTIONARY polish_ispell (
+            TEMPLATE = ispell, DictFile = polish, AffFile = polish, StopWords = polish
+        );
+        ALTER TEXT SEARCH CONFIGURATION polish
+            ALTER MAPPING FOR asciiword, asciihword, hword_asciipart, word, hword, hword_part
+            WITH polish_ispell, simple;
+    EXCEPTION WHEN OTHERS THEN
+        RAISE NOTICE 'Polish ispell dictionary not available, using simple parser';
+    END;
+END
+$$;
+"""
+
+DROP_POLISH_CONFIG = """
+DROP TEXT SEARCH CONFIGURATION IF EXISTS polish;
+DROP TEXT SEARCH DICTIONARY IF EXISTS polish_ispell;
+"""
+
+
+def fill_search_vectors(apps, schema_editor):
+    from apps.posts.search import build_search_vector
+    
+    Post = apps.get_model('posts', 'Post')
+    for post in Post.objects.only('title', 'excerpt', 'content').iterator():
+        Post.objects.filter(pk=post.pk).update(
+            search_vector=build_search_vector(post.title, post.excerpt, post.content)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_relatedpost'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_POLISH_CONFIG, DROP_POLISH_CONFIG),
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='posts_post_search__e0bb56_gin'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+import apps.posts.search
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+
+# unaccent() is only STABLE, an immutable wrapper is needed for expression indexes
+CREATE_UNACCENT_LOWER = """
+CREATE OR REPLACE FUNCTION unaccent_lower(text) RETURNS text AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+"""
+
+DROP_UNACCENT_LOWER = "DROP FUNCTION IF EXISTS unaccent_lower(text);"
+
+# Without the ispell dictionary unaccent the tokens, so "mozg" matches "mózg".
+# ispell needs the original diacritics for stemming, so it is left untouched.
+UNACCENT_POLISH_CONFIG = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_dict WHERE dictname = 'polish_ispell') THEN
+        ALTER TEXT SEARCH CONFIGURATION polish
+            ALTER MAPPING FOR asciiword, asciihword, hword_asciipart, word, hword, hword_part
+            WITH unaccent, simple;
+    END IF;
+END
+$$;
+"""
+
+
+def fill_search_vectors(apps, schema_editor):
+    from apps.posts.search import build_search_vector
+    
+    Post = apps.get_model('posts', 'Post')
+    for post in Post.objects.only('title', 'excerpt', 'content').iterator():
+        Post.objects.filter(pk=post.pk).update(
+            search_vector=build_search_vector(post.title, post.excerpt, post.content)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_UNACCENT_LOWER, DROP_UNACCENT_LOWER),
+        migrations.RunSQL(UNACCENT_POLISH_CONFIG, migrations.RunSQL.noop),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(apps.posts.search.UnaccentLower('title'), name='gin_trgm_ops'), name='posts_post_title_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(apps.posts.search.UnaccentLower('name'), name='gin_trgm_ops'), name='posts_tag_name_trgm'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:46
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_post_cards(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostCard = apps.get_model('posts', 'PostCard')
+
+    def file_url(file):
+        return file.url if file else ''
+
+    cards = []
+    for post in Post.objects.filter(published=True).select_related('category', 'author').prefetch_related('tags'):
+        category_image_url = file_url(post.category.default_image)
+        if post.hero_youtube_url:
+            hero_media = ('youtube', post.hero_youtube_url)
+        elif post.hero_image or category_image_url:
+            hero_media = ('image', file_url(post.hero_image) or category_image_url)
+        else:
+            hero_media = ('', '')
+        tags = sorted(post.tags.all(), key=lambda tag: tag.name)
+        cards.append(PostCard(
+            post=post,
+            title=post.title,
+            slug=post.slug,
+            url=f'/{post.category.slug}/{post.slug}',
+            excerpt=post.excerpt,
+            created_at=post.created_at,
+            category=post.category,
+            category_name=post.category.name,
+            category_slug=post.category.slug,
+            category_image_url=category_image_url,
+            author=post.author,
+            author_username=post.author.username,
+            author_first_name=post.author.first_name,
+            author_last_name=post.author.last_name,
+            author_email=post.author.email,
+            hero_image_url=file_url(post.hero_image),
+            hero_media_type=hero_media[0],
+            hero_media_url=hero_media[1],
+            thumbnail_url=file_url(post.hero_image) or category_image_url,
+            tag_ids=[tag.pk for tag in tags],
+            tag_names=[tag.name for tag in tags],
+            tag_slugs=[tag.slug for tag in tags],
+        ))
+    PostCard.objects.bulk_create(cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCard',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='posts.post')),
+                ('title', models.CharField(max_length=300)),
+                ('slug', models.SlugField(max_length=300)),
+                ('url', models.CharField(max_length=700)),
+                ('excerpt', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('category_name', models.CharField(max_length=200)),
+                ('category_slug', models.SlugField(max_length=200)),
+                ('category_image_url', models.CharField(blank=True, max_length=500)),
+                ('author_username', models.CharField(max_length=150)),
+                ('author_first_name', models.CharField(blank=True, max_length=150)),
+                ('author_last_name', models.CharField(blank=True, max_length=150)),
+                ('author_email', models.CharField(blank=True, max_length=254)),
+                ('hero_image_url', models.CharField(blank=True, max_length=500)),
+                ('hero_media_type', models.CharField(blank=True, max_length=20)),
+                ('hero_media_url', models.CharField(blank=True, max_length=500)),
+                ('thumbnail_url', models.CharField(blank=True, help_text='Hero image or category default image', max_length=500)),
+                ('tag_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+                ('tag_names', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None)),
+                ('tag_slugs', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.category')),
+            ],
+            options={
+                'verbose_name': 'Karta postu',
+                'verbose_name_plural': 'Karty postów',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at', '-post'], name='posts_postc_created_f39d95_idx'), models.Index(fields=['category_slug', '-created_at'], name='posts_postc_categor_9cef33_idx'), django.contrib.postgres.indexes.GinIndex(fields=['tag_slugs'], name='posts_postc_tag_slu_b6edde_gin')],
+            },
+        ),
+        migrations.RunPython(fill_post_cards, migrations.RunPython.noop),
+    ]
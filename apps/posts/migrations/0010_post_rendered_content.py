@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+def render_contents(apps, schema_editor):
+    from apps.posts.content import render
+
+    Post = apps.get_model('posts', 'Post')
+    posts = list(Post.objects.only('pk', 'content'))
+    for post in posts:
+        post.rendered_content = render(post.content).html
+    Post.objects.bulk_update(posts, ['rendered_content'], batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_postcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='rendered_content',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_contents, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
 from ckeditor.fields import RichTextField
-from .managers import CategoryManager, TagManager, PostManager, GalleryImageManager
+from .managers import CategoryManager, TagManager, PostManager, GalleryImageManager, PostCardManager
+from . import content as content_pipeline
+from .search import UnaccentLower
 
 
 class Category(models.Model):
@@ -38,6 +43,9 @@ class Tag(models.Model):
         verbose_name = "Tag"
         verbose_name_plural = "Tagi"
         ordering = ['name']
+        indexes = [
+            GinIndex(OpClass(UnaccentLower('name'), name='gin_trgm_ops'), name='posts_tag_name_trgm'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -54,6 +62,7 @@ class Post(models.Model):
     title = models.CharField(max_length=300)
     slug = models.SlugField(max_length=300, unique=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
     published = models.BooleanField(default=False)
     
     # Data for listing and hero section (one image serves both purposes)
@@ -65,6 +74,12 @@ class Post(models.Model):
     
     # Content
     content = RichTextField()
+    # Artefacts of content rendered on save (apps.posts.content)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    rendered_content = models.TextField(blank=True, editable=False)
+    content_toc = models.JSONField(default=list, blank=True, editable=False)
+    content_text = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
     
     # SEO fields
     meta_description = models.TextField(
@@ -89,8 +104,14 @@ class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.PROTECT, related_name='posts')
     tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
     
+    # Full-text search (maintained by apps.posts.search on save)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     objects = PostManager()
     
+    # Source columns not read when showing a post (rendered artefacts are used)
+    RAW_CONTENT_FIELDS = ('content', 'content_text', 'search_vector')
+    
     class Meta:
         verbose_name = "Post"
         verbose_name_plural = "Posty"
@@ -99,11 +120,17 @@ class Post(models.Model):
             models.Index(fields=['slug']),
             models.Index(fields=['-created_at']),
             models.Index(fields=['published', '-created_at']),
+            GinIndex(fields=['search_vector']),
+            GinIndex(OpClass(UnaccentLower('title'), name='gin_trgm_ops'), name='posts_post_title_trgm'),
         ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get('update_fields')
+        if 'content' not in self.get_deferred_fields() and (update_fields is None or 'content' in update_fields):
+            if content_pipeline.render_post(self) and update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *content_pipeline.RENDERED_FIELDS}
         super().save(*args, **kwargs)
     
     def get_hero_media(self):
@@ -129,6 +156,11 @@ class Post(models.Model):
         """Full absolute URL for the post"""
         return f"https://fchm.pl{self.get_url()}"  # Change domain as needed
     
+    @property
+    def reading_time(self):
+        """Reading time in minutes"""
+        return content_pipeline.reading_time(self.word_count)
+    
     def get_meta_description(self):
         """Returns meta_description or truncated excerpt"""
         if self.meta_description:
@@ -151,18 +183,10 @@ class Post(models.Model):
 
 
 def gallery_image_upload_path(instance, filename):
-    """Defines gallery image save path: media/gallery/{post-slug}/{filename}"""
-    import os
-    from django.utils.text import slugify
-    
-    # Get file extension
-    ext = os.path.splitext(filename)[1]
-    # Create filename with timestamp
-    from datetime import datetime
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    new_filename = f"{timestamp}{ext}"
-    
-    return f"gallery/{instance.post.slug}/{new_filename}"
+    """Defines gallery image save path: media/gallery/{post-slug}/{content hash}.{ext}"""
+    from .gallery import hashed_name
+    
+    return hashed_name(instance.post.slug, instance.image, filename)
 
 
 class GalleryImage(models.Model):
@@ -183,12 +207,97 @@ class GalleryImage(models.Model):
             models.Index(fields=['post', 'position']),
         ]
     
-    def clean(self):
-        from django.core.exceptions import ValidationError
-        if self.post:
-            existing_count = GalleryImage.objects.filter(post=self.post).exclude(pk=self.pk).count()
-            if existing_count >= 12:
-                raise ValidationError("Post can have a maximum of 12 images in gallery")
-    
     def __str__(self):
         return f"Gallery image: {self.post.title} ({self.position})"
+
+
+class RelatedPost(models.Model):
+    """Precomputed related-posts index entry (maintained by apps.posts.related)"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related_post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_to')
+    score = models.PositiveIntegerField(default=0, help_text="Relevance score (shared tags, same category)")
+    position = models.PositiveIntegerField(default=0, help_text="Display order")
+    
+    class Meta:
+        verbose_name = "Powiązany post"
+        verbose_name_plural = "Powiązane posty"
+        ordering = ['position']
+        unique_together = [('post', 'related_post')]
+        indexes = [
+            models.Index(fields=['post', 'position']),
+        ]
+    
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_post_id} ({self.position})"
+
+
+class PostCard(models.Model):
+    """
+    Denormalized listing row of a published post (maintained by apps.posts.cards).
+    Holds everything a post card shows, so listings are one indexed query.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    title = models.CharField(max_length=300)
+    slug = models.SlugField(max_length=300)
+    url = models.CharField(max_length=700)
+    excerpt = models.TextField()
+    created_at = models.DateTimeField()
+    
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    category_name = models.CharField(max_length=200)
+    category_slug = models.SlugField(max_length=200)
+    category_image_url = models.CharField(max_length=500, blank=True)
+    
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    author_username = models.CharField(max_length=150)
+    author_first_name = models.CharField(max_length=150, blank=True)
+    author_last_name = models.CharField(max_length=150, blank=True)
+    author_email = models.CharField(max_length=254, blank=True)
+    
+    # Resolved images: hero image, hero media (get_hero_media) and card thumbnail
+    hero_image_url = models.CharField(max_length=500, blank=True)
+    hero_media_type = models.CharField(max_length=20, blank=True)
+    hero_media_url = models.CharField(max_length=500, blank=True)
+    thumbnail_url = models.CharField(max_length=500, blank=True, help_text="Hero image or category default image")
+    
+    tag_ids = ArrayField(models.IntegerField(), default=list)
+    tag_names = ArrayField(models.CharField(max_length=100), default=list)
+    tag_slugs = ArrayField(models.CharField(max_length=100), default=list)
+    
+    # Only published posts have a card
+    published = True
+    
+    objects = PostCardManager()
+    
+    class Meta:
+        verbose_name = "Karta postu"
+        verbose_name_plural = "Karty postów"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-post']),
+            models.Index(fields=['category_slug', '-created_at']),
+            GinIndex(fields=['tag_slugs']),
+        ]
+    
+    @property
+    def id(self):
+        return self.post_id
+    
+    @property
+    def tags(self):
+        """[{id, name, slug}] of the post tags"""
+        return [
+            {'id': tag_id, 'name': name, 'slug': slug}
+            for tag_id, name, slug in zip(self.tag_ids, self.tag_names, self.tag_slugs)
+        ]
+    
+    def get_hero_media(self):
+        if self.hero_media_type:
+            return {'type': self.hero_media_type, 'url': self.hero_media_url}
+        return None
+    
+    def get_url(self):
+        return self.url
+    
+    def __str__(self):
+        return self.title
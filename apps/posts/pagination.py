@@ -0,0 +1,125 @@
+"""
+Keyset (cursor) pagination of post lists.
+
+Pages are read with WHERE created_at < <last seen> ORDER BY created_at DESC
+LIMIT n, served by the (published, -created_at) index, so a deep page
+costs the same as the first one. No COUNT(*) unless asked for.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+class PostCursorPagination(CursorPagination):
+    """
+    Opaque ?cursor= pagination for post API lists.
+    ?count=1 adds the total number of results (one extra COUNT query).
+    """
+    ordering = '-created_at'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {'count': self.count, **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
+
+
+class KeysetPaginator:
+    """
+    Keyset pagination for HTML views, ordered by (-created_at, -id).
+    Cursors are opaque, URL-safe strings of the boundary post.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.order_by('-created_at', '-pk')
+        self.per_page = per_page
+
+    @staticmethod
+    def encode_cursor(post):
+        value = f'{post.created_at.isoformat()}|{post.pk}'
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """(created_at, id) of a cursor, None when invalid"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def page(self, after=None, before=None):
+        """Page of posts older than after, or newer than before cursor"""
+        after = self.decode_cursor(after) if after else None
+        before = self.decode_cursor(before) if before else None
+
+        if before:
+            created_at, pk = before
+            newer = self.queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+            ).order_by('created_at', 'pk')
+            posts = list(newer[:self.per_page + 1])
+            has_previous = len(posts) > self.per_page
+            posts = posts[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset
+            if after:
+                created_at, pk = after
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                )
+            posts = list(queryset[:self.per_page + 1])
+            has_next = len(posts) > self.per_page
+            posts = posts[:self.per_page]
+            has_previous = after is not None
+
+        return KeysetPage(self, posts, has_next and bool(posts), has_previous and bool(posts))
+
+
+class KeysetPage:
+    """Current page of KeysetPaginator, iterable like a Django Page"""
+
+    def __init__(self, paginator, object_list, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        return self.paginator.encode_cursor(self.object_list[-1]) if self._has_next else None
+
+    def previous_cursor(self):
+        return self.paginator.encode_cursor(self.object_list[0]) if self._has_previous else None
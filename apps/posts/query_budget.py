@@ -0,0 +1,73 @@
+"""
+Query budget for API views.
+
+Views declare how many SQL queries each action may run, e.g.:
+
+    class PostViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
+        query_budget = {'list': 3, 'retrieve': 5}
+
+Queries are counted from the moment authentication and permission checks
+are done until the response is finalized. When ``QUERY_BUDGET_STRICT`` is
+enabled (test suite) exceeding the budget raises QueryBudgetExceeded,
+otherwise a warning is logged.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a view runs more queries than declared"""
+
+
+class QueryCounter:
+    """Database execute wrapper counting executed queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """Enforces per-action query budgets on DRF views"""
+    query_budget = {}
+
+    def get_query_budget(self):
+        return self.query_budget.get(getattr(self, 'action', None))
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._query_counter = None
+        if self.get_query_budget() is not None:
+            self._query_counter = QueryCounter()
+            self._query_wrapper = connection.execute_wrapper(self._query_counter)
+            self._query_wrapper.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        counter = getattr(self, '_query_counter', None)
+        if counter is not None:
+            self._query_wrapper.__exit__(None, None, None)
+            self._query_counter = None
+            self.check_query_budget(counter)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def check_query_budget(self, counter):
+        budget = self.get_query_budget()
+        if counter.count <= budget:
+            return
+
+        message = (
+            f"{self.__class__.__name__}.{self.action} ran {counter.count} queries "
+            f"(budget: {budget})"
+        )
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message + '\n' + '\n'.join(counter.queries))
+        logger.warning(message)
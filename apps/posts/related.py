@@ -0,0 +1,120 @@
+"""
+Related posts index.
+
+For every published post a ranked list of neighbours is stored in the
+RelatedPost table, so serving related posts is a single indexed lookup
+instead of an ``ORDER BY RANDOM()`` scan over the whole archive.
+
+Ranking:
+1. number of shared tags (weighted by TAG_WEIGHT)
+2. same category (CATEGORY_WEIGHT)
+3. recency (newer posts win ties)
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Min, Q, Value, When
+
+from .models import Post, RelatedPost
+
+RELATED_POSTS_LIMIT = 6
+TAG_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+
+
+def _scored(queryset, post, tag_ids):
+    """Annotate posts of queryset with their score towards post (symmetric)"""
+    return queryset.exclude(pk=post.pk).annotate(
+        shared_tags=Count('tags', filter=Q(tags__in=tag_ids), distinct=True),
+        same_category=Case(
+            When(category_id=post.category_id, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    ).annotate(
+        score=F('shared_tags') * TAG_WEIGHT + F('same_category') * CATEGORY_WEIGHT
+    )
+
+
+def compute_related(post, limit=RELATED_POSTS_LIMIT):
+    """Return list of (post_id, score) for the best neighbours of a post"""
+    tag_ids = list(post.tags.values_list('id', flat=True))
+    candidates = _scored(Post.objects.published(), post, tag_ids).order_by(
+        '-score', '-created_at'
+    ).values_list('id', 'score')[:limit]
+    return list(candidates)
+
+
+@transaction.atomic
+def rebuild_for_post(post):
+    """Recompute and store the related posts list of a single post"""
+    RelatedPost.objects.filter(post=post).delete()
+    if not post.published:
+        return []
+
+    entries = [
+        RelatedPost(post=post, related_post_id=related_id, score=score, position=position)
+        for position, (related_id, score) in enumerate(compute_related(post))
+    ]
+    RelatedPost.objects.bulk_create(entries)
+    return entries
+
+
+def affected_post_ids(post):
+    """
+    Ids of posts whose stored list may change when the given post changes
+    (two queries, no ranking per neighbour): posts already listing it, and
+    neighbours (shared tag or category) for which its score reaches the
+    lowest stored score or whose list is not full. Lists padded with
+    unrelated posts (score 0) are refreshed by rebuild_related_posts.
+    """
+    ids = set(RelatedPost.objects.filter(related_post=post).values_list('post_id', flat=True))
+    if post.published:
+        tag_ids = list(post.tags.values_list('id', flat=True))
+        neighbours = dict(_scored(
+            Post.objects.published().filter(Q(category_id=post.category_id) | Q(tags__in=tag_ids)),
+            post, tag_ids,
+        ).values_list('id', 'score'))
+        stored = {
+            row['post_id']: row
+            for row in RelatedPost.objects.filter(post_id__in=neighbours).values('post_id').annotate(
+                lowest=Min('score'), count=Count('pk')
+            ).order_by()
+        }
+        for post_id, score in neighbours.items():
+            entry = stored.get(post_id)
+            if entry is None or entry['count'] < RELATED_POSTS_LIMIT or score >= entry['lowest']:
+                ids.add(post_id)
+    ids.discard(post.pk)
+    return ids
+
+
+def refresh_posts(post_ids):
+    """Rebuild related lists for the given post ids"""
+    for post in Post.objects.filter(pk__in=post_ids):
+        rebuild_for_post(post)
+
+
+def refresh_post_ids(post_ids):
+    """
+    Incremental update after posts (or their tags) changed: each post and
+    each neighbour is rebuilt once
+    """
+    post_ids = set(post_ids)
+    affected = set()
+    for post in Post.objects.filter(pk__in=post_ids):
+        rebuild_for_post(post)
+        affected |= affected_post_ids(post)
+    refresh_posts(affected - post_ids)
+
+
+def refresh_post(post):
+    """Incremental update after a post (or its tags) changed"""
+    refresh_post_ids([post.pk])
+
+
+def rebuild_all():
+    """Rebuild the whole index (used by the rebuild_related_posts command)"""
+    count = 0
+    for post in Post.objects.published().iterator():
+        rebuild_for_post(post)
+        count += 1
+    return count
@@ -0,0 +1,139 @@
+"""
+Full-text and fuzzy search.
+
+Each post stores a weighted tsvector (title A, excerpt B, plain text of
+the content C - Post.content_text, see apps.posts.content) in
+Post.search_vector, indexed with GIN. The text search
+configuration is set by SEARCH_CONFIG (created in migration 0006).
+
+Fuzzy (typo and diacritics tolerant) matching uses pg_trgm GIN indexes
+built on unaccent_lower(column) - see fuzzy_filter().
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchVector, TrigramWordSimilarity
+from django.db import connections, transaction
+from django.db.models import Func, Q, TextField, Value
+from django.db.models.functions import Greatest
+
+# Minimal similarity of a "did you mean" suggestion - looser than the
+# pg_trgm threshold of fuzzy_filter(), which already found nothing
+SUGGESTION_MIN_SIMILARITY = 0.3
+# pg_trgm default of pg_trgm.word_similarity_threshold
+DEFAULT_WORD_SIMILARITY_THRESHOLD = '0.6'
+
+
+class UnaccentLower(Func):
+    """lower(unaccent(text)) - immutable SQL function created in posts migration 0007"""
+    function = 'unaccent_lower'
+    output_field = TextField()
+
+
+class EscapeHTML(Func):
+    """Text with &, < and > escaped, safe to embed in HTML"""
+    template = "replace(replace(replace(%(expressions)s, '&', '&amp;'), '<', '&lt;'), '>', '&gt;')"
+    output_field = TextField()
+
+
+def get_search_config():
+    return getattr(settings, 'SEARCH_CONFIG', 'polish')
+
+
+def build_search_vector(title, excerpt, text):
+    """Weighted search vector expression for given post texts (text: plain text content)"""
+    config = get_search_config()
+    return (
+        SearchVector(Value(title or ''), weight='A', config=config)
+        + SearchVector(Value(excerpt or ''), weight='B', config=config)
+        + SearchVector(Value(text or ''), weight='C', config=config)
+    )
+
+
+def update_search_vector(post):
+    """Recompute stored search vector of a post (called after save)"""
+    type(post).objects.filter(pk=post.pk).update(
+        search_vector=build_search_vector(post.title, post.excerpt, post.content_text)
+    )
+
+
+def make_search_query(query):
+    """Parse user input (supports quotes, OR, -exclusion)"""
+    return SearchQuery(query, search_type='websearch', config=get_search_config())
+
+
+def fuzzy_filter(queryset, query, fields):
+    """
+    Typo and diacritics tolerant match ("mozg" finds "mózg") on given fields.
+    Both substring and trigram word similarity conditions are served by
+    GIN gin_trgm_ops indexes on UnaccentLower(field). Results are ordered
+    by best similarity.
+    """
+    normalized = UnaccentLower(Value(query))
+    aliases = {f'{field}_normalized': UnaccentLower(field) for field in fields}
+
+    condition = Q()
+    for alias in aliases:
+        condition |= Q(**{f'{alias}__contains': normalized})
+        condition |= Q(**{f'{alias}__trigram_word_similar': normalized})
+
+    similarities = [TrigramWordSimilarity(normalized, alias) for alias in aliases]
+    similarity = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+
+    return queryset.alias(**aliases).filter(condition).annotate(
+        similarity=similarity
+    ).order_by('-similarity')
+
+
+@contextmanager
+def word_similarity_threshold(threshold, using='default'):
+    """
+    Set pg_trgm.word_similarity_threshold (the threshold of the indexed %>
+    operator, trigram_word_similar lookups) for a block, then restore it
+    """
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('pg_trgm.word_similarity_threshold', true), "
+            "set_config('pg_trgm.word_similarity_threshold', %s, true)",
+            [str(threshold)],
+        )
+        previous = cursor.fetchone()[0] or DEFAULT_WORD_SIMILARITY_THRESHOLD
+        try:
+            yield
+        finally:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [previous]
+            )
+
+
+def closest_match(queryset, query, field):
+    """
+    (value, similarity) of the row of queryset most similar to query, None
+    below SUGGESTION_MIN_SIMILARITY. Rows are found through the gin_trgm_ops
+    index on UnaccentLower(field); only the matches are ranked.
+    """
+    normalized = UnaccentLower(Value(query))
+    with word_similarity_threshold(SUGGESTION_MIN_SIMILARITY, using=queryset.db):
+        return queryset.alias(normalized=UnaccentLower(field)).filter(
+            normalized__trigram_word_similar=normalized
+        ).annotate(
+            similarity=TrigramWordSimilarity(normalized, 'normalized')
+        ).order_by('-similarity').values_list(field, 'similarity').first()
+
+
+def did_you_mean(query):
+    """Closest tag name or post title for a query, None if nothing similar"""
+    from .models import Post, Tag
+
+    candidates = [
+        closest_match(Tag.objects.all(), query, 'name'),
+        closest_match(Post.objects.published(), query, 'title'),
+    ]
+    candidates = [candidate for candidate in candidates if candidate]
+    if not candidates:
+        return None
+
+    suggestion = max(candidates, key=lambda candidate: candidate[1])[0]
+    if suggestion.lower() == query.lower():
+        return None
+    return suggestion
@@ -1,6 +1,156 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Category, Tag, Post, GalleryImage
+from django.db.models import QuerySet
+from apps.pages import images
+from .managers import LISTING_FIELDS
+from .models import Category, Tag, Post, GalleryImage, PostCard
+
+
+class EagerLoadingMixin:
+    """
+    Serializer declares relations used by its nested serializers.
+    They are applied with setup_queryset() and automatically when
+    the serializer is created with many=True on a QuerySet.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    # Columns to load (only()), None loads all
+    only_fields = None
+    # Columns not to load when only_fields is None
+    defer_fields = ()
+    
+    @classmethod
+    def setup_queryset(cls, queryset):
+        if cls.only_fields:
+            queryset = queryset.only(*cls.only_fields)
+        elif cls.defer_fields:
+            queryset = queryset.defer(*cls.defer_fields)
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+    
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        if args and isinstance(args[0], QuerySet):
+            args = (cls.setup_queryset(args[0]),) + args[1:]
+        return super().many_init(*args, **kwargs)
+
+
+class SparseFieldsetMixin(EagerLoadingMixin):
+    """
+    ?fields=id,title,url limits the output to the given fields (without it
+    the full representation is kept). Relations from expandable_fields
+    named in ?fields= are rendered as primary keys unless also listed in
+    ?expand=.
+
+    setup_queryset(queryset, fields, expand) loads only the columns and
+    joins the requested fields need, so e.g. content is not read at all.
+    """
+    fields_param = 'fields'
+    expand_param = 'expand'
+    expandable_fields = ()
+    # Model columns (and related__columns) read by fields not backed by a column of the same name
+    field_columns = {}
+    # Columns of expanded relations, default: all columns of the joined model
+    expanded_columns = {}
+    # Columns always loaded (pk, pagination key)
+    required_columns = ('id', 'created_at')
+    
+    @staticmethod
+    def _parse_names(value):
+        return [name.strip() for name in value.split(',') if name.strip()]
+    
+    @classmethod
+    def requested_fields(cls, request):
+        """(fields, expand) of the request, fields is None when not limited"""
+        if request is None:
+            return None, []
+        params = getattr(request, 'query_params', request.GET)
+        fields = params.get(cls.fields_param)
+        expand = cls._parse_names(params.get(cls.expand_param, ''))
+        if not fields:
+            return None, expand
+        return [name for name in cls._parse_names(fields) if name in cls.Meta.fields], expand
+    
+    @classmethod
+    def setup_queryset(cls, queryset, fields=None, expand=(), required=()):
+        if fields is None:
+            return super().setup_queryset(queryset)
+        
+        paths = set(cls.required_columns) | set(required)
+        for name in fields:
+            if name in cls.expandable_fields and name in expand:
+                paths.update(cls.expanded_columns.get(name, (f'{name}__',)))
+            else:
+                paths.update(cls.field_columns.get(name, (name,)))
+        
+        select = [name for name in cls.select_related_fields if any(
+            path.startswith(f'{name}__') for path in paths
+        )]
+        prefetch = [name for name in cls.prefetch_related_fields if name in paths or f'{name}__' in paths]
+        columns = {path.split('__')[0] for path in paths}
+        deferred = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if field.name not in columns and not field.primary_key
+        ]
+        
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.defer(*deferred)
+    
+    def is_sparse_root(self):
+        """Sparse fieldsets apply only to the top-level serializer"""
+        if not self.context.get('sparse_fields', True):
+            return False
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_sparse_root():
+            return fields
+        requested, expand = self.requested_fields(self.context.get('request'))
+        if requested is None:
+            return fields
+        
+        sparse = {}
+        for name in requested:
+            field = fields[name]
+            if name in self.expandable_fields and name not in expand:
+                field = self.get_collapsed_field(name, field)
+            sparse[name] = field
+        return sparse
+    
+    def get_collapsed_field(self, name, field):
+        """Field rendering a not expanded relation as primary key(s)"""
+        return serializers.PrimaryKeyRelatedField(
+            many=isinstance(field, serializers.ListSerializer), read_only=True
+        )
+
+
+class SrcsetField(serializers.Field):
+    """
+    {format: srcset} of the responsive renditions (apps.pages.images) of an
+    image field or /media/ URL, None without an image
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        name = images.media_name(value)
+        info = images.get_image_info(name) if name else None
+        if info is None:
+            return None
+        request = self.context.get('request')
+        return images.srcsets(info, request.build_absolute_uri if request else None)
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -28,33 +178,133 @@ class AuthorSerializer(serializers.ModelSerializer):
 
 class GalleryImageSerializer(serializers.ModelSerializer):
     """Serializer for gallery images"""
+    srcset = SrcsetField(source='image')
+    
     class Meta:
         model = GalleryImage
-        fields = ['id', 'image', 'caption', 'position', 'uploaded_at']
+        fields = ['id', 'image', 'srcset', 'caption', 'position', 'uploaded_at']
         read_only_fields = ['uploaded_at']
 
 
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for post listing (simplified version)"""
+    select_related_fields = ('category', 'author')
+    prefetch_related_fields = ('tags',)
+    only_fields = LISTING_FIELDS
+    expandable_fields = ('category', 'author', 'tags')
+    field_columns = {
+        'url': ('slug', 'category__slug'),
+        'thumbnail_image': ('hero_image',),
+        'thumbnail_srcset': ('hero_image',),
+    }
+    
     category = CategorySerializer(read_only=True)
     author = AuthorSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     url = serializers.SerializerMethodField()
     thumbnail_image = serializers.ImageField(source='hero_image', read_only=True)
+    thumbnail_srcset = SrcsetField(source='hero_image')
     
     class Meta:
         model = Post
         fields = [
             'id', 'title', 'slug', 'created_at', 'published',
-            'thumbnail_image', 'excerpt', 'category', 'author', 'tags', 'url'
+            'thumbnail_image', 'thumbnail_srcset', 'excerpt', 'category', 'author', 'tags', 'url'
         ]
     
     def get_url(self, obj):
         return obj.get_url()
 
 
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    PostListSerializer output read from the PostCard read model
+    (one query per page, no joins or prefetches)
+    """
+    expandable_fields = ('category', 'author', 'tags')
+    field_columns = {
+        'id': ('post',),
+        'published': (),
+        'thumbnail_image': ('hero_image_url',),
+        'thumbnail_srcset': ('hero_image_url',),
+        'category': ('category',),
+        'author': ('author',),
+        'tags': ('tag_ids',),
+    }
+    expanded_columns = {
+        'category': ('category', 'category_name', 'category_slug', 'category_image_url'),
+        'author': ('author', 'author_username', 'author_first_name', 'author_last_name', 'author_email'),
+        'tags': ('tag_ids', 'tag_names', 'tag_slugs'),
+    }
+    required_columns = ('post', 'created_at')
+    collapsed_sources = {'category': 'category_id', 'author': 'author_id', 'tags': 'tag_ids'}
+    
+    id = serializers.IntegerField(source='post_id', read_only=True)
+    published = serializers.BooleanField(read_only=True)
+    category = serializers.SerializerMethodField()
+    author = serializers.SerializerMethodField()
+    tags = serializers.SerializerMethodField()
+    thumbnail_image = serializers.SerializerMethodField()
+    thumbnail_srcset = SrcsetField(source='hero_image_url')
+    
+    class Meta:
+        model = PostCard
+        fields = PostListSerializer.Meta.fields
+    
+    def absolute_url(self, url):
+        """Image URL as serializers.ImageField renders it"""
+        if not url:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_collapsed_field(self, name, field):
+        source = self.collapsed_sources[name]
+        if name == 'tags':
+            return serializers.ListField(child=serializers.IntegerField(), source=source, read_only=True)
+        return serializers.IntegerField(source=source, read_only=True)
+    
+    def get_category(self, obj):
+        return {
+            'id': obj.category_id,
+            'name': obj.category_name,
+            'slug': obj.category_slug,
+            'default_image': self.absolute_url(obj.category_image_url),
+        }
+    
+    def get_author(self, obj):
+        return {
+            'id': obj.author_id,
+            'username': obj.author_username,
+            'first_name': obj.author_first_name,
+            'last_name': obj.author_last_name,
+            'email': obj.author_email,
+        }
+    
+    def get_tags(self, obj):
+        return obj.tags
+    
+    def get_thumbnail_image(self, obj):
+        return self.absolute_url(obj.hero_image_url)
+
+
+class PostDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for full post data (with content and relations)"""
+    select_related_fields = ('category', 'author')
+    prefetch_related_fields = ('tags', 'gallery_images')
+    defer_fields = Post.RAW_CONTENT_FIELDS
+    expandable_fields = ('category', 'author', 'tags', 'gallery_images')
+    field_columns = {
+        'url': ('slug', 'category__slug'),
+        'thumbnail_image': ('hero_image',),
+        'thumbnail_srcset': ('hero_image',),
+        'hero_media': ('hero_image', 'hero_youtube_url', 'category__default_image'),
+        'related_posts': (),
+        'content': ('rendered_content',),
+        'toc': ('content_toc',),
+        'reading_time': ('word_count',),
+    }
+    
     category = CategorySerializer(read_only=True)
     author = AuthorSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
@@ -63,30 +313,30 @@ class PostDetailSerializer(serializers.ModelSerializer):
     hero_media = serializers.SerializerMethodField()
     url = serializers.SerializerMethodField()
     thumbnail_image = serializers.ImageField(source='hero_image', read_only=True)
+    thumbnail_srcset = SrcsetField(source='hero_image')
+    # Sanitized HTML and metadata rendered on save (apps.posts.content)
+    content = serializers.CharField(source='rendered_content', read_only=True)
+    toc = serializers.JSONField(source='content_toc', read_only=True)
+    reading_time = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Post
         fields = [
             'id', 'title', 'slug', 'created_at', 'published',
-            'thumbnail_image', 'excerpt',
+            'thumbnail_image', 'thumbnail_srcset', 'excerpt',
             'hero_image', 'hero_youtube_url', 'hero_media',
-            'content', 'category', 'author', 'tags',
+            'content', 'toc', 'word_count', 'reading_time',
+            'category', 'author', 'tags',
             'related_posts', 'gallery_images', 'url'
         ]
     
     def get_related_posts(self, obj):
-        """Returns up to 6 random posts from database (excluding current post)"""
-        from django.db.models import Q
-        
-        # Get max 6 random published posts, excluding current one
-        random_posts = Post.objects.filter(
-            published=True
-        ).exclude(
-            id=obj.id
-        ).order_by('?')[:6]
+        """Returns up to 6 related posts from the precomputed index"""
+        related_posts = Post.objects.related_to(obj)
         
-        # Use simplified serializer for related posts
-        return PostListSerializer(random_posts, many=True, context=self.context).data
+        # Use simplified serializer for related posts, ?fields= applies to the post itself
+        context = {**self.context, 'sparse_fields': False}
+        return PostListSerializer(related_posts, many=True, context=context).data
     
     def get_hero_media(self, obj):
         return obj.get_hero_media()
@@ -0,0 +1,140 @@
+import functools
+import threading
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Category, Post, Tag
+from . import cards, related, search
+from .suggest import category_entry, suggest_index, tag_entry
+
+
+class OnCommitBatch:
+    """
+    Collects post ids during a transaction and hands them to handler once,
+    on commit. An admin save sends post_save and one m2m_changed per tag
+    action - the post is refreshed once instead of after every signal.
+    Outside a transaction the ids are handled right away. Ids of a rolled
+    back transaction (its flush callbacks are discarded) are dropped.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.local = threading.local()
+
+    def add(self, post_ids):
+        connection = transaction.get_connection()
+        if not any(callback == self.flush for _, callback, _ in connection.run_on_commit):
+            # No flush pending - the ids left over were rolled back
+            self.local.__dict__.pop('post_ids', None)
+        pending = self.local.__dict__.setdefault('post_ids', set())
+        pending.update(post_ids)
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        post_ids = self.local.__dict__.pop('post_ids', None)
+        if post_ids:
+            self.handler(post_ids)
+
+
+related_refresh = OnCommitBatch(related.refresh_post_ids)
+card_refresh = OnCommitBatch(cards.refresh_cards)
+
+
+def on_commit(func, *args, **kwargs):
+    """
+    Call func once the transaction commits - the suggestion index must not
+    publish (bump the shared version for) data other workers cannot read yet,
+    nor keep entries of a rolled back transaction
+    """
+    transaction.on_commit(functools.partial(func, *args, **kwargs))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    """Keep search vector, related posts index and card in sync with post data"""
+    if raw:
+        return
+    search.update_search_vector(instance)
+    related_refresh.add([instance.pk])
+    card_refresh.add([instance.pk])
+    on_commit(suggest_index.update_post, instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tags affect related posts ranking - refresh after any change"""
+    if reverse and action == 'pre_clear':
+        # Tag.posts.clear() sends no pk_set - remember the posts losing the tag
+        instance._cleared_post_ids = set(instance.posts.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Tag.posts changed - refresh every touched post
+        post_ids = set(pk_set or ())
+        if action == 'post_clear':
+            post_ids = getattr(instance, '_cleared_post_ids', set())
+        related_refresh.add(post_ids)
+        card_refresh.add(cards.tag_post_ids(instance) | post_ids)
+    else:
+        related_refresh.add([instance.pk])
+        card_refresh.add([instance.pk])
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    """Remember posts listing the deleted one before cascade removes the rows"""
+    instance._related_affected = related.affected_post_ids(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    related.refresh_posts(getattr(instance, '_related_affected', ()))
+    # Key taken now - the pk of a deleted instance is reset
+    on_commit(suggest_index.update, ('post', instance.pk), None)
+
+
+@receiver(pre_save, sender=Tag)
+def remember_tag_labels(sender, instance, raw=False, **kwargs):
+    """Name and slug before the save - unchanged tags need no refresh"""
+    if raw or not instance.pk:
+        return
+    instance._old_labels = Tag.objects.filter(pk=instance.pk).values_list('name', 'slug').first()
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and getattr(instance, '_old_labels', None) == (instance.name, instance.slug):
+        return
+    on_commit(suggest_index.update_tag, instance)
+    if not created:
+        card_refresh.add(cards.tag_post_ids(instance))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    on_commit(suggest_index.update, tag_entry(instance)[0], None)
+    card_refresh.add(cards.tag_post_ids(instance))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        on_commit(suggest_index.update_category, instance)
+        card_refresh.add(cards.category_post_ids(instance))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    on_commit(suggest_index.update, category_entry(instance)[0], None)
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cards.update_author(instance)
@@ -1,32 +1,50 @@
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Max, Q
 from django.urls import reverse
 from .models import Post, Category
 
 
 class PostSitemap(Sitemap):
-    """Sitemap for published posts"""
+    """
+    Sitemap for published posts, optionally only posts created
+    in [start, end) (monthly sections of apps.pages.sitemap_files)
+    """
     changefreq = 'weekly'
     priority = 0.8
     protocol = 'https'
-    
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
     def items(self):
-        return Post.objects.filter(published=True).select_related('category')
-    
+        posts = Post.objects.published().select_related('category').only(
+            'slug', 'created_at', 'updated_at', 'category__slug'
+        )
+        if self.start:
+            posts = posts.filter(created_at__gte=self.start, created_at__lt=self.end)
+        return posts.order_by('created_at', 'pk')
+
     def lastmod(self, obj):
-        return obj.created_at
-    
+        return obj.updated_at
+
     def location(self, obj):
         return obj.get_url()
 
 
 class CategorySitemap(Sitemap):
-    """Sitemap for categories"""
+    """Sitemap for categories, lastmod is the latest change of their posts"""
     changefreq = 'monthly'
     priority = 0.6
     protocol = 'https'
-    
+
     def items(self):
-        return Category.objects.all()
-    
+        return Category.objects.annotate(
+            lastmod=Max('posts__updated_at', filter=Q(posts__published=True))
+        ).order_by('pk')
+
+    def lastmod(self, obj):
+        return obj.lastmod
+
     def location(self, obj):
         return reverse('category_detail', args=[obj.slug])
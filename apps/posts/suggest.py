@@ -0,0 +1,252 @@
+"""
+Search-as-you-type suggestions.
+
+An in-process prefix index (sorted array + bisect) over published post
+titles, tag names and category names. Every word of a label is indexed,
+so "mozg" suggests "Udar mózgu". Lookups never touch the database.
+
+The index is built on first use (warm_up() is called from wsgi.py) and
+updated incrementally by signals in signals.py. Other worker processes
+notice changes through a version stamp in the cache shared by all
+processes (SHARED_CACHE_ALIAS), checked at most every
+SUGGEST_INDEX_CHECK_INTERVAL seconds.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from apps.pages.cache import get_shared_cache
+
+VERSION_CACHE_KEY = 'posts:suggest_index_version'
+
+# Index keys examined by one lookup at most (bounds the cost of multi-word
+# queries whose words match many labels separately but none together)
+MAX_SCANNED_KEYS = 1000
+LAST_CHARACTER = chr(0x10FFFF)
+
+# Polish letters without a Unicode decomposition
+_EXTRA_FOLDING = str.maketrans({'ł': 'l', 'Ł': 'l'})
+
+
+def normalize(text):
+    """Lowercase and strip diacritics: 'Mózg Łódź' -> 'mozg lodz'"""
+    text = text.translate(_EXTRA_FOLDING).lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class PrefixIndex:
+    """Sorted (word, key) array with bisect prefix lookups"""
+
+    def __init__(self):
+        self._keys = []       # sorted list of (word, key)
+        self._entries = {}    # key -> entry dict
+        self._words = {}      # key -> normalized words of the label
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def label_words(label):
+        return frozenset(normalize(label).split())
+
+    def load(self, entries):
+        """Replace index content with given (key, entry) pairs"""
+        keys = []
+        entries = dict(entries)
+        words = {key: self.label_words(entry['label']) for key, entry in entries.items()}
+        for key, label_words in words.items():
+            keys.extend((word, key) for word in label_words)
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self._words = words
+
+    def add(self, key, entry):
+        label_words = self.label_words(entry['label'])
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._words[key] = label_words
+            for word in label_words:
+                insort(self._keys, (word, key))
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        if self._entries.pop(key, None) is None:
+            return
+        for word in self._words.pop(key):
+            position = bisect_left(self._keys, (word, key))
+            if position < len(self._keys) and self._keys[position] == (word, key):
+                del self._keys[position]
+
+    def _span(self, word):
+        """(start, end) positions of the keys of words starting with word"""
+        return (
+            bisect_left(self._keys, (word,)),
+            bisect_left(self._keys, (word + LAST_CHARACTER,)),
+        )
+
+    def lookup(self, prefix, limit=10):
+        """
+        Entries having a word starting with prefix (all prefix words must
+        match). At most MAX_SCANNED_KEYS index keys are examined, so a
+        lookup costs the same whatever the query.
+        """
+        words = set(normalize(prefix).split())
+        if not words:
+            return []
+
+        results = []
+        with self._lock:
+            # Scan the keys of the most selective word, filter by the others:
+            # by key sets of selective words, by label words otherwise
+            spans = sorted(((self._span(word), word) for word in words), key=lambda span: span[0][1] - span[0][0])
+            (start, end), _ = spans[0]
+            key_sets, other_words = [], []
+            for (other_start, other_end), word in spans[1:]:
+                if other_end - other_start <= MAX_SCANNED_KEYS:
+                    key_sets.append({key for _, key in self._keys[other_start:other_end]})
+                else:
+                    other_words.append(word)
+
+            seen = set()
+            for position in range(start, min(end, start + MAX_SCANNED_KEYS)):
+                key = self._keys[position][1]
+                if key in seen:
+                    continue
+                seen.add(key)
+                if not all(key in keys for keys in key_sets):
+                    continue
+                if other_words and not self._matches_all(self._words[key], other_words):
+                    continue
+                results.append(self._entries[key])
+                if len(results) == limit:
+                    break
+        return results
+
+    @staticmethod
+    def _matches_all(label_words, words):
+        return all(any(label_word.startswith(word) for label_word in label_words) for word in words)
+
+
+def post_entry(post):
+    return ('post', post.pk), {'type': 'post', 'label': post.title, 'url': post.get_url()}
+
+
+def tag_entry(tag):
+    url = reverse('search') + '?' + urlencode({'q': tag.name, 'search_type': 'tags'})
+    return ('tag', tag.pk), {'type': 'tag', 'label': tag.name, 'url': url}
+
+
+def category_entry(category):
+    url = reverse('category_detail', args=[category.slug])
+    return ('category', category.pk), {'type': 'category', 'label': category.name, 'url': url}
+
+
+def collect_entries():
+    """All suggestion entries from the database (3 queries)"""
+    from .models import Category, Post, Tag
+
+    posts = Post.objects.published().select_related('category').only('title', 'slug', 'category__slug')
+    entries = [post_entry(post) for post in posts]
+    entries += [tag_entry(tag) for tag in Tag.objects.all()]
+    entries += [category_entry(category) for category in Category.objects.all()]
+    return entries
+
+
+class SuggestIndex:
+    """Process-wide index kept in sync with the database"""
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.version = None
+        self.checked_at = 0
+        self._build_lock = threading.Lock()
+
+    def check_interval(self):
+        return getattr(settings, 'SUGGEST_INDEX_CHECK_INTERVAL', 5)
+
+    def rebuild(self):
+        with self._build_lock:
+            version = get_shared_cache().get(VERSION_CACHE_KEY, 0)
+            self.index.load(collect_entries())
+            self.version = version
+            self.checked_at = time.monotonic()
+
+    def ensure_fresh(self):
+        """Build on first use, rebuild when another process changed data"""
+        now = time.monotonic()
+        if self.version is not None and now - self.checked_at < self.check_interval():
+            return
+        self.checked_at = now
+        if self.version is None or get_shared_cache().get(VERSION_CACHE_KEY, 0) != self.version:
+            self.rebuild()
+
+    def lookup(self, prefix, limit=10):
+        self.ensure_fresh()
+        return self.index.lookup(prefix, limit)
+
+    def _changed(self):
+        """Bump shared version so other processes rebuild their index"""
+        shared_cache = get_shared_cache()
+        try:
+            version = shared_cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            shared_cache.set(VERSION_CACHE_KEY, 1, None)
+            version = 1
+        if self.version is not None and version == self.version + 1:
+            self.version = version
+        else:
+            # Missed changes from another process - recheck on next lookup
+            self.checked_at = 0
+
+    def update(self, key, entry):
+        if self.version is not None:
+            if entry is None:
+                self.index.remove(key)
+            else:
+                self.index.add(key, entry)
+        self._changed()
+
+    def update_post(self, post, deleted=False):
+        if deleted or not post.published:
+            self.update(('post', post.pk), None)
+        else:
+            self.update(*post_entry(post))
+
+    def update_tag(self, tag, deleted=False):
+        key, entry = tag_entry(tag)
+        self.update(key, None if deleted else entry)
+
+    def update_category(self, category, deleted=False):
+        from .models import Post
+
+        key, entry = category_entry(category)
+        self.update(key, None if deleted else entry)
+        if self.version is not None and not deleted:
+            # Post URLs contain the category slug
+            for post in Post.objects.published().filter(category=category).select_related('category'):
+                self.update_post(post)
+
+
+suggest_index = SuggestIndex()
+
+
+def warm_up():
+    """Build the index at process start; a missing database only delays it"""
+    try:
+        suggest_index.rebuild()
+    except DatabaseError:
+        pass
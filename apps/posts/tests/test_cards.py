@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+
+from apps.posts import cards
+from apps.posts.models import PostCard
+from apps.posts.signals import card_refresh
+from apps.posts.suggest import suggest_index
+from .utils import make_category, make_post, make_tag, make_user
+
+
+class PostCardSignalsTests(TestCase):
+    def setUp(self):
+        self.author = make_user()
+        self.category = make_category()
+        self.tag = make_tag('Udar')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = make_post('Pierwszy', self.category, self.author, [self.tag])
+
+    def test_card_rebuilt_once_per_admin_save(self):
+        extra = make_tag('Afazja')
+        with mock.patch.object(cards, 'build_card', wraps=cards.build_card) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    # What the admin does: save, then set the tags
+                    self.post.title = 'Zmieniony'
+                    self.post.save()
+                    self.post.tags.clear()
+                    self.post.tags.add(self.tag, extra)
+
+        self.assertEqual(build.call_count, 1)
+        card = PostCard.objects.get(pk=self.post.pk)
+        self.assertEqual((card.title, card.tag_names), ('Zmieniony', ['Afazja', 'Udar']))
+
+    def test_unchanged_tag_save_is_skipped(self):
+        with mock.patch.object(card_refresh, 'handler') as handler, \
+                mock.patch.object(suggest_index, 'update_tag') as update_tag:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.tag.save()
+
+        handler.assert_not_called()
+        update_tag.assert_not_called()
+
+    def test_renamed_tag_refreshes_cards(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = 'Udar mózgu'
+            self.tag.save()
+
+        self.assertEqual(PostCard.objects.get(pk=self.post.pk).tag_names, ['Udar mózgu'])
+
+    def test_deleted_tag_is_removed_from_cards(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+
+        self.assertEqual(PostCard.objects.get(pk=self.post.pk).tag_names, [])
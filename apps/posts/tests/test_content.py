@@ -0,0 +1,132 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.posts.content import reading_time, render, render_all
+from apps.posts.models import Post
+from apps.posts.search import make_search_query
+from .utils import make_category, make_post, make_user
+
+
+class SanitizerTests(SimpleTestCase):
+    """Tags, attributes and URLs outside the allow lists are removed"""
+
+    def test_scripts_and_styles_are_dropped_with_content(self):
+        html = render('<script>alert(1)</script><style>p { color: red }</style><p>Treść</p>').html
+
+        self.assertEqual(html, '<p>Treść</p>')
+
+    def test_event_handlers_are_removed(self):
+        html = render('<p onclick="alert(1)" onmouseover="alert(2)" class="lead">Treść</p>').html
+
+        self.assertEqual(html, '<p class="lead">Treść</p>')
+
+    def test_unknown_tags_keep_their_text(self):
+        self.assertEqual(render('<p><blink>Uwaga</blink></p>').html, '<p>Uwaga</p>')
+
+    def test_unclosed_tags_are_closed(self):
+        self.assertEqual(render('<ul><li><strong>Udar').html, '<ul><li><strong>Udar</strong></li></ul>')
+
+    def test_javascript_and_data_urls_are_removed(self):
+        for url in [
+            'javascript:alert(1)',
+            'JavaScript:alert(1)',
+            '&#106;avascript:alert(1)',
+            '&#x6A;ava&#x09;script&colon;alert(1)',
+            'java\tscript:alert(1)',
+            ' \x01javascript:alert(1)',
+            'data:text/html;base64,PHNjcmlwdD4=',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(render(f'<a href="{url}">Link</a>').html, '<a>Link</a>')
+
+    def test_safe_urls_are_kept(self):
+        for url in ['https://example.com/', '/p/udar/', '#objawy', 'mailto:kontakt@example.com', 'tel:+48221234567']:
+            with self.subTest(url=url):
+                self.assertIn(f'href="{url}"', render(f'<a href="{url}">Link</a>').html)
+
+    def test_image_with_data_url_loses_src(self):
+        self.assertNotIn('src', render('<img src="data:image/png;base64,AAAA" alt="x">').html)
+
+    @override_settings(POST_CONTENT_IFRAME_HOSTS=['www.youtube.com'])
+    def test_iframes_only_from_allowed_hosts(self):
+        allowed = '<iframe src="https://www.youtube.com/embed/abc"></iframe>'
+
+        self.assertEqual(render(allowed).html, allowed)
+        for src in ['https://evil.example/embed', 'http://www.youtube.com/embed/abc', 'javascript:alert(1)']:
+            with self.subTest(src=src):
+                self.assertEqual(render(f'<iframe src="{src}">tekst</iframe><p>Dalej</p>').html, '<p>Dalej</p>')
+
+    def test_unsafe_style_is_removed(self):
+        for style in ['width: expression(alert(1))', 'background: url(https://evil.example/)', 'behavior: url(x.htc)']:
+            with self.subTest(style=style):
+                self.assertEqual(render(f'<p style="{style}">Treść</p>').html, '<p>Treść</p>')
+        self.assertEqual(render('<p style="color: red">Treść</p>').html, '<p style="color: red">Treść</p>')
+
+    def test_blank_target_gets_noopener(self):
+        html = render('<a href="https://example.com/" target="_blank" rel="author">Link</a>').html
+
+        self.assertIn('rel="author noopener noreferrer"', html)
+        self.assertNotIn('rel', render('<a href="https://example.com/">Link</a>').html)
+
+
+class StructureTests(SimpleTestCase):
+    """Heading anchors, table of contents, plain text and word count"""
+
+    html = (
+        '<h2>Wstęp</h2><p>Udar mózgu to nagłe zaburzenie.</p>'
+        '<h3>Objawy</h3><p>Niedowład i afazja.</p>'
+        '<h2>Wstęp</h2><h4>Szczegóły</h4>'
+    )
+
+    def test_headings_get_unique_anchors(self):
+        html = render(self.html).html
+
+        self.assertIn('<h2 id="wstęp">Wstęp</h2>', html)
+        self.assertIn('<h2 id="wstęp-2">Wstęp</h2>', html)
+        self.assertIn('<h4 id="szczegóły">Szczegóły</h4>', html)
+
+    def test_editor_ids_are_kept_unique(self):
+        html = render('<h2 id="objawy">Pierwszy</h2><h2 id="objawy">Drugi</h2>').html
+
+        self.assertEqual(html, '<h2 id="objawy">Pierwszy</h2><h2 id="objawy-2">Drugi</h2>')
+
+    def test_toc_lists_h2_and_h3(self):
+        self.assertEqual(render(self.html).toc, [
+            {'level': 2, 'id': 'wstęp', 'title': 'Wstęp'},
+            {'level': 3, 'id': 'objawy', 'title': 'Objawy'},
+            {'level': 2, 'id': 'wstęp-2', 'title': 'Wstęp'},
+        ])
+
+    def test_text_and_word_count(self):
+        rendered = render(self.html + '<script>var hidden = 1;</script>')
+
+        self.assertEqual(
+            rendered.text, 'Wstęp\nUdar mózgu to nagłe zaburzenie.\nObjawy\nNiedowład i afazja.\nWstęp\nSzczegóły'
+        )
+        self.assertEqual(rendered.word_count, 12)
+
+    def test_reading_time(self):
+        self.assertEqual((reading_time(0), reading_time(200), reading_time(201)), (1, 1, 2))
+
+
+class RenderAllTests(TestCase):
+    """render_all() saves without signals - it keeps dependent fields current itself"""
+
+    def setUp(self):
+        self.post = make_post('Pierwszy', make_category(), make_user(), content='<p>Udar</p>')
+        # Changed past Post.save(), e.g. by an older release of the pipeline
+        Post.objects.filter(pk=self.post.pk).update(content='<p>Afazja</p>')
+
+    def test_search_vector_and_updated_at_are_refreshed(self):
+        self.assertEqual(render_all(Post.objects.all()), 1)
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.content_text, 'Afazja')
+        self.assertGreater(post.updated_at, self.post.updated_at)
+        self.assertTrue(Post.objects.filter(pk=post.pk, search_vector=make_search_query('afazja')).exists())
+
+    def test_unchanged_posts_are_not_written(self):
+        render_all(Post.objects.all())
+        updated_at = Post.objects.get(pk=self.post.pk).updated_at
+
+        self.assertEqual(render_all(Post.objects.all(), force=True), 0)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated_at, updated_at)
@@ -0,0 +1,51 @@
+import io
+import shutil
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from apps.posts.admin import GalleryUploadForm
+from apps.posts.gallery import MAX_GALLERY_IMAGES, bulk_upload
+from apps.posts.models import GalleryImage
+from .utils import make_category, make_post, make_user
+
+
+def image_file(number):
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), (number, 0, 0)).save(buffer, 'PNG')
+    return SimpleUploadedFile(f'zdjecie-{number}.png', buffer.getvalue(), content_type='image/png')
+
+
+class GalleryUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.post = make_post('Galeria', make_category(), make_user())
+
+    def test_form_without_files_is_invalid(self):
+        form = GalleryUploadForm(data={}, files={})
+
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['images'][0].code, 'required')
+
+    def test_images_are_added_with_the_post_locked(self):
+        with CaptureQueriesContext(connection) as queries:
+            images = bulk_upload(self.post, [image_file(1), image_file(2)])
+
+        self.assertEqual([image.position for image in images], [0, 1])
+        self.assertTrue(any('FOR UPDATE' in query['sql'] for query in queries))
+
+    def test_full_gallery_rejects_upload(self):
+        bulk_upload(self.post, [image_file(number) for number in range(MAX_GALLERY_IMAGES - 1)])
+
+        with self.assertRaises(ValidationError):
+            bulk_upload(self.post, [image_file(100), image_file(101)])
+        self.assertEqual(GalleryImage.objects.filter(post=self.post).count(), MAX_GALLERY_IMAGES - 1)
@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.posts.models import Post
+
+from .utils import make_category, make_post, make_user
+
+
+class ForListingTests(TestCase):
+    """PostQuerySet.for_listing() loads only what post cards read"""
+
+    def setUp(self):
+        self.post = make_post('Udar mózgu', make_category(), make_user(), content='<p>Długa treść</p>' * 100)
+
+    def test_content_is_not_loaded(self):
+        post = Post.objects.for_listing().get(pk=self.post.pk)
+
+        self.assertTrue({'content', 'rendered_content', 'search_vector'} <= post.get_deferred_fields())
+
+    def test_card_fields_need_no_extra_queries(self):
+        post = Post.objects.for_listing().get(pk=self.post.pk)
+
+        with self.assertNumQueries(0):
+            post.title, post.slug, post.excerpt, post.hero_image
+            post.category.name, post.category.slug, post.author.username
+
+    def test_page_of_cards_is_one_query(self):
+        with self.assertNumQueries(1):
+            titles = [
+                (post.title, post.category.name, post.author.username)
+                for post in Post.objects.published().for_listing()[:24]
+            ]
+        self.assertEqual(titles, [('Udar mózgu', 'Neurologia', 'autor')])
+
+
+class BenchmarkListingTests(TestCase):
+    def test_benchmark_check_passes_on_10k_posts(self):
+        out = StringIO()
+
+        call_command(
+            'benchmark_listing', posts=10_000, content_size=5_000, pages=2, check=True, stdout=out
+        )
+
+        self.assertIn('Listing check passed', out.getvalue())
+        # The synthetic corpus is rolled back
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,55 @@
+from django.test import TestCase, override_settings
+
+from apps.posts.models import GalleryImage
+from .utils import make_category, make_post, make_tag, make_user
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """API actions stay within their query_budget (QueryBudgetExceeded fails the test)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = make_user()
+        cls.category = make_category()
+        cls.tags = [make_tag('Udar'), make_tag('Afazja'), make_tag('Rehabilitacja')]
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.posts = [
+                make_post(f'Post {number}', cls.category, author, cls.tags[:number % 3 + 1])
+                for number in range(8)
+            ]
+        for position in range(3):
+            GalleryImage.objects.create(post=cls.posts[0], image=f'gallery/test/{position}.jpg', position=position)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return response.json()
+
+    def test_list(self):
+        data = self.get('/api/posts/')
+        self.assertEqual(len(data['results']), 8)
+        self.get('/api/posts/published/')
+
+    def test_list_sparse_and_expanded(self):
+        self.get('/api/posts/?fields=id,title,tags')
+        data = self.get('/api/posts/?fields=id,title,category,author,tags&expand=category,author,tags')
+        self.assertEqual(data['results'][0]['category']['slug'], self.category.slug)
+
+    def test_retrieve(self):
+        data = self.get(f'/api/posts/{self.posts[0].slug}/')
+        self.assertEqual(len(data['gallery_images']), 3)
+        self.assertTrue(data['related_posts'])
+
+    def test_retrieve_sparse_and_expanded(self):
+        slug = self.posts[0].slug
+        self.get(f'/api/posts/{slug}/?fields=id,title,tags')
+        self.get(f'/api/posts/{slug}/?fields=id,category,author,tags,gallery_images&expand=category,author,tags,gallery_images')
+
+    def test_category_and_tag_posts(self):
+        data = self.get(f'/api/categories/{self.category.slug}/posts/')
+        self.assertEqual(len(data['results']), 8)
+        self.get(f'/api/categories/{self.category.slug}/posts/?fields=id,title,tags&expand=tags')
+        data = self.get(f'/api/tags/{self.tags[0].slug}/posts/')
+        self.assertEqual(len(data['results']), 8)
+        self.get(f'/api/tags/{self.tags[2].slug}/posts/?fields=id,category&expand=category')
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.db import DatabaseError, transaction
+from django.test import TestCase
+
+from apps.posts import related
+from apps.posts.models import RelatedPost
+from apps.posts.signals import OnCommitBatch
+from .utils import make_category, make_post, make_tag, make_user
+
+
+class RelatedPostsSignalsTests(TestCase):
+    def setUp(self):
+        self.author = make_user()
+        self.category = make_category()
+        self.other_category = make_category('Kardiologia')
+        self.tag = make_tag('Udar')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first = make_post('Pierwszy', self.category, self.author, [self.tag])
+            self.second = make_post('Drugi', self.other_category, self.author, [self.tag])
+
+    def related_ids(self, post):
+        return list(RelatedPost.objects.filter(post=post).values_list('related_post_id', flat=True))
+
+    def test_shared_tag_makes_posts_related(self):
+        self.assertEqual(self.related_ids(self.first), [self.second.pk])
+
+    def test_reverse_clear_refreshes_posts_losing_the_tag(self):
+        extra = make_tag('Afazja')
+        with self.captureOnCommitCallbacks(execute=True):
+            make_post('Trzeci', self.other_category, self.author, [extra])
+        before = RelatedPost.objects.get(post=self.first, related_post=self.second).score
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.posts.clear()
+
+        self.assertLess(RelatedPost.objects.get(post=self.first, related_post=self.second).score, before)
+
+    def test_post_refreshed_once_per_transaction(self):
+        extra = make_tag('Afazja')
+        with mock.patch.object(related, 'rebuild_for_post', wraps=related.rebuild_for_post) as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    self.first.title = 'Pierwszy (zmieniony)'
+                    self.first.save()
+                    self.first.tags.clear()
+                    self.first.tags.add(self.tag, extra)
+
+        rebuilt = [call.args[0].pk for call in rebuild.call_args_list]
+        self.assertEqual(sorted(rebuilt), sorted({self.first.pk, self.second.pk}))
+
+
+class AffectedPostsTests(TestCase):
+    """Only posts whose stored top list can change are refreshed"""
+
+    def setUp(self):
+        self.author = make_user()
+        self.category = make_category()
+        self.tag = make_tag('Udar')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts = [
+                make_post(f'Post {number}', self.category, self.author, [self.tag])
+                for number in range(related.RELATED_POSTS_LIMIT + 2)
+            ]
+
+    def test_weaker_post_does_not_touch_full_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            untagged = make_post('Bez tagów', self.category, self.author)
+
+        self.assertEqual(related.affected_post_ids(untagged), set())
+
+    def test_equal_post_refreshes_its_neighbours(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tagged = make_post('Z tagiem', self.category, self.author, [self.tag])
+
+        self.assertEqual(related.affected_post_ids(tagged), {post.pk for post in self.posts})
+
+    def test_posts_listing_an_unpublished_post_are_refreshed(self):
+        post = self.posts[-1]
+        listing = set(RelatedPost.objects.filter(related_post=post).values_list('post_id', flat=True))
+        post.published = False
+
+        self.assertEqual(related.affected_post_ids(post), listing)
+
+
+class OnCommitBatchTests(TestCase):
+    def test_ids_of_rolled_back_transaction_are_dropped(self):
+        handler = mock.Mock()
+        batch = OnCommitBatch(handler)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    batch.add([1])
+                    raise DatabaseError('rollback')
+            except DatabaseError:
+                pass
+            batch.add([2])
+
+        handler.assert_called_once_with({2})
@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.posts.models import Post, Tag
+from apps.posts.search import closest_match, did_you_mean
+from .utils import make_category, make_post, make_tag, make_user
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = make_user()
+        category = make_category()
+        make_tag('Rehabilitacja')
+        cls.post = make_post('Leczenie udaru mózgu', category, author)
+        cls.post.excerpt = '<b onmouseover="x()">Udar</b> & leczenie'
+        cls.post.save()
+
+    def test_fuzzy_matches_without_diacritics(self):
+        self.assertEqual(list(Post.objects.published().fuzzy('mozgu')), [self.post])
+
+    def test_did_you_mean_suggests_close_tag_and_title(self):
+        self.assertFalse(Post.objects.published().fuzzy('rehabiltcja').exists())
+        self.assertEqual(did_you_mean('rehabiltcja'), 'Rehabilitacja')
+        self.assertEqual(did_you_mean('leczenie udru mozgu'), 'Leczenie udaru mózgu')
+        self.assertIsNone(did_you_mean('kardiochirurgia'))
+
+    def test_headline_escapes_excerpt_html(self):
+        headline = Post.objects.published().search('udar').with_headline('udar').get().headline
+        self.assertNotIn('<b', headline)
+        self.assertIn('&lt;b onmouseover', headline)
+        self.assertIn('<mark>Udar</mark>', headline)
+        self.assertIn('&amp;', headline)
+
+    def test_closest_match_uses_indexed_operator(self):
+        with CaptureQueriesContext(connection) as queries:
+            match = closest_match(Tag.objects.all(), 'rehabiltcja', 'name')
+
+        self.assertEqual(match[0], 'Rehabilitacja')
+        self.assertTrue(any('%>' in query['sql'] for query in queries))
+        # The lowered threshold does not leak into later fuzzy searches
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('pg_trgm.word_similarity_threshold')")
+            self.assertEqual(cursor.fetchone()[0], '0.6')
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.db import DatabaseError, transaction
+from django.test import SimpleTestCase, TestCase
+
+from apps.posts import suggest
+from apps.posts.suggest import PrefixIndex, suggest_index
+from .utils import make_category, make_post, make_tag, make_user
+
+
+def entry(number, label):
+    return ('post', number), {'type': 'post', 'label': label, 'url': f'/p/{number}'}
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.load([
+            entry(1, 'Udar mózgu'),
+            entry(2, 'Leczenie udaru'),
+            entry(3, 'Mózg i pamięć'),
+        ])
+
+    def labels(self, prefix, limit=10):
+        return sorted(entry['label'] for entry in self.index.lookup(prefix, limit))
+
+    def test_prefix_of_any_word_without_diacritics(self):
+        self.assertEqual(self.labels('mozg'), ['Mózg i pamięć', 'Udar mózgu'])
+        self.assertEqual(self.labels('uda'), ['Leczenie udaru', 'Udar mózgu'])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.labels('udar m'), ['Udar mózgu'])
+        self.assertEqual(self.labels('m udar'), ['Udar mózgu'])
+        self.assertEqual(self.labels('zzzz m'), [])
+
+    def test_add_and_remove(self):
+        self.index.add(*entry(4, 'Pamięć robocza'))
+        self.assertEqual(self.labels('pami'), ['Mózg i pamięć', 'Pamięć robocza'])
+        self.index.add(*entry(4, 'Afazja'))
+        self.index.remove(('post', 3))
+        self.assertEqual(self.labels('pami'), [])
+        self.assertEqual(self.labels('afa'), ['Afazja'])
+
+    def test_scanned_keys_are_capped(self):
+        self.index.load(entry(number, f'mózg pamięć {number}') for number in range(50))
+        with mock.patch.object(suggest, 'MAX_SCANNED_KEYS', 10):
+            self.assertEqual(len(self.index.lookup('m', 100)), 10)
+            self.assertEqual(len(self.index.lookup('m p', 100)), 10)
+            # The most selective word is scanned
+            self.assertEqual(self.labels('m 49'), ['mózg pamięć 49'])
+
+
+class SuggestAPITests(TestCase):
+    def test_suggest_follows_post_changes(self):
+        author = make_user()
+        category = make_category()
+        post = make_post('Udar mózgu', category, author)
+        suggest_index.rebuild()
+
+        response = self.client.get('/api/search/suggest/', {'q': 'udar mo'})
+        labels = [item['label'] for item in response.json()['results']]
+        self.assertEqual(labels, ['Udar mózgu'])
+
+        post.published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertEqual(self.client.get('/api/search/suggest/', {'q': 'udar'}).json()['results'], [])
+
+    def test_rolled_back_changes_never_reach_the_index(self):
+        suggest_index.rebuild()
+        version = suggest_index.version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    make_tag('Afazja')
+                    raise DatabaseError('rollback')
+            except DatabaseError:
+                pass
+
+        self.assertEqual(suggest_index.lookup('afaz'), [])
+        self.assertEqual(suggest_index.version, version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tag('Afazja')
+        self.assertEqual([item['label'] for item in suggest_index.lookup('afaz')], ['Afazja'])
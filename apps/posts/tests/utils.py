@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+
+from apps.posts.models import Category, Post, Tag
+
+
+def make_user(username='autor'):
+    return User.objects.create_user(username=username, password='haslo')
+
+
+def make_category(name='Neurologia', slug=None):
+    return Category.objects.create(name=name, slug=slug or name.lower())
+
+
+def make_tag(name, slug=None):
+    return Tag.objects.create(name=name, slug=slug or name.lower())
+
+
+def make_post(title, category, author, tags=(), published=True, content='<p>Treść</p>'):
+    post = Post.objects.create(
+        title=title,
+        excerpt=f'Zajawka {title}',
+        content=content,
+        category=category,
+        author=author,
+        published=published,
+    )
+    if tags:
+        post.tags.set(tags)
+    return post
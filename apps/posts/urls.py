@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, TagViewSet, PostViewSet
+from .views import CategoryViewSet, TagViewSet, PostViewSet, SuggestAPIView
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
@@ -8,5 +8,6 @@ router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'posts', PostViewSet, basename='post')
 
 urlpatterns = [
+    path('search/suggest/', SuggestAPIView.as_view(), name='api-search-suggest'),
     path('', include(router.urls)),
 ]
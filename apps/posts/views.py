@@ -1,14 +1,20 @@
 from rest_framework import viewsets, permissions, filters, status
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.views.generic import ListView, DetailView
 from django.shortcuts import get_object_or_404
-from .models import Category, Tag, Post
+from .models import Category, Tag, Post, PostCard
 from .serializers import (
-    CategorySerializer, TagSerializer, PostListSerializer,
+    CategorySerializer, TagSerializer, PostListSerializer, PostCardSerializer,
     PostDetailSerializer, PostCreateUpdateSerializer
 )
+from .filters import FullTextSearchFilter
+from .pagination import PostCursorPagination
+from .query_budget import QueryBudgetMixin
+from .suggest import suggest_index
 
 
 class IsAdminUserOrReadOnly(permissions.BasePermission):
@@ -21,7 +27,7 @@ class IsAdminUserOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     ViewSet for categories
     GET - publicly available
@@ -31,17 +37,20 @@ class CategoryViewSet(viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [IsAdminUserOrReadOnly]
     lookup_field = 'slug'
+    query_budget = {'posts': 2}   # category + cards
     
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], pagination_class=PostCursorPagination)
     def posts(self, request, slug=None):
-        """Returns posts from given category"""
+        """Returns posts from given category (cursor paginated, supports ?fields=/?expand=)"""
         category = self.get_object()
-        posts = Post.objects.published().by_category(category.slug).with_relations()
-        serializer = PostListSerializer(posts, many=True, context={'request': request})
-        return Response(serializer.data)
+        fields, expand = PostCardSerializer.requested_fields(request)
+        posts = PostCardSerializer.setup_queryset(PostCard.objects.by_category(category.slug), fields, expand)
+        page = self.paginate_queryset(posts)
+        serializer = PostCardSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     ViewSet for tags
     GET - publicly available
@@ -51,17 +60,20 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
     permission_classes = [IsAdminUserOrReadOnly]
     lookup_field = 'slug'
+    query_budget = {'posts': 2}   # tag + cards
     
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], pagination_class=PostCursorPagination)
     def posts(self, request, slug=None):
-        """Returns posts with given tag"""
+        """Returns posts with given tag (cursor paginated, supports ?fields=/?expand=)"""
         tag = self.get_object()
-        posts = Post.objects.published().by_tag(tag.slug).with_relations()
-        serializer = PostListSerializer(posts, many=True, context={'request': request})
-        return Response(serializer.data)
+        fields, expand = PostCardSerializer.requested_fields(request)
+        posts = PostCardSerializer.setup_queryset(PostCard.objects.by_tag(tag.slug), fields, expand)
+        page = self.paginate_queryset(posts)
+        serializer = PostCardSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     ViewSet for posts
     GET - publicly available (only published for non-admin)
@@ -70,29 +82,57 @@ class PostViewSet(viewsets.ModelViewSet):
     queryset = Post.objects.all()
     permission_classes = [IsAdminUserOrReadOnly]
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category__slug', 'tags__slug', 'published', 'author']
-    search_fields = ['title', 'excerpt', 'content']
+    search_fields = ['title', 'excerpt', 'content']  # served from Post.search_vector
     ordering_fields = ['created_at', 'title']
     ordering = ['-created_at']
+    pagination_class = PostCursorPagination
+    
+    # Max SQL queries per action (see query_budget.py)
+    query_budget = {
+        'list': 3,        # (optional count) + posts + tags
+        'published': 3,
+        'retrieve': 5,    # post + tags + gallery + related posts + their tags
+    }
     
     def get_queryset(self):
         """
         Admin sees all posts
         Anonymous/regular users see only published posts
         """
-        queryset = Post.objects.with_relations()
+        serializer_class = self.get_serializer_class()
+        queryset = Post.objects.all()
+        if hasattr(serializer_class, 'requested_fields'):
+            # Only columns and relations of the requested ?fields= are loaded
+            fields, expand = serializer_class.requested_fields(self.request)
+            queryset = serializer_class.setup_queryset(
+                queryset, fields, expand, required=self.ordering_fields
+            )
         
         if not self.request.user.is_staff:
             queryset = queryset.published()
         
         return queryset
     
+    @property
+    def paginator(self):
+        """
+        Cursor pagination, except for ?search= - results ranked by relevance
+        cannot be paged with a created_at cursor
+        """
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get(FullTextSearchFilter.search_param):
+                self._paginator = PageNumberPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+    
     def get_serializer_class(self):
         """
         Returns appropriate serializer depending on action
         """
-        if self.action == 'list':
+        if self.action in ['list', 'published']:
             return PostListSerializer
         elif self.action in ['create', 'update', 'partial_update']:
             return PostCreateUpdateSerializer
@@ -113,6 +153,28 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+class SuggestAPIView(APIView):
+    """
+    Search-as-you-type suggestions (posts, tags, categories)
+    GET /api/search/suggest/?q=<prefix>&limit=<n>
+    Served from in-memory prefix index - no database queries
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    max_limit = 20
+    max_query_length = 100
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()[:self.max_query_length]
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), self.max_limit))
+        except ValueError:
+            limit = 10
+        
+        results = suggest_index.lookup(query, limit) if query else []
+        return Response({'query': query, 'results': results})
+
+
 class PostDetailView(DetailView):
     """
     Post detail view
@@ -124,7 +186,9 @@ class PostDetailView(DetailView):
     
     def get_object(self):
         return get_object_or_404(
-            Post.objects.published().with_relations().prefetch_related('gallery_images'),
+            Post.objects.published().with_relations().prefetch_related(
+                'gallery_images'
+            ).defer(*Post.RAW_CONTENT_FIELDS),
             category__slug=self.kwargs['category_slug'],
             slug=self.kwargs['post_slug']
         )
@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django.contrib.sites',  # Required for sitemaps
     'django.contrib.sitemaps',  # Sitemap generation
+    'django.contrib.postgres',  # Full-text search
     
     # Third-party apps
     'rest_framework',
@@ -50,6 +51,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.pages.page_cache.PageCacheMiddleware',
+    'apps.pages.cache.ReferenceCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -132,6 +135,12 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are stored once per content under hash names (apps/pages/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'apps.pages.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # CKEditor Configuration
 CKEDITOR_UPLOAD_PATH = 'uploads/'
 CKEDITOR_IMAGE_BACKEND = 'pillow'
@@ -161,11 +170,91 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Full-text search configuration (created in posts migration 0006)
+SEARCH_CONFIG = 'polish'
+
+# Seconds between checks whether another process changed suggestion data
+SUGGEST_INDEX_CHECK_INTERVAL = 5
+
+# Cache backends. Full pages of anonymous visitors (apps/pages/page_cache.py)
+# go to the 'pages' cache: PAGE_CACHE_BACKEND=file shares them between
+# worker processes of a single box, 'locmem' keeps them per process (purges
+# still reach every process through the 'shared' cache)
+PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'locmem')
+# The 'shared' cache holds stamps invalidating process-local data (suggestion
+# index version, site content version, page cache purges) and must be seen by
+# every worker process: Redis with SHARED_CACHE_URL=redis://..., otherwise
+# files (worker processes of one box)
+SHARED_CACHE_URL = os.environ.get('SHARED_CACHE_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PAGE_CACHE_DIR', str(BASE_DIR / 'cache' / 'pages')),
+    } if PAGE_CACHE_BACKEND == 'file' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SHARED_CACHE_URL,
+    } if SHARED_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SHARED_CACHE_DIR', str(BASE_DIR / 'cache' / 'shared')),
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+}
+SHARED_CACHE_ALIAS = 'shared'
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Responsive image renditions (apps/pages/images.py), encoded by a background
+# process pool after upload (0 workers = in the saving process). Formats the
+# installed Pillow cannot encode are skipped (AVIF needs Pillow 11.2+)
+IMAGE_RENDITION_WIDTHS = [320, 640, 960, 1280, 1920]
+IMAGE_RENDITION_FORMATS = ['avif', 'webp']
+IMAGE_RENDITION_QUALITY = {'avif': 60, 'webp': 80}
+IMAGE_RENDITION_WORKERS = int(os.environ.get('IMAGE_RENDITION_WORKERS', 2))
+# sizes of content images (apps/posts/content.py) without a width set in the editor
+POST_CONTENT_IMAGE_SIZES = '(min-width: 1024px) 896px, 100vw'
+# Hosts of iframes kept in post content by the sanitizer (apps/posts/content.py)
+POST_CONTENT_IFRAME_HOSTS = ['www.youtube.com', 'youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com']
+
+# Gzipped sitemap sections (apps/pages/sitemap_files.py), re-rendered when their data changes
+SITEMAP_DIR = os.environ.get('SITEMAP_DIR', str(BASE_DIR / 'cache' / 'sitemaps'))
+# robots.txt points crawlers to the sitemap index
+ROBOTS_SITEMAP_VIEW_NAME = 'sitemap_index'
+
+# Cached page fragments (apps/pages/cache.py), invalidated on content changes.
+# Fragments may stay per process, the content version is in the 'shared' cache
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Process-level cache of categories/banners used by template tags
+REFERENCE_CACHE_SIZE = 64
+REFERENCE_CACHE_TTL = 300  # seconds
+
+# Query budgets of API views (apps/posts/query_budget.py)
+# False: log a warning when exceeded, True: raise (enable in the test suite)
+QUERY_BUDGET_STRICT = False
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Map API Configuration
 MAP_API_KEY = os.environ.get('MAP_API_KEY', None)
+# Feed imported by import_medical_centers and queued import jobs
+MAP_IMPORT_FEED_URL = os.environ.get('MAP_IMPORT_FEED_URL', 'https://chorobymozgu.pl/api/map/locations')
+# Seconds between queue polls of manage.py run_import_worker
+MAP_IMPORT_POLL_INTERVAL = 5
+# Seconds between heartbeats of a running import job
+MAP_IMPORT_HEARTBEAT_INTERVAL = 30
+# Seconds without a heartbeat after which a running job is requeued (worker died)
+MAP_IMPORT_STALE_AFTER = 300
+# Days deletions are kept for ?since= syncs of /api/map/locations/ - older
+# client copies get the full list
+MAP_DELETED_RETENTION_DAYS = 30
 
 # SEO Configuration
 SITE_ID = 1  # Required for django.contrib.sites and sitemaps
@@ -1,26 +1,24 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
-from apps.posts.sitemaps import PostSitemap, CategorySitemap
-from apps.pages.sitemaps import StaticPagesSitemap
-
-# Sitemaps configuration
-sitemaps = {
-    'posts': PostSitemap,
-    'categories': CategorySitemap,
-    'pages': StaticPagesSitemap,
-}
+from apps.pages.sitemap_files import sitemap_index, sitemap_section
+from apps.pages.images import rendition_view
+from apps.pages.storage import media_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_index, name='sitemap_index'),
+    path('sitemap-<slug:section>.xml', sitemap_section, name='sitemap_section'),
     path('robots.txt', include('robots.urls')),
+    # Image renditions missing on disk (nginx passes them on), encoded on first request
+    re_path(r'^media/(?P<path>.+\.[0-9a-f]{10}\.\d+w\.(?:avif|webp))$', rendition_view, name='image_rendition'),
+    # Content-addressed media files, served with immutable cache headers
+    re_path(r'^media/(?P<path>(?:.+/)?[0-9a-f]{32}\.[A-Za-z0-9]+)$', media_view, name='media_file'),
+    path('api/', include('apps.posts.urls')),   # API (before post detail catch-all)
     path('', include('apps.pages.urls')),       # Strony statyczne
-    path('', include('apps.posts.urls_web')),   # Widoki webowe postów
     path('', include('apps.map.urls')),         # Mapa ośrodków medycznych
-    path('api/', include('apps.posts.urls')),   # API
+    path('', include('apps.posts.urls_web')),   # Widoki webowe postów
     path('ckeditor/', include('ckeditor_uploader.urls')),
 ]
 
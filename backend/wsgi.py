@@ -5,3 +5,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings.prod')
 
 application = get_wsgi_application()
+
+# Build in-memory search suggestion index before serving requests
+from apps.posts.suggest import warm_up  # noqa: E402
+warm_up()